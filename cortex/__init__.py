@@ -1,12 +1,36 @@
-# recursive `from module import *` excluding anything prefixed with '_':
-from importlib import import_module
-from pkgutil import walk_packages
-for mod_info in walk_packages(__path__, __name__ + '.'):
-    if mod_info.name.endswith('__main__'):
-        continue
-    mod = import_module(mod_info.name)
+# lazy recursive `from module import *` excluding anything prefixed with '_':
+# names are looked up in the static manifest and their module is only
+# imported on first access (see cortex/_lazy.py).
+import sys as _sys
+from importlib import import_module as _import_module
+from types import ModuleType as _ModuleType
+from ._manifest import EXPORTS as _EXPORTS, SHADOWED as _SHADOWED
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
     try:
-        names = mod.__dict__['__all__']
+        module, attr = _EXPORTS[name]
     except KeyError:
-        names = [k for k in mod.__dict__ if not k.startswith('_')]
-    globals().update({ k: getattr(mod, k) for k in names })
\ No newline at end of file
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = _import_module(module)
+    if attr is not None:
+        value = getattr(value, attr)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+class _Package(_ModuleType):
+    """ The cortex package, whose flattened names are not hidden by submodules. """
+    def __setattr__(self, name, value):
+        # Importing a submodule binds it on the package, which would hide the
+        # flattened name it shares (ex: cortex.run, the function): bind that name
+        # again instead, as the eager loader did.
+        if (name in _SHADOWED and isinstance(value, _ModuleType)
+                and value.__name__ == f'{self.__name__}.{name}'):
+            value = getattr(value, _EXPORTS[name][1])
+        super().__setattr__(name, value)
+
+_sys.modules[__name__].__class__ = _Package
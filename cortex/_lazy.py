@@ -0,0 +1,131 @@
+""" Lazy loading of cortex modules and the static feature manifest.
+
+    Importing cortex used to eagerly import every module in the package
+    (pulling in sklearn, altair, seaborn, statsmodels, ...). Instead, the
+    names cortex exposes and the module each feature lives in are recorded
+    in a static manifest (cortex/_manifest.py) and modules are only
+    imported on first attribute access.
+
+    Regenerate the manifest after adding, removing or renaming a feature
+    or a public name with:
+
+        python -m cortex._lazy
+"""
+import os
+import sys
+import types
+from pprint import pformat
+from importlib import import_module
+from pkgutil import iter_modules, walk_packages
+
+
+def lazy_package(name, path):
+    """ Build the module-level `__getattr__` and `__dir__` of a lazy package.
+
+        Args:
+            name: the package name (`__name__`)
+            path: the package path (`__path__`)
+        Returns:
+            The (__getattr__, __dir__) functions, importing submodules
+            (ex: cortex.raw.gps) on first access.
+    """
+    def __getattr__(attr):
+        if attr.startswith('__'):
+            raise AttributeError(f"module {name!r} has no attribute {attr!r}")
+        try:
+            return import_module(f'{name}.{attr}')
+        except ModuleNotFoundError as e:
+            if e.name != f'{name}.{attr}':
+                raise
+            raise AttributeError(f"module {name!r} has no attribute {attr!r}") from None
+
+    def __dir__():
+        return sorted(set(sys.modules[name].__dict__) |
+                      {m.name for m in iter_modules(path)})
+
+    return __getattr__, __dir__
+
+
+def build_manifest(package='cortex'):
+    """ Eagerly import the whole package and record what it exposes.
+
+        Replicates the historical recursive `from module import *` (last
+        writer wins) but records where each name can be imported from most
+        cheaply, along with the module defining each registered feature.
+
+        Args:
+            package: the package name to walk
+        Returns:
+            A dict with FEATURES, EXPORTS and SHADOWED.
+    """
+    root = import_module(package)
+    modules = []
+    exports = {}
+    for mod_info in walk_packages(root.__path__, package + '.'):
+        if (mod_info.name.endswith('__main__') or
+                mod_info.name.rsplit('.', 1)[1].startswith('_')):
+            continue
+        modules.append(import_module(mod_info.name))
+    # Collect once everything is imported so that packages also export
+    # the submodules their siblings imported.
+    for mod in modules:
+        try:
+            names = mod.__dict__['__all__']
+        except KeyError:
+            names = [k for k in mod.__dict__ if not k.startswith('_')]
+        exports.update({k: mod for k in names})
+
+    def _home(name, obj, fallback):
+        # Prefer the module named after the object (cortex.raw.gps for gps),
+        # then the module defining it, then whichever exported it first.
+        if isinstance(obj, types.ModuleType):
+            return (obj.__name__, None)
+        candidates = [m.__name__ for m in modules if m.__dict__.get(name) is obj]
+        for mod_name in candidates:
+            if mod_name.rsplit('.', 1)[1] == name:
+                return (mod_name, name)
+        if getattr(obj, '__module__', None) in candidates:
+            return (obj.__module__, name)
+        return (candidates[0] if candidates else fallback.__name__, name)
+
+    export_map = {k: _home(k, getattr(mod, k), mod) for k, mod in exports.items()}
+    # Top-level submodules were always bound on the package once imported.
+    for mod in modules:
+        if mod.__name__.count('.') == 1:
+            export_map.setdefault(mod.__name__.split('.')[1], (mod.__name__, None))
+
+    features = []
+    from cortex.feature_types import __features__
+    for f in __features__:
+        func = f['callable'].__name__
+        module = _home(func, f['callable'], None)[0]
+        features.append({'name': f['name'], 'type': f['type'],
+                         'callable': func, 'module': module})
+
+    # Importing a submodule binds it on its parent package, hiding any
+    # flattened export of the same name (ex: cortex.run the function); the
+    # package binds these names again (see cortex/__init__.py).
+    shadowed = [k for k, v in export_map.items()
+                if v != (f'{package}.{k}', None) and
+                any(m.__name__ == f'{package}.{k}' for m in modules)]
+    return {'FEATURES': features, 'EXPORTS': export_map, 'SHADOWED': shadowed}
+
+
+def write_manifest(path=None):
+    """ Regenerate cortex/_manifest.py.
+
+        Args:
+            path: where to write the manifest (default: next to this file)
+    """
+    manifest = build_manifest()
+    if path is None:
+        path = os.path.join(os.path.dirname(__file__), '_manifest.py')
+    with open(path, 'w') as f:
+        f.write('""" Static manifest of the cortex features and exported names.\n\n'
+                '    Generated by `python -m cortex._lazy`; do not edit by hand.\n"""\n')
+        for key, value in manifest.items():
+            f.write(f'\n{key} = {pformat(value, width=100, sort_dicts=False)}\n')
+
+
+if __name__ == '__main__':
+    write_manifest()
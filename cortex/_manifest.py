@@ -0,0 +1,458 @@
+""" Static manifest of the cortex features and exported names.
+
+    Generated by `python -m cortex._lazy`; do not edit by hand.
+"""
+
+FEATURES = [{'name': 'lamp.accelerometer',
+  'type': 'raw',
+  'callable': 'accelerometer',
+  'module': 'cortex.raw.accelerometer'},
+ {'name': 'cortex.acc_jerk',
+  'type': 'primary',
+  'callable': 'acc_jerk',
+  'module': 'cortex.primary.acc_jerk'},
+ {'name': 'lamp.balloon_risk',
+  'type': 'raw',
+  'callable': 'balloon_risk',
+  'module': 'cortex.raw.balloon_risk'},
+ {'name': 'lamp.cats_and_dogs',
+  'type': 'raw',
+  'callable': 'cats_and_dogs',
+  'module': 'cortex.raw.cats_and_dogs'},
+ {'name': 'lamp.jewels_a', 'type': 'raw', 'callable': 'jewels_a', 'module': 'cortex.raw.jewels_a'},
+ {'name': 'lamp.jewels_b', 'type': 'raw', 'callable': 'jewels_b', 'module': 'cortex.raw.jewels_b'},
+ {'name': 'lamp.pop_the_bubbles',
+  'type': 'raw',
+  'callable': 'pop_the_bubbles',
+  'module': 'cortex.raw.pop_the_bubbles'},
+ {'name': 'lamp.spatial_span',
+  'type': 'raw',
+  'callable': 'spatial_span',
+  'module': 'cortex.raw.spatial_span'},
+ {'name': 'cortex.game_level_scores',
+  'type': 'primary',
+  'callable': 'game_level_scores',
+  'module': 'cortex.primary.game_level_scores'},
+ {'name': 'lamp.device_state',
+  'type': 'raw',
+  'callable': 'device_state',
+  'module': 'cortex.raw.device_state'},
+ {'name': 'cortex.screen_active',
+  'type': 'primary',
+  'callable': 'screen_active',
+  'module': 'cortex.primary.screen_active'},
+ {'name': 'lamp.gps', 'type': 'raw', 'callable': 'gps', 'module': 'cortex.raw.gps'},
+ {'name': 'cortex.significant_locations',
+  'type': 'primary',
+  'callable': 'significant_locations',
+  'module': 'cortex.primary.significant_locations'},
+ {'name': 'lamp.survey', 'type': 'raw', 'callable': 'survey', 'module': 'cortex.raw.survey'},
+ {'name': 'cortex.survey_scores',
+  'type': 'primary',
+  'callable': 'survey_scores',
+  'module': 'cortex.primary.survey_scores'},
+ {'name': 'cortex.trips', 'type': 'primary', 'callable': 'trips', 'module': 'cortex.primary.trips'},
+ {'name': 'com.apple.sensorkit.ambient_light',
+  'type': 'raw',
+  'callable': 'ambient_light',
+  'module': 'cortex.raw.ambient_light'},
+ {'name': 'lamp.analytics',
+  'type': 'raw',
+  'callable': 'analytics',
+  'module': 'cortex.raw.analytics'},
+ {'name': 'lamp.bluetooth',
+  'type': 'raw',
+  'callable': 'bluetooth',
+  'module': 'cortex.raw.bluetooth'},
+ {'name': 'lamp.calls', 'type': 'raw', 'callable': 'calls', 'module': 'cortex.raw.calls'},
+ {'name': 'lamp.dcog', 'type': 'raw', 'callable': 'dcog', 'module': 'cortex.raw.dcog'},
+ {'name': 'lamp.device_motion',
+  'type': 'raw',
+  'callable': 'device_motion',
+  'module': 'cortex.raw.device_motion'},
+ {'name': 'com.apple.sensorkit.device_usage',
+  'type': 'raw',
+  'callable': 'device_usage',
+  'module': 'cortex.raw.device_usage'},
+ {'name': 'lamp.digit_span',
+  'type': 'raw',
+  'callable': 'digit_span',
+  'module': 'cortex.raw.digit_span'},
+ {'name': 'lamp.fragmented_letters',
+  'type': 'raw',
+  'callable': 'fragmented_letters',
+  'module': 'cortex.raw.fragmented_letters'},
+ {'name': 'lamp.funny_memory',
+  'type': 'raw',
+  'callable': 'funny_memory',
+  'module': 'cortex.raw.funny_memory'},
+ {'name': 'lamp.gyroscope',
+  'type': 'raw',
+  'callable': 'gyroscope',
+  'module': 'cortex.raw.gyroscope'},
+ {'name': 'com.apple.sensorkit.messages_usage',
+  'type': 'raw',
+  'callable': 'messages_usage',
+  'module': 'cortex.raw.messages_usage'},
+ {'name': 'lamp.nearby_device',
+  'type': 'raw',
+  'callable': 'nearby_device',
+  'module': 'cortex.raw.nearby_device'},
+ {'name': 'com.apple.sensorkit.phone_usage',
+  'type': 'raw',
+  'callable': 'phone_usage',
+  'module': 'cortex.raw.phone_usage'},
+ {'name': 'lamp.screen_state',
+  'type': 'raw',
+  'callable': 'screen_state',
+  'module': 'cortex.raw.screen_state'},
+ {'name': 'lamp.sleep', 'type': 'raw', 'callable': 'sleep', 'module': 'cortex.raw.sleep'},
+ {'name': 'lamp.sms', 'type': 'raw', 'callable': 'sms', 'module': 'cortex.raw.sms'},
+ {'name': 'lamp.steps', 'type': 'raw', 'callable': 'steps', 'module': 'cortex.raw.steps'},
+ {'name': 'lamp.telephony',
+  'type': 'raw',
+  'callable': 'telephony',
+  'module': 'cortex.raw.telephony'},
+ {'name': 'lamp.trails_b', 'type': 'raw', 'callable': 'trails_b', 'module': 'cortex.raw.trails_b'},
+ {'name': 'com.apple.sensorkit.visits',
+  'type': 'raw',
+  'callable': 'visits',
+  'module': 'cortex.raw.visits'},
+ {'name': 'lamp.voice_survey',
+  'type': 'raw',
+  'callable': 'voice_survey',
+  'module': 'cortex.raw.voice_survey'},
+ {'name': 'cortex.app_time',
+  'type': 'secondary',
+  'callable': 'app_time',
+  'module': 'cortex.secondary.app_time'},
+ {'name': 'cortex.battery_level',
+  'type': 'secondary',
+  'callable': 'battery_level',
+  'module': 'cortex.secondary.battery_level'},
+ {'name': 'cortex.feature.call_degree',
+  'type': 'secondary',
+  'callable': 'call_degree',
+  'module': 'cortex.secondary.call_degree'},
+ {'name': 'cortex.feature.call_duration',
+  'type': 'secondary',
+  'callable': 'call_duration',
+  'module': 'cortex.secondary.call_duration'},
+ {'name': 'cortex.feature.call_number',
+  'type': 'secondary',
+  'callable': 'call_number',
+  'module': 'cortex.secondary.call_number'},
+ {'name': 'cortex.feature.data_quality',
+  'type': 'secondary',
+  'callable': 'data_quality',
+  'module': 'cortex.secondary.data_quality'},
+ {'name': 'cortex.feature.entropy',
+  'type': 'secondary',
+  'callable': 'entropy',
+  'module': 'cortex.secondary.entropy'},
+ {'name': 'cortex.game_results',
+  'type': 'secondary',
+  'callable': 'game_results',
+  'module': 'cortex.secondary.game_results'},
+ {'name': 'cortex.feature.healthkit_sleep_duration',
+  'type': 'secondary',
+  'callable': 'healthkit_sleep_duration',
+  'module': 'cortex.secondary.healthkit_sleep_duration'},
+ {'name': 'cortex.feature.hometime',
+  'type': 'secondary',
+  'callable': 'hometime',
+  'module': 'cortex.secondary.hometime'},
+ {'name': 'cortex.feature.inactive_duration',
+  'type': 'secondary',
+  'callable': 'inactive_duration',
+  'module': 'cortex.secondary.inactive_duration'},
+ {'name': 'cortex.feature.nearby_device_count',
+  'type': 'secondary',
+  'callable': 'nearby_device_count',
+  'module': 'cortex.secondary.nearby_device_count'},
+ {'name': 'cortex.feature.screen_duration',
+  'type': 'secondary',
+  'callable': 'screen_duration',
+  'module': 'cortex.secondary.screen_duration'},
+ {'name': 'cortex.feature.screen_unlock_duration',
+  'type': 'secondary',
+  'callable': 'screen_unlock_duration',
+  'module': 'cortex.secondary.screen_unlock_duration'},
+ {'name': 'cortex.feature.screen_unlocks',
+  'type': 'secondary',
+  'callable': 'screen_unlocks',
+  'module': 'cortex.secondary.screen_unlocks'},
+ {'name': 'cortex.feature.screen_wakes',
+  'type': 'secondary',
+  'callable': 'screen_wakes',
+  'module': 'cortex.secondary.screen_wakes'},
+ {'name': 'cortex.feature.step_count',
+  'type': 'secondary',
+  'callable': 'step_count',
+  'module': 'cortex.secondary.step_count'},
+ {'name': 'cortex.survey_results',
+  'type': 'secondary',
+  'callable': 'survey_results',
+  'module': 'cortex.secondary.survey_results'},
+ {'name': 'cortex.feature.text_degree',
+  'type': 'secondary',
+  'callable': 'text_degree',
+  'module': 'cortex.secondary.text_degree'},
+ {'name': 'cortex.feature.text_number',
+  'type': 'secondary',
+  'callable': 'text_number',
+  'module': 'cortex.secondary.text_number'},
+ {'name': 'cortex.feature.trip_distance',
+  'type': 'secondary',
+  'callable': 'trip_distance',
+  'module': 'cortex.secondary.trip_distance'},
+ {'name': 'cortex.feature.trip_duration',
+  'type': 'secondary',
+  'callable': 'trip_duration',
+  'module': 'cortex.secondary.trip_duration'},
+ {'name': 'cortex.visit_time',
+  'type': 'secondary',
+  'callable': 'visit_time',
+  'module': 'cortex.secondary.visit_time'}]
+
+EXPORTS = {'os': ('os', None),
+ 'sys': ('sys', None),
+ 'json': ('json', None),
+ 'logging': ('logging', None),
+ 'argparse': ('argparse', None),
+ 'pprint': ('cortex.feature_types', 'pprint'),
+ 'inspect': ('inspect', None),
+ 'getfullargspec': ('cortex.feature_types', 'getfullargspec'),
+ 'tarfile': ('tarfile', None),
+ 're': ('re', None),
+ 'heapq': ('heapq', None),
+ 'hashlib': ('hashlib', None),
+ 'time': ('time', None),
+ 'sqlite3': ('sqlite3', None),
+ 'threading': ('threading', None),
+ 'OrderedDict': ('cortex.feature_types', 'OrderedDict'),
+ 'shutil': ('shutil', None),
+ 'closing': ('cortex.feature_types', 'closing'),
+ 'contextmanager': ('cortex.feature_types', 'contextmanager'),
+ 'ThreadPoolExecutor': ('cortex.feature_types', 'ThreadPoolExecutor'),
+ 'import_module': ('cortex.feature_types', 'import_module'),
+ 'TopologicalSorter': ('cortex.feature_types', 'TopologicalSorter'),
+ 'pickle': ('compress_pickle', None),
+ 'np': ('numpy', None),
+ 'pd': ('pandas', None),
+ 'yaml': ('yaml', None),
+ 'LAMP': ('LAMP', None),
+ 'lamp_client': ('cortex.feature_types', 'lamp_client'),
+ 'log': ('cortex.visualizations.data_quality', 'log'),
+ 'all_features': ('cortex.feature_types', 'all_features'),
+ 'load_features': ('cortex.feature_types', 'load_features'),
+ 'ACTIVITIES': ('cortex.feature_types', 'ACTIVITIES'),
+ 'MAX_RETURN_SIZE': ('cortex.raw.survey', 'MAX_RETURN_SIZE'),
+ 'activity_catalog': ('cortex.feature_types', 'activity_catalog'),
+ 'invalidate_activity_catalog': ('cortex.feature_types', 'invalidate_activity_catalog'),
+ 'primary_memo': ('cortex.feature_types', 'primary_memo'),
+ 'primary_memo_stats': ('cortex.feature_types', 'primary_memo_stats'),
+ 'feature_plan': ('cortex.feature_types', 'feature_plan'),
+ 'shared_fetches': ('cortex.feature_types', 'shared_fetches'),
+ 'raw_feature': ('cortex.feature_types', 'raw_feature'),
+ 'primary_feature': ('cortex.feature_types', 'primary_feature'),
+ 'secondary_feature': ('cortex.feature_types', 'secondary_feature'),
+ 'secondary_kernel': ('cortex.feature_types', 'secondary_kernel'),
+ 'bin_events': ('cortex.feature_types', 'bin_events'),
+ 'delete_attach': ('cortex.feature_types', 'delete_attach'),
+ 'CACHE_INDEX': ('cortex.feature_types', 'CACHE_INDEX'),
+ 'ARRAY_FIELDS': ('cortex.feature_types', 'ARRAY_FIELDS'),
+ 'raw_arrays': ('cortex.feature_types', 'raw_arrays'),
+ 'iter_pages': ('cortex.feature_types', 'iter_pages'),
+ 'data_bounds': ('cortex.feature_types', 'data_bounds'),
+ 'invalidate_data_bounds': ('cortex.feature_types', 'invalidate_data_bounds'),
+ 'reindex_cache': ('cortex.feature_types', 'reindex_cache'),
+ 'delete_cache': ('cortex.feature_types', 'delete_cache'),
+ 'export_cache': ('cortex.feature_types', 'export_cache'),
+ 'import_cache': ('cortex.feature_types', 'import_cache'),
+ 'cache_finder': ('cortex.feature_types', 'cache_finder'),
+ 'datetime': ('cortex.visualizations.participant', 'datetime'),
+ 'math': ('math', None),
+ 'cortex': ('cortex', None),
+ 'itertools': ('itertools', None),
+ 'reduce': ('cortex.participant_ext', 'reduce'),
+ 'pytz': ('pytz', None),
+ 'tzlocal': ('cortex.participant_ext', 'tzlocal'),
+ 'ParticipantExt': ('cortex.participant_ext', 'ParticipantExt'),
+ 'acc_jerk': ('cortex.secondary.inactive_duration', 'acc_jerk'),
+ 'game_level_scores': ('cortex.primary.game_level_scores', 'game_level_scores'),
+ 'screen_active': ('cortex.primary.screen_active', 'screen_active'),
+ 'significant_locations': ('cortex.primary.significant_locations', 'significant_locations'),
+ 'survey_scores': ('cortex.primary.survey_scores', 'survey_scores'),
+ 'trips': ('cortex.primary.trips', 'trips'),
+ 'accelerometer': ('cortex.raw.accelerometer', 'accelerometer'),
+ 'balloon_risk': ('cortex.raw.balloon_risk', 'balloon_risk'),
+ 'cats_and_dogs': ('cortex.raw.cats_and_dogs', 'cats_and_dogs'),
+ 'jewels_a': ('cortex.raw.jewels_a', 'jewels_a'),
+ 'jewels_b': ('cortex.raw.jewels_b', 'jewels_b'),
+ 'pop_the_bubbles': ('cortex.raw.pop_the_bubbles', 'pop_the_bubbles'),
+ 'spatial_span': ('cortex.raw.spatial_span', 'spatial_span'),
+ 'raw': ('cortex.raw', None),
+ 'GAMES': ('cortex.primary.game_level_scores', 'GAMES'),
+ 'score_pop_the_bubbles': ('cortex.primary.game_level_scores', 'score_pop_the_bubbles'),
+ 'score_balloon_risk': ('cortex.primary.game_level_scores', 'score_balloon_risk'),
+ 'device_state': ('cortex.raw.device_state', 'device_state'),
+ 'KMeans': ('cortex.primary.significant_locations', 'KMeans'),
+ 'DBSCAN': ('cortex.primary.significant_locations', 'DBSCAN'),
+ 'gps': ('cortex.raw.gps', 'gps'),
+ 'euclid': ('cortex.primary.significant_locations', 'euclid'),
+ 'distance': ('cortex.primary.significant_locations', 'distance'),
+ 'remove_clusters': ('cortex.primary.significant_locations', 'remove_clusters'),
+ 'groupby': ('cortex.primary.survey_scores', 'groupby'),
+ 'survey': ('cortex.raw.survey', 'survey'),
+ 'score_question': ('cortex.primary.survey_scores', 'score_question'),
+ 'SPEED_THRESHOLD': ('cortex.primary.trips', 'SPEED_THRESHOLD'),
+ 'TIME_THRESHOLD': ('cortex.primary.trips', 'TIME_THRESHOLD'),
+ 'ambient_light': ('cortex.raw.ambient_light', 'ambient_light'),
+ 'analytics': ('cortex.raw.analytics', 'analytics'),
+ 'bluetooth': ('cortex.raw.bluetooth', 'bluetooth'),
+ 'calls': ('cortex.raw.calls', 'calls'),
+ 'dcog': ('cortex.raw.dcog', 'dcog'),
+ 'device_motion': ('cortex.raw.device_motion', 'device_motion'),
+ 'device_usage': ('cortex.raw.device_usage', 'device_usage'),
+ 'digit_span': ('cortex.raw.digit_span', 'digit_span'),
+ 'fragmented_letters': ('cortex.raw.fragmented_letters', 'fragmented_letters'),
+ 'funny_memory': ('cortex.raw.funny_memory', 'funny_memory'),
+ 'gyroscope': ('cortex.raw.gyroscope', 'gyroscope'),
+ 'messages_usage': ('cortex.raw.messages_usage', 'messages_usage'),
+ 'nearby_device': ('cortex.raw.nearby_device', 'nearby_device'),
+ 'phone_usage': ('cortex.raw.phone_usage', 'phone_usage'),
+ 'screen_state': ('cortex.raw.screen_state', 'screen_state'),
+ 'sleep': ('cortex.raw.sleep', 'sleep'),
+ 'sms': ('cortex.raw.sms', 'sms'),
+ 'steps': ('cortex.raw.steps', 'steps'),
+ 'telephony': ('cortex.raw.telephony', 'telephony'),
+ 'trails_b': ('cortex.raw.trails_b', 'trails_b'),
+ 'visits': ('cortex.raw.visits', 'visits'),
+ 'voice_survey': ('cortex.raw.voice_survey', 'voice_survey'),
+ 'glob': ('glob', None),
+ 'ProcessPoolExecutor': ('cortex.run', 'ProcessPoolExecutor'),
+ 'generate_ids': ('cortex.utils.useful_functions', 'generate_ids'),
+ 'shift_time': ('cortex.utils.useful_functions', 'shift_time'),
+ 'now': ('cortex.run', 'now'),
+ 'MS_PER_DAY': ('cortex.run', 'MS_PER_DAY'),
+ 'CHECKPOINT_INDEX': ('cortex.run', 'CHECKPOINT_INDEX'),
+ 'run': ('cortex.run', 'run'),
+ 'read_dataset': ('cortex.run', 'read_dataset'),
+ 'get_features_for_participant': ('cortex.run', 'get_features_for_participant'),
+ 'get_feature_for_participant': ('cortex.run', 'get_feature_for_participant'),
+ 'get_first_last_datapoint': ('cortex.run', 'get_first_last_datapoint'),
+ 'set_date_9am': ('cortex.run', 'set_date_9am'),
+ 'app_time': ('cortex.secondary.app_time', 'app_time'),
+ 'battery_level': ('cortex.secondary.battery_level', 'battery_level'),
+ 'call_degree': ('cortex.secondary.call_degree', 'call_degree'),
+ 'call_duration': ('cortex.secondary.call_duration', 'call_duration'),
+ 'call_number': ('cortex.secondary.call_number', 'call_number'),
+ 'data_quality': ('cortex.visualizations.data_quality', 'data_quality'),
+ 'entropy': ('cortex.secondary.entropy', 'entropy'),
+ 'game_results': ('cortex.secondary.game_results', 'game_results'),
+ 'healthkit_sleep_duration': ('cortex.secondary.healthkit_sleep_duration',
+                              'healthkit_sleep_duration'),
+ 'hometime': ('cortex.secondary.hometime', 'hometime'),
+ 'inactive_duration': ('cortex.secondary.inactive_duration', 'inactive_duration'),
+ 'nearby_device_count': ('cortex.secondary.nearby_device_count', 'nearby_device_count'),
+ 'screen_duration': ('cortex.secondary.screen_duration', 'screen_duration'),
+ 'screen_unlock_duration': ('cortex.secondary.screen_unlock_duration', 'screen_unlock_duration'),
+ 'screen_unlocks': ('cortex.secondary.screen_unlocks', 'screen_unlocks'),
+ 'screen_wakes': ('cortex.secondary.screen_wakes', 'screen_wakes'),
+ 'step_count': ('cortex.secondary.step_count', 'step_count'),
+ 'survey_results': ('cortex.secondary.survey_results', 'survey_results'),
+ 'text_degree': ('cortex.secondary.text_degree', 'text_degree'),
+ 'text_number': ('cortex.secondary.text_number', 'text_number'),
+ 'trip_distance': ('cortex.secondary.trip_distance', 'trip_distance'),
+ 'trip_duration': ('cortex.secondary.trip_duration', 'trip_duration'),
+ 'visit_time': ('cortex.secondary.visit_time', 'visit_time'),
+ 'statistics': ('statistics', None),
+ 'MS_IN_A_DAY': ('cortex.utils.module_scheduler', 'MS_IN_A_DAY'),
+ 'max_intersection': ('cortex.secondary.inactive_duration', 'max_intersection'),
+ 'get_max_bout': ('cortex.secondary.inactive_duration', 'get_max_bout'),
+ 'get_bout_start': ('cortex.secondary.inactive_duration', 'get_bout_start'),
+ 'get_bout_end': ('cortex.secondary.inactive_duration', 'get_bout_end'),
+ 'get_screen_bouts': ('cortex.secondary.inactive_duration', 'get_screen_bouts'),
+ 'get_acc_bouts': ('cortex.secondary.inactive_duration', 'get_acc_bouts'),
+ 'get_max_index': ('cortex.secondary.inactive_duration', 'get_max_index'),
+ 'StudyExt': ('cortex.study_ext', 'StudyExt'),
+ 'useful_functions': ('cortex.utils.useful_functions', None),
+ 'db': ('cortex.utils.db', None),
+ 'misc_functions': ('cortex.utils.misc_functions', None),
+ 'module_scheduler': ('cortex.utils.module_scheduler', None),
+ 'notifications': ('cortex.utils.notifications', None),
+ 'MongoClient': ('cortex.utils.db', 'MongoClient'),
+ 'create_client': ('cortex.utils.db', 'create_client'),
+ 'change_parent': ('cortex.utils.db', 'change_parent'),
+ 'restore_activities_manually': ('cortex.utils.db', 'restore_activities_manually'),
+ 'list_deleted_activities': ('cortex.utils.db', 'list_deleted_activities'),
+ 'restore_activities': ('cortex.utils.db', 'restore_activities'),
+ 'list_deleted_participants': ('cortex.utils.db', 'list_deleted_participants'),
+ 'restore_participant': ('cortex.utils.db', 'restore_participant'),
+ 'get_survey_names': ('cortex.utils.db', 'get_survey_names'),
+ 'mode': ('cortex.utils.misc_functions', 'mode'),
+ 'get_os_version': ('cortex.utils.misc_functions', 'get_os_version'),
+ 'random': ('random', None),
+ 'path_prefix': ('cortex.utils.module_scheduler', 'path_prefix'),
+ 'MODULE_JSON_FILE': ('cortex.utils.module_scheduler', 'MODULE_JSON_FILE'),
+ 'MODULE_SPEC_FILE': ('cortex.utils.module_scheduler', 'MODULE_SPEC_FILE'),
+ 'file_handle': ('cortex.utils.module_scheduler', 'file_handle'),
+ 'MODULE_JSON': ('cortex.utils.module_scheduler', 'MODULE_JSON'),
+ 'MODULE_SPECS': ('cortex.utils.module_scheduler', 'MODULE_SPECS'),
+ 'schedule_module': ('cortex.utils.module_scheduler', 'schedule_module'),
+ 'unschedule_other_surveys': ('cortex.utils.module_scheduler', 'unschedule_other_surveys'),
+ 'unschedule_specific_survey': ('cortex.utils.module_scheduler', 'unschedule_specific_survey'),
+ 'correct_modules': ('cortex.utils.module_scheduler', 'correct_modules'),
+ 'pformat': ('cortex.utils.notifications', 'pformat'),
+ 'requests': ('requests', None),
+ 'push_email': ('cortex.utils.notifications', 'push_email'),
+ 'send_push_notification': ('cortex.utils.notifications', 'send_push_notification'),
+ 'slack': ('cortex.utils.notifications', 'slack'),
+ 'MS_IN_DAY': ('cortex.visualizations.data_quality', 'MS_IN_DAY'),
+ 'EXPERIMENTAL_NAME': ('cortex.utils.useful_functions', 'EXPERIMENTAL_NAME'),
+ 'delete_sensors': ('cortex.utils.useful_functions', 'delete_sensors'),
+ 'add_sensor': ('cortex.utils.useful_functions', 'add_sensor'),
+ 'propagate_activity': ('cortex.utils.useful_functions', 'propagate_activity'),
+ 'get_part_id_from_name': ('cortex.utils.useful_functions', 'get_part_id_from_name'),
+ 'get_activity_names': ('cortex.utils.useful_functions', 'get_activity_names'),
+ 'set_graph': ('cortex.utils.useful_functions', 'set_graph'),
+ 'correlation_functions': ('cortex.visualizations.correlation_functions', None),
+ 'participant': ('cortex.visualizations.participant', None),
+ 'pearsonr': ('cortex.visualizations.correlation_functions', 'pearsonr'),
+ 'multipletests': ('cortex.visualizations.correlation_functions', 'multipletests'),
+ 'sns': ('seaborn', None),
+ 'plt': ('matplotlib.pyplot', None),
+ 'save_surveys_to_file': ('cortex.visualizations.correlation_functions', 'save_surveys_to_file'),
+ 'get_avg_var_data': ('cortex.visualizations.correlation_functions', 'get_avg_var_data'),
+ 'get_corr': ('cortex.visualizations.correlation_functions', 'get_corr'),
+ 'make_corr_plot': ('cortex.visualizations.correlation_functions', 'make_corr_plot'),
+ 'produce_improvement_df0': ('cortex.visualizations.correlation_functions',
+                             'produce_improvement_df0'),
+ 'alt': ('altair', None),
+ 'b': ('cortex.visualizations.data_quality', 'b'),
+ 'formatted_date': ('cortex.visualizations.data_quality', 'formatted_date'),
+ 'get_parts': ('cortex.visualizations.data_quality', 'get_parts'),
+ 'get_data_tags_df': ('cortex.visualizations.data_quality', 'get_data_tags_df'),
+ 'make_activity_count_graph': ('cortex.visualizations.data_quality', 'make_activity_count_graph'),
+ 'make_data_qual_tags': ('cortex.visualizations.data_quality', 'make_data_qual_tags'),
+ 'make_passive_data_graphs': ('cortex.visualizations.data_quality', 'make_passive_data_graphs'),
+ 'make_survey_count_graph_by_name': ('cortex.visualizations.data_quality',
+                                     'make_survey_count_graph_by_name'),
+ 'make_percent_completion_graph': ('cortex.visualizations.data_quality',
+                                   'make_percent_completion_graph'),
+ 'clear_chart': ('cortex.visualizations.data_quality', 'clear_chart'),
+ 'MS_PER_HOUR': ('cortex.visualizations.participant', 'MS_PER_HOUR'),
+ 'create_sample_window': ('cortex.visualizations.participant', 'create_sample_window'),
+ 'passive': ('cortex.visualizations.participant', 'passive'),
+ 'active': ('cortex.visualizations.participant', 'active'),
+ 'cortex_tertiles': ('cortex.visualizations.participant', 'cortex_tertiles'),
+ 'feature_types': ('cortex.feature_types', None),
+ 'participant_ext': ('cortex.participant_ext', None),
+ 'primary': ('cortex.primary', None),
+ 'secondary': ('cortex.secondary', None),
+ 'study_ext': ('cortex.study_ext', None),
+ 'utils': ('cortex.utils', None),
+ 'visualizations': ('cortex.visualizations', None)}
+
+SHADOWED = ['run']
@@ -10,20 +10,75 @@ import inspect
 from inspect import getfullargspec
 import tarfile
 import re
-import copy
+import heapq
+import hashlib
 import time
+import sqlite3
+import threading
+from collections import OrderedDict
+import shutil
+from contextlib import closing, contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from graphlib import TopologicalSorter
 import compress_pickle as pickle
 import numpy as np
 import pandas as pd
 import yaml
 import LAMP
-# Connect to the LAMP API server.
-# Environment variables are required to run cortex.
-if not 'LAMP_ACCESS_KEY' in os.environ or not 'LAMP_SECRET_KEY' in os.environ:
-    raise Exception("You must configure `LAMP_ACCESS_KEY` and `LAMP_SECRET_KEY`"
-                    + " (and optionally `LAMP_SERVER_ADDRESS`) to use Cortex.")
-LAMP.connect(os.getenv('LAMP_ACCESS_KEY'), os.getenv('LAMP_SECRET_KEY'),
-             os.getenv('LAMP_SERVER_ADDRESS', 'api.lamp.digital'))
+from ._manifest import FEATURES as _MANIFEST
+# Connect to the LAMP API server lazily, on the first API call, so that cortex
+# can be imported (and cached data used) without credentials.
+# Environment variables are required to call the LAMP API.
+_LAMP_APIS = ['API', 'Type', 'Credential', 'Researcher', 'Study', 'Participant', 'Activity',
+              'ActivitySpec', 'ActivityEvent', 'Sensor', 'SensorSpec', 'SensorEvent']
+_LAMP_LOCK = threading.Lock()
+
+class _LazyLAMP:
+    """ Stand-in for a LAMP API object (ex: LAMP.SensorEvent) which connects
+        to the LAMP API server the first time it is used.
+    """
+    def __init__(self, name, default):
+        self._name = name
+        self._default = default
+
+    def __getattr__(self, attr):
+        lamp_client()
+        api = getattr(LAMP, self._name)
+        return getattr(self._default if api is self else api, attr)
+
+def lamp_client():
+    """ Get the LAMP API client shared by all cortex functions.
+
+        The connection is only made once, on first use, using the
+        `LAMP_ACCESS_KEY`, `LAMP_SECRET_KEY` and (optionally)
+        `LAMP_SERVER_ADDRESS` environment variables. If `LAMP.connect` was
+        already called, that connection is used instead.
+
+        Returns:
+            The LAMP.ApiClient.
+        Raises:
+            Exception: You must configure `LAMP_ACCESS_KEY` and `LAMP_SECRET_KEY`
+                (and optionally `LAMP_SERVER_ADDRESS`) to use Cortex.
+    """
+    with _LAMP_LOCK:
+        if any(isinstance(getattr(LAMP, name), _LazyLAMP) for name in _LAMP_APIS):
+            if not 'LAMP_ACCESS_KEY' in os.environ or not 'LAMP_SECRET_KEY' in os.environ:
+                raise Exception("You must configure `LAMP_ACCESS_KEY` and `LAMP_SECRET_KEY`"
+                                + " (and optionally `LAMP_SERVER_ADDRESS`) to use Cortex.")
+            LAMP.connect(os.getenv('LAMP_ACCESS_KEY'), os.getenv('LAMP_SECRET_KEY'),
+                         os.getenv('LAMP_SERVER_ADDRESS', 'api.lamp.digital'))
+            for name in _LAMP_APIS:
+                api = getattr(LAMP, name)
+                if isinstance(api, _LazyLAMP):
+                    setattr(LAMP, name, api._default)
+    return LAMP.SensorEvent.api_client
+
+# Unless LAMP.connect was already called (the API objects have credentials).
+for _name in _LAMP_APIS:
+    _api = getattr(LAMP, _name)
+    if not isinstance(_api, _LazyLAMP) and _api.api_client.configuration.username is None:
+        setattr(LAMP, _name, _LazyLAMP(_name, _api))
 
 # Get a universal logger to share with all feature functions.
 logging.basicConfig(stream=sys.stderr, level=logging.DEBUG,
@@ -33,14 +88,628 @@ log = logging.getLogger('cortex')
 # List all registered features (raw, primary, secondary).
 __features__ = []
 def all_features():
+    load_features()
     return __features__
 
+def load_features(names=None):
+    """ Import the modules defining the given features.
+
+        Feature modules are imported lazily; the static manifest records
+        which module registers each feature so that only those needed are
+        imported.
+
+        Args:
+            names (list, default: None): feature names (ex: "lamp.gps") or
+                function names (ex: "gps"); if None, all features are loaded.
+        Returns:
+            A list of the registered features matching names.
+    """
+    if names is not None:
+        names = set(names)
+    for f in _MANIFEST:
+        if names is None or f['name'] in names or f['callable'] in names:
+            import_module(f['module'])
+    return [f for f in __features__ if names is None or
+            f['name'] in names or f['callable'].__name__ in names]
+
 ACTIVITIES = ['lamp.survey', 'lamp.jewels_a', 'lamp.jewels_b', 'lamp.balloon_risk',
               'lamp.cats_and_dogs', 'lamp.pop_the_bubbles', 'lamp.spatial_span', 'lamp.dcog',
               'lamp.digit_span', 'lamp.fragmented_letters', 'lamp.funny_memory', 'lamp.trails_b',
               'lamp.voice_survey',]
 MAX_RETURN_SIZE = 10000 #maximum number of events that the API will return
 
+# Activity catalogs (LAMP.Activity.all_by_participant) shared by all features,
+# most recently used last (see 'activity_catalog').
+_ACTIVITY_CATALOGS = OrderedDict()
+_ACTIVITY_CATALOGS_LOCK = threading.Lock()
+
+def activity_catalog(participant_id):
+    """ Get the activities of a participant, cached for the whole process.
+
+        Catalogs are kept for 'CORTEX_ACTIVITY_CACHE_TTL' seconds (default: 600; 0
+        disables the cache) and for at most 'CORTEX_ACTIVITY_CACHE_SIZE' participants
+        (default: 1024), the least recently used ones being dropped first. Functions
+        that change activities must call 'invalidate_activity_catalog'.
+
+        Args:
+            participant_id (str): The participant's LAMP id.
+        Returns:
+            The list of activities (dicts with 'id', 'spec', 'name', 'schedule', ...)
+            as returned by LAMP.Activity.all_by_participant. It is shared, so it
+            must not be modified.
+    """
+    ttl = float(os.getenv('CORTEX_ACTIVITY_CACHE_TTL', '600'))
+    with _ACTIVITY_CATALOGS_LOCK:
+        cached = _ACTIVITY_CATALOGS.get(participant_id)
+        if cached is not None and time.time() - cached[0] < ttl:
+            _ACTIVITY_CATALOGS.move_to_end(participant_id)
+            return cached[1]
+    activities = LAMP.Activity.all_by_participant(participant_id)['data']
+    if ttl > 0:
+        with _ACTIVITY_CATALOGS_LOCK:
+            _ACTIVITY_CATALOGS[participant_id] = (time.time(), activities)
+            _ACTIVITY_CATALOGS.move_to_end(participant_id)
+            while len(_ACTIVITY_CATALOGS) > int(os.getenv('CORTEX_ACTIVITY_CACHE_SIZE', '1024')):
+                _ACTIVITY_CATALOGS.popitem(last=False)
+    return activities
+
+def invalidate_activity_catalog(participant_id=None):
+    """ Drop the cached activity catalog of a participant (see 'activity_catalog').
+
+        Args:
+            participant_id (str): The participant's LAMP id. Default: all participants.
+    """
+    with _ACTIVITY_CATALOGS_LOCK:
+        if participant_id is None:
+            _ACTIVITY_CATALOGS.clear()
+        else:
+            _ACTIVITY_CATALOGS.pop(participant_id, None)
+    # ActivityEvents pooled by open prefetch scopes are partitioned by spec
+    # using the catalog
+    with _ACTIVITY_EVENT_POOL_LOCK:
+        for scope in _PREFETCH_SCOPES:
+            if participant_id is None or scope['id'] == participant_id:
+                scope.pop('activity_events', None)
+
+# Guards the ActivityEvent pools of the prefetch scopes (see '_activity_events').
+_ACTIVITY_EVENT_POOL_LOCK = threading.Lock()
+
+def _activity_events(spec, **kwgs):
+    """ Get the ActivityEvents of a participant for one activity spec.
+
+        Within an open prefetch scope of the participant enclosing the interval
+        (see 'shared_fetches'), complete requests (recursive) are served from a
+        pool holding all of the participant's ActivityEvents for an enclosing
+        interval, partitioned by spec: all activity raw features (and survey)
+        requested for the same participant and interval share one download. The
+        pool is dropped with its scope, so later requests see new events; at most
+        'CORTEX_ACTIVITY_EVENT_POOL_SIZE' entries (default: 16) are kept.
+
+        Args:
+            spec (str): The activity spec (ex: "lamp.jewels_a").
+            **kwgs:
+                id (str): The participant id.
+                start (int): The UNIX timestamp (in ms) to begin querying (i.e. "_from").
+                end (int): The UNIX timestamp to end querying (i.e. "to").
+                _limit (int): The maximum number of events to query for in a single request.
+                recursive (bool): if True, continue requesting data until all data is
+                        returned; else just one request.
+                fetch_workers (int): The maximum number of concurrent requests
+                    (see '_paginate').
+        Returns:
+            A list of ActivityEvents sorted by descending timestamp. The events may
+            be shared with other requests, so they must not be modified.
+    """
+    def _query(_from, to, _limit):
+        return LAMP.ActivityEvent.all_by_participant(kwgs['id'], _from=int(_from), to=int(to),
+                                                     _limit=int(_limit))['data']
+
+    if not kwgs['recursive']:
+        activity_ids = {a['id'] for a in activity_catalog(kwgs['id']) if a['spec'] == spec}
+        data = _query(kwgs['start'], kwgs['end'], kwgs['_limit'])
+        return sorted([x for x in data if x.get('activity') in activity_ids],
+                      key=lambda i: i['timestamp'], reverse=True)
+
+    pool, entry = None, None
+    with _ACTIVITY_EVENT_POOL_LOCK:
+        for scope in reversed(_PREFETCH_SCOPES):
+            if (scope['id'] == kwgs['id'] and scope['start'] <= kwgs['start']
+                    and kwgs['end'] <= scope['end']):
+                pool = scope.setdefault('activity_events', OrderedDict())
+                break
+        for key, cached in reversed((pool or {}).items()):
+            if key[0] <= kwgs['start'] and kwgs['end'] <= key[1]:
+                pool.move_to_end(key)
+                entry = cached
+                break
+    if entry is None:
+        # (without the duplicated page boundary records of serial '_paginate')
+        if _fetch_workers(**kwgs) > 1:
+            data = _paginate(_query, kwgs['start'], kwgs['end'], MAX_RETURN_SIZE,
+                             workers=_fetch_workers(**kwgs))
+        else:
+            data = _paginate_shard(_query, kwgs['start'], kwgs['end'], MAX_RETURN_SIZE)
+        specs = {a['id']: a['spec'] for a in activity_catalog(kwgs['id'])}
+        entry = {}
+        for event in sorted(data, key=lambda i: i['timestamp'], reverse=True):
+            entry.setdefault(specs.get(event.get('activity')), []).append(event)
+        entry = {k: (v, -np.array([x['timestamp'] for x in v], dtype=np.int64))
+                 for k, v in entry.items()}
+        if pool is not None:
+            with _ACTIVITY_EVENT_POOL_LOCK:
+                key = (kwgs['start'], kwgs['end'])
+                pool[key] = entry
+                pool.move_to_end(key)
+                while len(pool) > int(os.getenv('CORTEX_ACTIVITY_EVENT_POOL_SIZE', '16')):
+                    pool.popitem(last=False)
+    if spec not in entry:
+        return []
+    events, neg_ts = entry[spec]
+    lo = np.searchsorted(neg_ts, -kwgs['end'], side='left')
+    hi = np.searchsorted(neg_ts, -kwgs['start'], side='right')
+    return events[lo:hi]
+
+# Pickled primary feature results of the open runs (see 'primary_memo'), most
+# recently used last, with their total size in bytes and the hit / miss counters
+# of the current (or last) run.
+_PRIMARY_MEMO = OrderedDict()
+_PRIMARY_MEMO_LOCK = threading.Lock()
+_PRIMARY_MEMO_STATS = {'hits': 0, 'misses': 0, 'evictions': 0}
+_PRIMARY_MEMO_RUNS = [0]
+_PRIMARY_MEMO_BYTES = [0]
+
+@contextmanager
+def primary_memo(fresh=False):
+    """ Memoize primary feature results for the duration of a run.
+
+        While open, each primary feature call is keyed by (feature, id, start, end,
+        parameters, defaults applied) and identical calls (ex: 'significant_locations'
+        for the same window, from both 'entropy' and 'hometime') are only computed
+        once. Results are kept pickled, and each call gets its own copy. They take
+        at most 'CORTEX_PRIMARY_MEMO_BYTES' bytes (default: 256 MiB), the least
+        recently used ones being dropped first.
+
+        Memos can be nested: the results and counters are reset when the outermost
+        one is opened, and the results are dropped when it is closed.
+
+        Args:
+            fresh (bool): If True, the memo is opened as the outermost one even if
+                a memo is already open, ex: in a worker process forked by a run
+                (which inherits the run's open memo). Default: False.
+        Yields:
+            The live hit / miss counters of the run (see 'primary_memo_stats').
+    """
+    with _PRIMARY_MEMO_LOCK:
+        outer = _PRIMARY_MEMO_RUNS[0] if fresh else 0
+        if fresh:
+            _PRIMARY_MEMO_RUNS[0] = 0
+        if _PRIMARY_MEMO_RUNS[0] == 0:
+            _PRIMARY_MEMO.clear()
+            _PRIMARY_MEMO_BYTES[0] = 0
+            _PRIMARY_MEMO_STATS.update({'hits': 0, 'misses': 0, 'evictions': 0})
+        _PRIMARY_MEMO_RUNS[0] += 1
+    try:
+        yield _PRIMARY_MEMO_STATS
+    finally:
+        with _PRIMARY_MEMO_LOCK:
+            _PRIMARY_MEMO_RUNS[0] -= 1
+            if _PRIMARY_MEMO_RUNS[0] == 0:
+                _PRIMARY_MEMO.clear()
+                _PRIMARY_MEMO_BYTES[0] = 0
+            _PRIMARY_MEMO_RUNS[0] += outer
+
+def primary_memo_stats():
+    """ Get the primary feature memo counters of the current (or last) run.
+
+        Returns:
+            A dict with the number of 'hits' (computations saved), 'misses'
+            (computations done) and 'evictions' (results dropped to stay within
+            'CORTEX_PRIMARY_MEMO_BYTES') of the primary feature memo (see 'primary_memo').
+    """
+    with _PRIMARY_MEMO_LOCK:
+        return dict(_PRIMARY_MEMO_STATS)
+
+# Prefetch scopes opened by secondary features called with `prefetch=True` and
+# by 'shared_fetches'. Each scope holds the raw series fetched once for the
+# whole [start, end].
+_PREFETCH_SCOPES = []
+
+def _signature(func):
+    """ Introspect a feature function once, when it is registered.
+
+        Args:
+            func (method): The undecorated feature function.
+        Returns:
+            A tuple (required, defaults): the list of the function's positional
+            parameters without a default value, and a dict of the default values
+            of the other parameters.
+    """
+    spec = getfullargspec(func)
+    required = spec[0][:-len(spec[3] or ()) or None]
+    defaults = {
+        k: v.default
+        for k, v in inspect.signature(func).parameters.items()
+        if v.default is not inspect.Parameter.empty
+    }
+    return required, defaults
+
+def _raw_dependency_names(dependencies):
+    """ Resolve the names of all raw features a feature (transitively) depends on.
+
+        Args:
+            dependencies (list): The registered dependencies of a feature
+                (decorated cortex functions).
+        Returns:
+            A set of raw feature names (ex: {"lamp.gps"}).
+    """
+    names = set()
+    for dep in dependencies:
+        for feature in __features__:
+            if feature['callable'] is not dep:
+                continue
+            if feature['type'] == 'raw':
+                names.add(feature['name'])
+            else:
+                names |= _raw_dependency_names(feature['dependencies'])
+    return names
+
+def feature_plan(features):
+    """ Plan the computation of features from their registered dependencies.
+
+        Args:
+            features (list): The feature names (ex: "hometime" or "lamp.gps").
+        Returns:
+            The registry entries of the features and of all the features they
+            (transitively) depend on, each once, in topological order: raw
+            features first, then primary and secondary features, every entry
+            coming after its dependencies.
+    """
+    entries, graph = {}, {}
+    stack = load_features(list(features))
+    while stack:
+        entry = stack.pop()
+        if entry['name'] in graph:
+            continue
+        deps = [f for f in __features__ if f['callable'] in entry['dependencies']]
+        entries[entry['name']] = entry
+        graph[entry['name']] = [f['name'] for f in deps]
+        stack += deps
+    order = [entries[name] for name in TopologicalSorter(graph).static_order()]
+    return sorted(order, key=lambda f: ['raw', 'primary', 'secondary'].index(f['type']))
+
+@contextmanager
+def shared_fetches(participant, plan, start, end):
+    """ Share the raw data of a plan between its features.
+
+        While open, each raw feature of the plan is fetched once for the whole
+        [start, end], the first time a feature requests it, and all requests are
+        then served from that series (see '_prefetch_slice'). Raw features that
+        are never requested (ex: with the parameters of the run) are not fetched.
+        High-rate sensors (see 'ARRAY_FIELDS') are not held in memory: they are
+        still read from the cache (see 'raw_arrays') or streamed (see 'iter_pages').
+        ActivityEvents are pooled by the scope (see '_activity_events') and primary
+        feature results are shared by 'primary_memo'.
+
+        Args:
+            participant (str): The Participant LAMP id.
+            plan (list): The registry entries to share (see 'feature_plan').
+            start (int): The UNIX timestamp (in ms) of the beginning of the data.
+            end (int): The UNIX timestamp (in ms) of the end of the data.
+        Yields:
+            The prefetch scope.
+    """
+    scope = {'id': participant,
+             'start': start,
+             'end': end,
+             'names': {f['name'] for f in plan
+                       if f['type'] == 'raw' and f['name'] not in ARRAY_FIELDS},
+             'series': {}}
+    _PREFETCH_SCOPES.append(scope)
+    try:
+        yield scope
+    finally:
+        _PREFETCH_SCOPES.remove(scope)
+
+def _prefetch_scope(name, **kwgs):
+    """ Find an open prefetch scope that can serve this raw feature request.
+
+        Args:
+            name (str): The name of the raw feature (ex: "lamp.gps").
+            **kwgs:
+                id (str): The participant id.
+                start (int): The UNIX timestamp (in ms) to begin querying.
+                end (int): The UNIX timestamp (in ms) to end querying.
+        Returns:
+            The innermost scope enclosing [start, end] for this participant and
+            raw feature, or None.
+    """
+    for scope in reversed(_PREFETCH_SCOPES):
+        if (name in scope['names'] and scope['id'] == kwgs['id'] and
+                scope['start'] <= kwgs['start'] and kwgs['end'] <= scope['end']):
+            return scope
+    return None
+
+def _prefetch_slice(scope, name, fetch, defaults, **kwgs):
+    """ Serve a raw feature request from a prefetched, timestamp-sorted series.
+
+        The full [scope['start'], scope['end']] series is fetched on first use and
+        kept in memory; each request is then answered with a binary-searched slice
+        of it. The slice shares the event dicts of the series, which are not copied.
+
+        Args:
+            scope (dict): The prefetch scope (see '_prefetch_scope').
+            name (str): The name of the raw feature (ex: "lamp.gps").
+            fetch (method): Called with the raw kwargs to get the full series.
+            defaults (dict): The default arguments of the raw feature function.
+            **kwgs:
+                start (int): The UNIX timestamp (in ms) to begin querying.
+                end (int): The UNIX timestamp (in ms) to end querying.
+                _limit (int): The maximum number of events to return.
+                recursive (bool): Whether all events in the interval are requested.
+        Returns:
+            A list of raw events, sorted by descending timestamp, or None if the
+            request cannot be answered from the series.
+    """
+    limit = int(kwgs.get('_limit', defaults.get('_limit', MAX_RETURN_SIZE)))
+    complete = kwgs.get('recursive', True) and abs(limit) >= MAX_RETURN_SIZE
+    if not complete and name in ACTIVITIES:
+        return None
+
+    # Non-window parameters (ex: survey's `replace_ids`) change the data itself.
+    params = tuple(sorted((k, repr(v)) for k, v in kwgs.items()
+                          if k in defaults and k not in ('_limit', 'cache', 'recursive')))
+    key = (name, params)
+    if key not in scope['series']:
+        data = fetch(**{**kwgs,
+                        'start': scope['start'],
+                        'end': scope['end'],
+                        '_limit': defaults.get('_limit', MAX_RETURN_SIZE),
+                        'recursive': True})
+        data = sorted([r for r in data if scope['start'] <= r['timestamp'] <= scope['end']],
+                      key=lambda i: i['timestamp'], reverse=True)
+        scope['series'][key] = {'data': data,
+                                'neg_ts': -np.array([r['timestamp'] for r in data],
+                                                    dtype=np.int64)}
+    series = scope['series'][key]
+    lo = np.searchsorted(series['neg_ts'], -kwgs['end'], side='left')
+    hi = np.searchsorted(series['neg_ts'], -kwgs['start'], side='right')
+    data = series['data'][lo:hi]
+    if not complete:
+        data = data[:limit] if limit > 0 else data[limit:]
+    return data
+
+def _paginate(query, start, end, limit, recursive=True, page_size=MAX_RETURN_SIZE, workers=1):
+    """ Get all API events in [start, end], one page of 'limit' events at a time.
+
+        By default, pages are requested serially: each page ends where the previous
+        one stopped. With workers > 1, the density of the first page is used to split
+        the rest of [start, end] (clipped to the oldest event, found with a
+        one-event probe) into time shards of about one page each. The shards are
+        fetched concurrently and stitched back in order; records at page boundaries,
+        which are returned twice by the API, are only kept once.
+
+        Args:
+            query (method): Called with (_from, to, _limit); returns a list of events
+                sorted by descending timestamp.
+            start (int): The UNIX timestamp (in ms) to begin querying (i.e. "_from").
+            end (int): The UNIX timestamp to end querying (i.e. "to").
+            limit (int): The maximum number of events to query for in a single request.
+            recursive (bool): if True, continue requesting data until all data is
+                returned; else just one request.
+            page_size (int): The number of events of a full page (i.e. more data
+                may be available).
+            workers (int): The maximum number of concurrent requests.
+        Returns:
+            A list of events sorted by descending timestamp.
+    """
+    data = query(start, end, limit)
+    if not recursive or len(data) != page_size:
+        return data
+    if workers is None or int(workers) <= 1 or limit != page_size:
+        data_next = []
+        while len(data) == page_size or len(data_next) == page_size:
+            to = data[-1]['timestamp']
+            data_next = query(start, to, limit)
+            data += data_next
+        return data
+
+    # Records at the last timestamp of the page may continue in the next one
+    high = data[-1]['timestamp']
+    oldest = query(start, high, -1)
+    low = oldest[0]['timestamp'] if oldest else high
+    density = len(data) / max(data[0]['timestamp'] - high, 1)
+    n_shards = min(max(int(np.ceil((high - low + 1) * density / page_size)), 1),
+                   high - low + 1)
+    width = int(np.ceil((high - low + 1) / n_shards))
+    shards = [(max(high - (i + 1) * width + 1, low), high - i * width)
+              for i in range(n_shards)]
+    with ThreadPoolExecutor(max_workers=int(workers)) as pool:
+        pages = pool.map(lambda shard: _paginate_shard(query, *shard, page_size), shards)
+        data = [r for r in data if r['timestamp'] > high]
+        for page in pages:
+            data += page
+    return data
+
+def _iter_paginate(query, start, end, page_size):
+    """ Get all API events in [start, end], oldest first, one page at a time.
+
+        Like '_paginate_shard', but pages are requested from 'start' onwards (with a
+        negative limit) and yielded as they arrive, so only one page is held at once.
+
+        Args:
+            query (method): Called with (_from, to, _limit); a negative limit returns
+                the oldest events sorted by ascending timestamp.
+            start (int): The UNIX timestamp (in ms) to begin querying (i.e. "_from").
+            end (int): The UNIX timestamp to end querying (i.e. "to").
+            page_size (int): The number of events of a full page.
+        Yields:
+            Lists of events sorted by ascending timestamp.
+    """
+    _from = start
+    while True:
+        page = query(_from, end, -page_size)
+        if len(page) < page_size:
+            if page:
+                yield page
+            return
+        # Records at the last timestamp are requested again with the next page,
+        # unless the page holds nothing else (then get all of them and skip past it)
+        last = page[-1]['timestamp']
+        if page[0]['timestamp'] == last:
+            yield _timestamp_page(query, page, -1)
+            _from = last + 1
+        else:
+            yield [r for r in page if r['timestamp'] < last]
+            _from = last
+        if _from > end:
+            return
+
+def _sensor_records(name, events):
+    """ Flatten LAMP.SensorEvent events into raw feature records (in the same order). """
+    ret = [{'timestamp': x['timestamp'], **x['data']} for x in events]
+    # some Androids have a motion field in accelerometer, unravel that
+    if name == "lamp.accelerometer":
+        ret = [{'timestamp': x['timestamp'], **x["motion"]} if "motion" in x else x for x in ret]
+    return ret
+
+def _fetch_workers(**kwgs):
+    """ Get the number of concurrent API requests for a raw feature request.
+
+        Given by kwgs['fetch_workers'] or the environment variable
+        'CORTEX_FETCH_WORKERS'. Default: 1 (serial requests).
+    """
+    return int(kwgs.get('fetch_workers') or os.getenv('CORTEX_FETCH_WORKERS', '1'))
+
+def _timestamp_page(query, page, sign):
+    """ Get all API events at the timestamp of a full page holding nothing else.
+
+        The API has no cursor within a timestamp, so the timestamp is requested
+        again with pages twice as large, up to MAX_RETURN_SIZE events; events past
+        that are dropped (with a warning).
+
+        Args:
+            query (method): Called with (_from, to, _limit) (see '_paginate').
+            page (list): The full page of events, all at the same timestamp.
+            sign (int): The sign of the limit of 'query' (-1 for the oldest events
+                sorted by ascending timestamp).
+        Returns:
+            The list of events at that timestamp.
+    """
+    timestamp, limit = page[0]['timestamp'], len(page)
+    while limit < MAX_RETURN_SIZE:
+        limit = min(2 * limit, MAX_RETURN_SIZE)
+        page = query(timestamp, timestamp, sign * limit)
+        if len(page) < limit:
+            return page
+    log.warning("More than %d events at timestamp %d, the rest is skipped.", limit, timestamp)
+    return page
+
+def _paginate_shard(query, start, end, page_size):
+    """ Serially get all API events in [start, end] without duplicated boundary records.
+
+        See '_paginate'. Returns a list of events sorted by descending timestamp.
+    """
+    data = []
+    to = end
+    while True:
+        page = query(start, to, page_size)
+        if len(page) < page_size:
+            return data + page
+        # Records at the last timestamp are requested again with the next page,
+        # unless the page holds nothing else (then get all of them and skip past it)
+        last = page[-1]['timestamp']
+        if page[0]['timestamp'] == last:
+            data += _timestamp_page(query, page, 1)
+            to = last - 1
+        else:
+            data += [r for r in page if r['timestamp'] > last]
+            to = last
+        if to < start:
+            return data
+
+class _RawEvent(dict):
+    """ A raw feature result whose data quality metrics (see '_raw_data_quality') are
+        computed on first access of any of their keys, or of the whole dict. Pickling or
+        copying it gives a plain dict.
+    """
+    _LAZY_KEYS = ('fs_mean', 'fs_var')
+
+    def defer(self, metrics):
+        """ Set the method computing the lazy fields (returns a dict of them). """
+        self._metrics = metrics
+
+    def _materialize(self):
+        metrics = self.__dict__.pop('_metrics', None)
+        if metrics is not None:
+            for key, value in metrics().items():
+                dict.setdefault(self, key, value)
+
+    def __missing__(self, key):
+        if key in self._LAZY_KEYS and '_metrics' in self.__dict__:
+            self._materialize()
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self._LAZY_KEYS:
+            self._materialize()
+        return dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        if key in self._LAZY_KEYS:
+            self._materialize()
+        return dict.get(self, key, default)
+
+    def pop(self, key, *default):
+        if key in self._LAZY_KEYS:
+            self._materialize()
+        return dict.pop(self, key, *default)
+
+    def __iter__(self):
+        self._materialize()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._materialize()
+        return dict.__len__(self)
+
+    def __eq__(self, other):
+        self._materialize()
+        if isinstance(other, _RawEvent):
+            other._materialize()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        self._materialize()
+        if isinstance(other, _RawEvent):
+            other._materialize()
+        return dict.__ne__(self, other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._materialize()
+        return dict.__repr__(self)
+
+    def keys(self):
+        self._materialize()
+        return dict.keys(self)
+
+    def values(self):
+        self._materialize()
+        return dict.values(self)
+
+    def items(self):
+        self._materialize()
+        return dict.items(self)
+
+    def copy(self):
+        self._materialize()
+        return dict(self.items())
+
+    def __reduce__(self):
+        return (dict, (self.copy(),))
+
 # Raw features.
 def raw_feature(name, dependencies):
     """Determines whether caching should be performed upon raw data request.
@@ -59,6 +728,17 @@ def raw_feature(name, dependencies):
             end (int): The UNIX timestamp to end querying (i.e. "to"). Required.
             cache (boolean): If True raw data will be loaded from and saved
                     into the cache directory.
+            fetch_workers (int): If greater than 1, time shards of [start, end] are
+                    requested concurrently (see '_paginate'). Default: the environment
+                    variable 'CORTEX_FETCH_WORKERS', else 1.
+            format (string): The type of the returned data: 'records' (a list of
+                    dicts, the default), 'frame' (a pandas DataFrame) or 'arrow' (a
+                    pyarrow Table). DataFrames and Tables have one typed column per
+                    field, nested fields being flattened to "a.b" columns (see
+                    '_events_frame'), and are sorted by descending timestamp.
+            as_frame (boolean): If True, same as format='frame'.
+            stream (boolean): If True, return a generator of time-ordered chunks of
+                    the data instead (see 'iter_pages').
 
     Returns:
         A dict with a timestamp (kwargs['start']), duration (kwargs['end'] - kwargs['start']),
@@ -82,6 +762,8 @@ def raw_feature(name, dependencies):
         API Error (500). Too many requests were sent to the server.
     """
     def _wrapper1(func):
+        required, defaults = _signature(func)
+
         def _wrapper2(*args, **kwargs):
 
 
@@ -92,8 +774,8 @@ def raw_feature(name, dependencies):
                 'id', 'start', 'end',
 
                 # These are the feature function's required parameters after removing parameters
-                # with provided default values, if any are provided.
-                *getfullargspec(func)[0][:-len(getfullargspec(func)[3] or ()) or None]
+                # with provided default values, if any are provided (see '_signature').
+                *required
             ]
             for param in params:
                 if kwargs.get(param, None) is None:
@@ -102,36 +784,37 @@ def raw_feature(name, dependencies):
             if kwargs['start'] > kwargs['end']:
                 raise Exception("'start' argument must occur before 'end'.")
 
+            if kwargs.pop('stream', False):
+                return iter_pages(name, **kwargs)
+
+            _format = kwargs.pop('format', 'records')
+            if kwargs.pop('as_frame', False):
+                _format = 'frame'
+            if _format not in ['records', 'frame', 'arrow']:
+                raise Exception(f"format `{_format}` must be one of 'records', 'frame' or"
+                                + " 'arrow'")
+
             # Find a valid local cache directory
             # Get defaults
-            def _get_default_args(func):
-                """ Get the default arguments for the function.
-
-                    Args:
-                        func: the function
-                    Returns:
-                        a dictionary with key value pairs for the default arguments
-                """
-                signature = inspect.signature(func)
-                return {
-                    k: v.default
-                    for k, v in signature.parameters.items()
-                    if v.default is not inspect.Parameter.empty
-                }
-
-            kwgs = _get_default_args(func)
+            kwgs = dict(defaults)
             kwgs.update(kwargs)
-            cache = kwgs.get('cache')
 
             def _raw_caching(name, **kwargs):
                 """ Finds and returns cached data for raw features.
 
                 For a cached file to be considered for use, it must completely contain the
-                [kwargs['start'], kwargs['end']] interval. The first valid file found in
-                the directory will be used and the data from which will be immediately returned.
+                [kwargs['start'], kwargs['end']] interval. Cached files are looked up in the
+                interval index of the cache directory (see '_cache_index') and the data
+                from the first enclosing file will be immediately returned.
+
+                Cached files are saved in a columnar format by default: a '.cortex.col'
+                directory holding one typed numpy column per field, sorted by timestamp,
+                so that only the rows in [start, end] are deserialized. The environment
+                variable 'CORTEX_CACHE_FORMAT' can be set to 'pickle' to save pickled
+                lists instead; cached files of both formats are always readable.
 
-                A compression method can be specified in the environment variable
-                'CORTEX_CACHE_COMPRESSION'.
+                For pickled files, a compression method can be specified in the
+                environment variable 'CORTEX_CACHE_COMPRESSION'.
 
                 Methods can be of type ['gz', 'bz2', 'lzma', 'zip']. Please see
                 documentation for the package 'compress_pickle' for more information
@@ -168,6 +851,7 @@ def raw_feature(name, dependencies):
                         valid path, or disbale caching.
                     Exception: Compression method specified in 'CORTEX_CACHE_COMPRESSION\'
                         does not exist.
+                    Exception: Cache format specified in 'CORTEX_CACHE_FORMAT' does not exist.
                 """
                 if os.getenv('CORTEX_CACHE_DIR') is None:
                     raise Exception("'CORTEX_CACHE_DIR' is not defined in your environment"
@@ -181,72 +865,100 @@ def raw_feature(name, dependencies):
                 log.info("Cortex caching directory set to: " + cache_dir)
                 log.info("Processing raw feature " + name + "...")
 
-                # local data caching TODO: combine pickle window with API data
-                for file in [f for f in os.listdir(cache_dir) if f[-7:] == '.cortex']: # .lamp
-                    path = cache_dir + '/' + file
-
-                    if not re.match('^' + name.split('.')[1], file):
-                        continue
-
-                    _, rest = re.split('^'+name.split('.')[1]+'_', file)
-                    saved = dict(zip(['id', 'start', 'end'],
-                                     re.split('.cortex$', rest)[0].split('_')))
-                    saved['name'] = name.split('.')[1]
-                    try:
-                        saved['start'] = int(saved['start'])
-                        saved['end'] = int(saved['end'])
-                    except:
-                        continue
-
-                    if (saved['start'] <= kwargs['start'] and
-                        saved['end'] >= kwargs['end'] and
-                        saved['id'] == kwargs['id']):
-                        # if no compression extension, use standard pkl loading
-                        if file.split('.')[-1] == 'cortex':
-                            _result = pickle.load(path,
-                                                  set_default_extension=False,
-                                                  compression=None)
-                        else:
-                            _result = pickle.load(path)
-
-                        log.info('Using saved raw data...')
-                        return _result
-                # If a cached file could not be found, use function to get new data and save
-
-                log.info('No saved raw data found, getting new...')
-
-
-                _result = _get_raw_feature(func, name, **kwgs)
+                # Only complete requests can be saved as covering [start, end]
+                limit = int(kwargs.get('_limit', MAX_RETURN_SIZE))
+                if not kwargs.get('recursive', True) or abs(limit) < MAX_RETURN_SIZE:
+                    return _get_raw_feature(func, name, **kwargs)
+
+                sensor = name.split('.')[-1]
+                with closing(_cache_index(cache_dir)) as index:
+                    path = _cache_index_lookup(index, cache_dir, sensor, **kwargs)
+                    cached = ([] if path is not None else
+                              _cache_index_overlaps(index, cache_dir, sensor, **kwargs))
+                if path is not None:
+                    log.info('Using saved raw data...')
+                    return _cache_load(path, start=kwargs['start'], end=kwargs['end'])
+
+                # Combine overlapping cached data with API data for the missing intervals
+                gaps = _uncovered([(c_start, c_end) for c_start, c_end, _ in cached],
+                                  kwargs['start'], kwargs['end'])
+                if cached:
+                    log.info('Using saved raw data, getting ' + str(len(gaps))
+                             + ' missing intervals...')
+                else:
+                    log.info('No saved raw data found, getting new...')
+
+                _result, covered = [], []
+                for c_start, c_end, c_path in cached:
+                    _result += [r for r in _cache_load(c_path)
+                                if not _is_covered(r['timestamp'], covered)]
+                    covered.append((c_start, c_end))
+                for g_start, g_end in gaps:
+                    _gap = _get_raw_feature(func, name, **{**kwargs, 'start': g_start, 'end': g_end})
+                    _result += [r for r in _gap if not _is_covered(r['timestamp'], covered)]
+                _result = sorted(_result, key=lambda i: i['timestamp'], reverse=True)
+
+                # Coalesce everything into one cache entry
+                start = min([kwargs['start']] + [c_start for c_start, _, _ in cached])
+                end = max([kwargs['end']] + [c_end for _, c_end, _ in cached])
                 pickle_path = (cache_dir + '/' +
-                               name.split('.')[-1] + '_' +
+                               sensor + '_' +
                                kwargs['id'] + '_' +
-                               str(kwargs['start']) + '_' +
-                               str(kwargs['end']) + '.cortex')
+                               str(start) + '_' +
+                               str(end) + '.cortex')
 
-                if os.getenv('CORTEX_CACHE_COMPRESSION') is not None:
+                cache_format = os.getenv('CORTEX_CACHE_FORMAT', 'columnar')
+                assert cache_format in ['columnar', 'pickle'], (
+                    "Cache format for caching does not exist.")
+                if cache_format == 'columnar':
+                    pickle_path += '.col'
+                elif os.getenv('CORTEX_CACHE_COMPRESSION') is not None:
 
                     assert os.getenv('CORTEX_CACHE_COMPRESSION') in ['gz', 'bz2', 'lzma', 'zip'], (
                         "Compression method for caching does not exist.")
                     pickle_path += '.' + os.getenv('CORTEX_CACHE_COMPRESSION')
 
-                pickle.dump(_result,
-                            pickle_path,
-                            compression=kwargs.get('compression'),
-                            set_default_extension=False)
+                pickle_path = _cache_save(_result, pickle_path)
+                with closing(_cache_index(cache_dir)) as index:
+                    _cache_index_add(index, pickle_path, sensor, kwargs['id'], start, end,
+                                     replaces=[c_path for _, _, c_path in cached])
+                for _, _, c_path in cached:
+                    if c_path != pickle_path:
+                        _cache_remove(c_path)
 
                 log.info("Saving raw data as " + pickle_path + "...")
                 return _result
 
-            #Get cached data if specified; otherwise get data via API request
-            if cache:
-                _result = _raw_caching(name=name, **kwgs)
+            def _fetch(**kwgs):
+                """ Get cached data if specified; otherwise get data via API request. """
+                if kwgs.get('cache'):
+                    return _raw_caching(name=name, **kwgs)
+                return _get_raw_feature(func, name, **kwgs)
+
+            # Serve windows of a prefetching secondary feature from its in-memory series
+            _result = None
+            scope = _prefetch_scope(name, **kwgs)
+            if scope is not None:
+                _result = _prefetch_slice(scope, name, _fetch, defaults, **kwgs)
+            elif _format != 'records':
+                _result = _get_raw_frame(name, **kwgs)
+            if _result is None:
+                _result = _fetch(**kwgs)
+
+            if _format == 'records':
+                _data = [r for r in _result if r['timestamp'] >= kwargs['start']
+                         and r['timestamp'] <= kwargs['end']]
             else:
-                _result = _get_raw_feature(func, name, **kwgs)
-
-            _event = {'timestamp': kwargs['start'],
-                      'duration': kwargs['end'] - kwargs['start'],
-                      'data': [r for r in _result if r['timestamp'] >= kwargs['start'] and
-                               r['timestamp'] <= kwargs['end']]}
+                if not isinstance(_result, pd.DataFrame):
+                    _result = _events_frame(_result)
+                _ts = _result['timestamp'].to_numpy()
+                _data = _result[(_ts >= kwargs['start']) & (_ts <= kwargs['end'])]
+                _data = _data.reset_index(drop=True)
+                if _format == 'arrow':
+                    _data = _arrow_table(_data)
+            _event = _RawEvent({'timestamp': kwargs['start'],
+                                'duration': kwargs['end'] - kwargs['start'],
+                                'data': _data})
 
             # Add data quality metrics
             def _raw_data_quality(event, *args, **kwgs):
@@ -259,6 +971,8 @@ def raw_feature(name, dependencies):
                     For a more granualar estimate of data quality, please see the
                         feature 'cortex.secondary.data_quality'.
 
+                    The metrics are only computed when first accessed (see '_RawEvent'),
+                    by binning the timestamps of event['data'] at that time.
 
                     Args:
                         event (dict): The data.
@@ -270,7 +984,7 @@ def raw_feature(name, dependencies):
                             end (int): The UNIX timestamp to end querying (i.e. "to").
 
                     Returns:
-                        A dict containing the fields:
+                        The event, with the lazily computed fields:
                             fs_mean (float): An estimate of the data quality in Hz as the
                                 number of datapoints divided by time.
                             fs_var (float): the variance in the mean data frequencies for
@@ -279,26 +993,29 @@ def raw_feature(name, dependencies):
                 """
                 ten_minutes = 1000 * 60 * 10
                 res = ten_minutes # set the window size
-                idx = 0
-                if len(event['data']) > 0:
+
+                def _metrics():
+                    if len(event['data']) == 0:
+                        return {'fs_mean': 0, 'fs_var': 0}
                     start_time, end_time = kwgs['start'], kwgs["end"]
-                    res_counts = np.zeros((len(range(end_time, start_time, -1 * res))))
-                    if res_counts.shape[0] > 0:
-                        for i, x in enumerate(range(end_time, start_time, -1 * res)):
-                            while (idx + 1 < len(event['data']) and
-                                   event['data'][idx]['timestamp'] > x - res):
-                                res_counts[i] += 1
-                                idx += 1
-                        fs = res_counts / (res / 1000)
-                        event["fs_mean"] = fs.mean()
-                        event["fs_var"] = fs.var()
+                    n_windows = len(range(end_time, start_time, -1 * res))
+                    if n_windows == 0:
+                        return {'fs_mean': len(event['data']) / (res / 1000), 'fs_var': 0}
+                    # Window i is (end - (i + 1) * res, end - i * res]; as before, the
+                    # last (oldest) data point is not counted.
+                    if isinstance(event['data'], list):
+                        timestamps = np.array([r['timestamp'] for r in event['data'][:-1]],
+                                              dtype=np.int64)
                     else:
-                        event["fs_mean"] = len(event['data']) / (res / 1000)
-                        event["fs_var"] = 0
-                else:
-                    event["fs_mean"] = 0
-                    event["fs_var"] = 0
-
+                        timestamps = np.asarray(event['data']['timestamp'],
+                                                dtype=np.int64)[:-1]
+                    windows = (end_time - timestamps) // res
+                    res_counts = np.bincount(windows[windows < n_windows],
+                                             minlength=n_windows).astype(float)
+                    fs = res_counts / (res / 1000)
+                    return {'fs_mean': fs.mean(), 'fs_var': fs.var()}
+
+                event.defer(_metrics)
                 return event
 
             _event = _raw_data_quality(_event, *args, **kwgs)
@@ -318,49 +1035,26 @@ def raw_feature(name, dependencies):
                             single request
                         recursive (bool): if True, continue requesting data until all data is
                                 returned; else just one request
+                        fetch_workers (int): The maximum number of concurrent requests
+                            (see '_paginate').
                 Returns:
                     A dict of the timestamps and raw data events
             """
-            data_next = []
-            data = LAMP.SensorEvent.all_by_participant(kwgs['id'],
-                                               origin=name,
-                                               _from=int(kwgs['start']),
-                                               to=int(kwgs['end']),
-                                               _limit=int(kwgs['_limit']))['data']
-            while (kwgs['recursive'] and
-                   (len(data) == MAX_RETURN_SIZE or len(data_next) == MAX_RETURN_SIZE)):
-                to = data[-1]['timestamp']
-                data_next = LAMP.SensorEvent.all_by_participant(kwgs['id'],
-                                                        origin=name,
-                                                        _from=int(kwgs['start']),
-                                                        to=int(to),
-                                                        _limit=int(kwgs['_limit']))['data']
-                data += data_next
+            def _query(origin):
+                return lambda _from, to, _limit: LAMP.SensorEvent.all_by_participant(
+                    kwgs['id'], origin=origin, _from=int(_from), to=int(to),
+                    _limit=int(_limit))['data']
+
+            data = _paginate(_query(name), kwgs['start'], kwgs['end'], int(kwgs['_limit']),
+                             recursive=kwgs['recursive'], workers=_fetch_workers(**kwgs))
             # Special case for screen_ state and device state mapping to the same thing
             if name == "lamp.device_state":
-                data_next = []
-                data_screen_state = LAMP.SensorEvent.all_by_participant(kwgs['id'],
-                                               origin="lamp.screen_state",
-                                               _from=int(kwgs['start']),
-                                               to=int(kwgs['end']),
-                                               _limit=int(kwgs['_limit']))['data']
-                while (kwgs['recursive'] and
-                       (len(data_screen_state) == MAX_RETURN_SIZE or
-                        len(data_next) == MAX_RETURN_SIZE)):
-                    to = data_screen_state[-1]['timestamp']
-                    data_next = LAMP.SensorEvent.all_by_participant(kwgs['id'],
-                                                            origin="lamp.screen_state",
-                                                            _from=int(kwgs['start']),
-                                                            to=int(to),
-                                                            _limit=int(kwgs['_limit']))['data']
-                    data_screen_state += data_next
-                data += data_screen_state
-            ret = [{'timestamp': x['timestamp'], **x['data']} for x in data]
+                data += _paginate(_query("lamp.screen_state"), kwgs['start'], kwgs['end'],
+                                  int(kwgs['_limit']), recursive=kwgs['recursive'],
+                                  workers=_fetch_workers(**kwgs))
+            ret = _sensor_records(name, data)
             # Sort because of device_state / screen_state
             ret = (sorted(ret, key = lambda i: i['timestamp'], reverse=True))
-            # some Androids have a motion field in accelerometer, unravel that
-            if name == "lamp.accelerometer":
-                ret = [{'timestamp': x['timestamp'], **x["motion"]} if "motion" in x else x for x in ret]
             return ret
 
         def _get_game_feature(name, **kwgs):
@@ -376,31 +1070,60 @@ def raw_feature(name, dependencies):
                             single request
                         recursive (bool): if True, continue requesting data until all data is
                                 returned; else just one request
+                        fetch_workers (int): The maximum number of concurrent requests
+                            (see '_paginate').
                 Returns:
                     A dict of the timestamps and raw data events
             """
-            data_next = []
-            activity_ids = [activity['id'] for activity in
-                    LAMP.Activity.all_by_participant(kwgs['id'])['data']
-                    if activity['spec'] == name]
-
-            data = LAMP.ActivityEvent.all_by_participant(kwgs['id'],
-                                               _from=int(kwgs['start']),
-                                               to=int(kwgs['end']),
-                                               _limit=int(kwgs['_limit']))['data']
-            while (kwgs['recursive'] and
-                   (len(data) == int(kwgs['_limit'])) or len(data_next) == int(kwgs['_limit'])):
-                to = data[-1]['timestamp']
-                data_next = LAMP.ActivityEvent.all_by_participant(kwgs['id'],
-                                                        _from=int(kwgs['start']),
-                                                        to=int(to),
-                                                        _limit=int(kwgs['_limit']))['data']
-                data += data_next
-
-            # Get only activity events with the required spec
-            data = [x for x in data if x["activity"] in activity_ids]
-            ret = (sorted(data, key = lambda i: i['timestamp'], reverse=True))
-            return ret
+            return _activity_events(name, **kwgs)
+
+        def _get_raw_frame(name, **kwgs):
+            """ Get raw data as a DataFrame without building the list of events first.
+
+                Complete requests are read from a columnar cached file enclosing
+                [start, end] if caching is requested, or else (for sensors, with serial
+                requests) from the API, each page being converted to columns as soon as
+                it arrives.
+
+                Args:
+                    name (str): The name of the raw feature (ex: "lamp.gps").
+                    **kwgs: The arguments of the raw feature (see '_get_raw_feature').
+                Returns:
+                    A DataFrame sorted by descending timestamp, or None if the request
+                    must go through the list of events (see '_fetch').
+            """
+            limit = int(kwgs.get('_limit', MAX_RETURN_SIZE))
+            if not kwgs.get('recursive', True) or abs(limit) < MAX_RETURN_SIZE:
+                return None
+            if kwgs.get('cache'):
+                if os.getenv('CORTEX_CACHE_DIR') is None:
+                    return None
+                cache_dir = os.path.expanduser(os.getenv('CORTEX_CACHE_DIR'))
+                if not os.path.exists(cache_dir):
+                    return None
+                with closing(_cache_index(cache_dir)) as index:
+                    path = _cache_index_lookup(index, cache_dir, name.split('.')[-1], **kwgs)
+                if path is None or not path.endswith('.col'):
+                    return None
+                log.info('Using saved raw data...')
+                return _frame_from_columns(_cache_columns(path, start=kwgs['start'],
+                                                          end=kwgs['end']))
+            if name in ACTIVITIES or _fetch_workers(**kwgs) > 1:
+                return None
+
+            def _query(origin):
+                return lambda _from, to, _limit: LAMP.SensorEvent.all_by_participant(
+                    kwgs['id'], origin=origin, _from=int(_from), to=int(to),
+                    _limit=int(_limit))['data']
+            origins = [name] + (["lamp.screen_state"] if name == "lamp.device_state" else [])
+            frames = [_events_frame(_sensor_records(name, page)) for origin in origins
+                      for page in _iter_paginate(_query(origin), kwgs['start'], kwgs['end'],
+                                                 MAX_RETURN_SIZE)]
+            if not frames:
+                return _events_frame([])
+            # Pages are sorted by ascending timestamp (and device_state / screen_state)
+            return pd.concat(frames, ignore_index=True).sort_values(
+                'timestamp', ascending=False, kind='stable', ignore_index=True)
 
         def _get_raw_feature(func, name, **kwgs):
             """ Function to call the LAMP API and get the raw data.
@@ -417,6 +1140,8 @@ def raw_feature(name, dependencies):
                             single request
                         recursive (bool): if True, continue requesting data until all data is
                                 returned; else just one request
+                        fetch_workers (int): The maximum number of concurrent requests
+                            (see '_paginate').
                 Returns:
                     A dict of the timestamps and raw data events
             """
@@ -434,10 +1159,41 @@ def raw_feature(name, dependencies):
         __features__.append({'name': name,
                              'type': 'raw',
                              'dependencies': dependencies,
-                             'callable': _wrapper2})
+                             'callable': _wrapper2,
+                             'required': required,
+                             'defaults': defaults})
         return _wrapper2
     return _wrapper1
 
+def _merge_events(new, saved):
+    """ Merge newly generated primary feature events into previously saved ones.
+
+        Duplicated events are only kept once (their last occurrence, i.e. saved events
+        win over new ones). Events are bucketed by (start, end), so each event is only
+        compared with the events of its bucket.
+
+        Args:
+            new (list): The newly generated events.
+            saved (list): The saved events (ex: from LAMP attachments), usually sorted
+                by 'start' already.
+        Returns:
+            A list of the merged events sorted by 'start'; events with the same start
+            are in the order of new + saved.
+    """
+    buckets = {}
+    kept = ([], [])
+    for events, _kept in ((saved, kept[1]), (new, kept[0])):
+        for event in reversed(events):
+            bucket = buckets.setdefault((event['start'], event['end']), [])
+            if event not in bucket:
+                bucket.append(event)
+                _kept.append(event)
+    start = lambda x: x['start']
+    _new, _saved = sorted(reversed(kept[0]), key=start), kept[1][::-1]
+    if any(_saved[i]['start'] > _saved[i + 1]['start'] for i in range(len(_saved) - 1)):
+        _saved = sorted(_saved, key=start)
+    return list(heapq.merge(_new, _saved, key=start))
+
 # Primary features.
 def primary_feature(name, dependencies):
     """Checks LAMP attachments to see if primary feature has previously processed data saved.
@@ -445,6 +1201,8 @@ def primary_feature(name, dependencies):
     Primary feature data in the appropriate [kwargs['start'], kwargs['end']] will be returned,
     and, if kwargs['attach'] is True, attachments will be updated.
 
+    Within a run (see 'primary_memo'), identical calls are only computed once.
+
     Args:
         name (string): The name of the primary feature-getting method being decorated.
         dependencies (list): The cortex.raw methods used to query sensor/activity data
@@ -480,6 +1238,8 @@ def primary_feature(name, dependencies):
             (and optionally `LAMP_SERVER_ADDRESS`) to use Cortex.
     """
     def _wrapper1(func):
+        required, defaults = _signature(func)
+
         def _wrapper2(*args, **kwargs):
 
             # Verify all required parameters for the primary feature function.
@@ -489,8 +1249,8 @@ def primary_feature(name, dependencies):
                 'id', 'start', 'end',
 
                 # These are the feature function's required parameters after removing parameters
-                # with provided default values, if any are provided.
-                *getfullargspec(func)[0][:-len(getfullargspec(func)[3] or ()) or None]
+                # with provided default values, if any are provided (see '_signature').
+                *required
             ]
             for param in params:
                 if kwargs.get(param, None) is None:
@@ -506,24 +1266,25 @@ def primary_feature(name, dependencies):
             # Get previously calculated primary feature results from attachments, if you do attach.
             has_raw_data = -1
 
-            def _get_default_args(func):
-                """ Get the default arguments for the function.
-
-                    Args:
-                        func: the function
-                    Returns:
-                        a dictionary with key value pairs for the default arguments
-                """
-                signature = inspect.signature(func)
-                return {
-                    k: v.default
-                    for k, v in signature.parameters.items()
-                    if v.default is not inspect.Parameter.empty
-                }
-
-            kwgs = _get_default_args(func)
+            kwgs = dict(defaults)
             kwgs.update(kwargs)
 
+            # Only compute once per window and parameters in a run (see 'primary_memo')
+            key = None
+            if _PRIMARY_MEMO_RUNS[0] > 0:
+                key = (name, kwgs['id'], kwgs['start'], kwgs['end'],
+                       tuple(sorted((k, repr(v)) for k, v in kwgs.items()
+                                    if k not in ('id', 'start', 'end', 'cache'))))
+                with _PRIMARY_MEMO_LOCK:
+                    blob = _PRIMARY_MEMO.get(key)
+                    if blob is not None:
+                        _PRIMARY_MEMO_STATS['hits'] += 1
+                        _PRIMARY_MEMO.move_to_end(key)
+                    else:
+                        _PRIMARY_MEMO_STATS['misses'] += 1
+                if blob is not None:
+                    return pickle.loads(blob, compression=None)
+
             def _primary_filter(_res, has_raw_data, **kwargs):
                 """ Filter out primary feature results that do not belong in interval
                     [kwargs['start'], kwargs['end']].
@@ -552,25 +1313,33 @@ def primary_feature(name, dependencies):
                     A list of filtered primary feature events. The same format as
                         what primary feature results.
                 """
-                _body_new_copy = copy.deepcopy(_res)
+                start, end = kwargs['start'], kwargs['end']
+                starts = np.array([b['start'] for b in _res], dtype=float)
+                ends = np.array([b['end'] for b in _res], dtype=float)
+                # Events end after they start, so when sorted by start (ex: attachments)
+                # only those up to the first start after 'end' need to be checked
+                n_events = len(_res)
+                if np.all(starts[1:] >= starts[:-1]):
+                    n_events = int(np.searchsorted(starts, end, side='right'))
+                starts, ends = starts[:n_events], ends[:n_events]
+                keep = (((starts >= start) & (ends <= end))
+                        | ((starts < start) & (start < ends) & (ends <= end))
+                        | ((start < starts) & (starts < end) & (ends > end)))
                 _event = { 'timestamp': kwargs['start'],
                            'duration': kwargs['end'] - kwargs['start'],
-                           'data':
-                            [b for b in _body_new_copy if
-                                    ((b['start'] >= kwargs['start'] and b['end'] <= kwargs['end'])
-                                  or (b['start'] < kwargs['start'] and
-                                      kwargs['start'] < b['end'] <= kwargs['end'])
-                                  or (kwargs['start'] < b['start'] < kwargs['end'] and
-                                      b['end'] > kwargs['end']))],
-                          'has_raw_data': has_raw_data }
+                           'data': [_res[i] for i in np.flatnonzero(keep)],
+                           'has_raw_data': has_raw_data }
 
                 # make sure start and end match kwargs
+                # (only these events are changed, so only they are copied)
                 if len(_event['data']) > 0:
                     if _event['data'][0]['start'] < kwargs['start']:
+                        _event['data'][0] = dict(_event['data'][0])
                         _event['data'][0]['start'] = kwargs['start']
                         _event['data'][0]['duration'] = (_event['data'][0]['end']
                                                          - _event['data'][0]['start'])
                     if _event['data'][len(_event['data']) - 1]['end'] > kwargs['end']:
+                        _event['data'][-1] = dict(_event['data'][-1])
                         _event['data'][len(_event['data']) - 1]['end'] = kwargs['end']
                         _event['data'][len(_event['data']) - 1]['duration'] = (
                                     _event['data'][len(_event['data']) - 1]['end']
@@ -585,6 +1354,13 @@ def primary_feature(name, dependencies):
                     saved attachments, primary featurization occurs and attachments are updated
                     to include these newly generated events.
 
+                    Events are saved in monthly shards (ex: "cortex.trips.2024-05", see
+                    '_attachment_shard') listed in a manifest ("cortex.trips.manifest") with
+                    the bounds of each shard. Only the shards overlapping [kwargs['start'],
+                    kwargs['end']] or receiving new events are downloaded, and only the
+                    shards that changed are uploaded. Attachments saved as a single list
+                    (under the feature name) are migrated to shards on first use.
+
                     Args:
                         func (method): The raw data-getting method, called if attached data needs to
                             be updated.
@@ -599,31 +1375,69 @@ def primary_feature(name, dependencies):
                     Raises:
                         LAMP.ApiException:
                 """
+                shards, changed, legacy, manifest, removed = {}, set(), False, None, None
+                # Content hashes of the saved attachments, to skip no-op uploads
+                saved = {}
+
+                def _load(key):
+                    if key not in shards:
+                        shards[key] = LAMP.Type.get_attachment(
+                            kwargs['id'], name + '.' + key)['data']
+                        saved[key] = _attachment_hash(shards[key])
+
                 try:
-                    attachments = LAMP.Type.get_attachment(kwargs['id'], name)['data']
+                    try:
+                        manifest = LAMP.Type.get_attachment(
+                            kwargs['id'], name + _ATTACHMENT_MANIFEST)['data']
+                        saved[_ATTACHMENT_MANIFEST] = _attachment_hash(manifest)
+                        manifest['shards'] = dict(manifest['shards'])
+                    except LAMP.ApiException:
+                        # Migrate attachments saved as a single list
+                        attachments = LAMP.Type.get_attachment(kwargs['id'], name)['data']
+                        legacy = True
+                        manifest = {'shards': {}}
+                        for key, events in _attachment_shards(attachments).items():
+                            shards[key] = events
+                            manifest['shards'][key] = _attachment_shard_bounds(events)
+                            changed.add(key)
                     # remove last in case interval still open
                     # but make sure there is data
-                    if len(attachments) > 0:
-                        attachments.remove(max(attachments, key=lambda x: x['end']))
-                        _from = max(a['end'] for a in attachments)
-                        if _from > kwargs['start'] and _from < kwargs['end']:
-                            has_raw_data = 1
+                    if len(manifest['shards']) > 0:
+                        last = max(sorted(manifest['shards']),
+                                   key=lambda k: manifest['shards'][k]['end'])
+                        _load(last)
+                        last_event = max(shards[last], key=lambda x: x['end'])
+                        removed = (last, shards[last].index(last_event), last_event)
+                        shards[last].remove(last_event)
+                        changed.add(last)
+                        if shards[last]:
+                            manifest['shards'][last] = _attachment_shard_bounds(shards[last])
+                        else:
+                            del manifest['shards'][last]
+                        _from = max(a['end'] for a in manifest['shards'].values())
                     else:
                         _from = kwargs['end']
                     log.info(f"Using saved \"{name}\"...")
                 except LAMP.ApiException:
-                    attachments = []
-                    _from = 0
+                    manifest, shards, _from, saved = {'shards': {}}, {}, 0, {}
                     log.info(f"No saved \"{name}\" found...")
                 except Exception:
-                    attachments = []
-                    _from = 0
+                    # Includes the case of a single saved (open) event
+                    changed |= set(shards)
+                    if isinstance(manifest, dict) and isinstance(manifest.get('shards'), dict):
+                        changed |= set(manifest['shards'])
+                    manifest, shards, _from = {'shards': {}}, {k: [] for k in changed}, 0
+                    removed, saved = None, {}
                     log.info("Saved " + name + " could not be parsed, discarding...")
 
-                start = kwargs['start']
                 if _from > kwargs['end']:
                     _result = []
                     has_raw_data = -1
+                    # Nothing is recomputed, so keep the last saved event
+                    if removed is not None:
+                        shards[removed[0]].insert(removed[1], removed[2])
+                        manifest['shards'][removed[0]] = _attachment_shard_bounds(
+                            shards[removed[0]])
                 else:
                     _result = func(*args, **{**kwargs, 'start':_from})
                     if 'has_raw_data' in _result:
@@ -632,16 +1446,36 @@ def primary_feature(name, dependencies):
                         has_raw_data = -1
                     _result = _result['data']
 
-                # Combine old attachments with new results
-                unique_dict = _result + attachments
-                unique_dict = [k for j, k in enumerate(unique_dict) if k not in unique_dict[j + 1:]]
-                _body_new = sorted((unique_dict),key=lambda x: x['start'])
-                # need to use a copy so you don't overwrite the original
+                # Combine old attachments with new results, shard by shard
+                for key, events in _attachment_shards(_result).items():
+                    if key in manifest['shards']:
+                        _load(key)
+                    shards[key] = _merge_events(events, shards.get(key, []))
+                    changed.add(key)
+                for key, bounds in manifest['shards'].items():
+                    if bounds['start'] <= kwargs['end'] and bounds['end'] >= kwargs['start']:
+                        _load(key)
+                _body_new = [e for key in sorted(shards) for e in shards[key]]
                 _event = _primary_filter(_body_new, has_raw_data, *args, **kwargs)
 
                 # Upload new features as attachment.
                 log.info(f"Saving primary feature \"{name}\"...")
-                LAMP.Type.set_attachment(kwargs['id'], 'me', attachment_key=name, body=_body_new)
+                # (only the attachments whose content changed)
+                for key in sorted(changed):
+                    if key not in saved or saved[key] != _attachment_hash(shards[key]):
+                        LAMP.Type.set_attachment(kwargs['id'], 'me',
+                                                 attachment_key=name + '.' + key,
+                                                 body=shards[key] or None)
+                    if shards[key]:
+                        manifest['shards'][key] = _attachment_shard_bounds(shards[key])
+                    else:
+                        manifest['shards'].pop(key, None)
+                if saved.get(_ATTACHMENT_MANIFEST) != _attachment_hash(manifest):
+                    LAMP.Type.set_attachment(kwargs['id'], 'me',
+                                             attachment_key=name + _ATTACHMENT_MANIFEST,
+                                             body=manifest)
+                if legacy:
+                    LAMP.Type.set_attachment(kwargs['id'], 'me', attachment_key=name, body=None)
 
                 return _event
 
@@ -654,7 +1488,9 @@ def primary_feature(name, dependencies):
                 _result_init = func(*args, **kwgs)
                 _result = _primary_filter(_result_init['data'],
                                           _result_init['has_raw_data'], *args, **kwgs)
-                diff = [e for e in _result['data'] if e not in _result_init['data']]
+                # Only the bounding events can have been changed by the filter
+                diff = [e for e in _result['data'][:1] + _result['data'][1:][-1:]
+                        if e not in _result_init['data']]
                 for d in diff:
                     if d['start'] < kwgs['start']:
                         print("START")
@@ -674,6 +1510,18 @@ def primary_feature(name, dependencies):
                           'data': _result['data'],
                           'has_raw_data': has_raw_data}
 
+            if key is not None:
+                blob = pickle.dumps(_event, compression=None)
+                with _PRIMARY_MEMO_LOCK:
+                    # (unless the run was closed meanwhile)
+                    if _PRIMARY_MEMO_RUNS[0] > 0:
+                        _PRIMARY_MEMO_BYTES[0] += len(blob) - len(_PRIMARY_MEMO.get(key, b''))
+                        _PRIMARY_MEMO[key] = blob
+                        _PRIMARY_MEMO.move_to_end(key)
+                    while _PRIMARY_MEMO_BYTES[0] > int(os.getenv('CORTEX_PRIMARY_MEMO_BYTES',
+                                                                  str(256 * 1024 ** 2))):
+                        _PRIMARY_MEMO_BYTES[0] -= len(_PRIMARY_MEMO.popitem(last=False)[1])
+                        _PRIMARY_MEMO_STATS['evictions'] += 1
             return _event
 
         # When we register/save the function, make sure we save the
@@ -682,7 +1530,9 @@ def primary_feature(name, dependencies):
         __features__.append({ 'name': name,
                              'type': 'primary',
                              'dependencies': dependencies,
-                             'callable': _wrapper2 })
+                             'callable': _wrapper2,
+                             'required': required,
+                             'defaults': defaults })
         return _wrapper2
     return _wrapper1
 
@@ -708,6 +1558,12 @@ def secondary_feature(name, dependencies):
             end (int): The UNIX timestamp (in ms) to end processing (i.e. "to").
                 The last temporal window ends at this timepoint. Required.
             resolution: The duration (in ms) of each requested time window. Required.
+            prefetch (boolean): If True, each raw dependency is requested once for
+                [kwargs['start'], kwargs['end']] and every window is served from
+                a slice of that in-memory series instead of its own API request.
+            batch (boolean): If True, all windows are computed at once by a batch
+                kernel registered with 'secondary_kernel', if one matches; else the
+                feature is computed window by window. Default: False.
 
     Returns:
         A dict with a timestamp (kwargs['start']), duration (kwargs['end'] - kwargs['start']),
@@ -727,6 +1583,8 @@ def secondary_feature(name, dependencies):
             (and optionally `LAMP_SERVER_ADDRESS`) to use Cortex.
     """
     def _wrapper1(func):
+        required, defaults = _signature(func)
+
         def _wrapper2(*args, **kwargs):
 
             # Verify all required parameters for the primary feature function.
@@ -736,8 +1594,8 @@ def secondary_feature(name, dependencies):
                 'id', 'start', 'end', 'resolution',
 
                 # These are the feature function's required parameters after removing parameters
-                # with provided default values, if any are provided.
-                *getfullargspec(func)[0][:-len(getfullargspec(func)[3] or ()) or None]
+                # with provided default values, if any are provided (see '_signature').
+                *required
             ]
             for param in params:
                 if kwargs.get(param, None) is None:
@@ -747,31 +1605,50 @@ def secondary_feature(name, dependencies):
                 raise Exception("'start' argument must occur before 'end'.")
 
             log.info("Processing secondary feature " + name + "...")
-            def _get_default_args(func):
-                """ Get the default arguments for the function.
-
-                    Args:
-                        func: the function
-                    Returns:
-                        a dictionary with key value pairs for the default arguments
-                """
-                signature = inspect.signature(func)
-                return {
-                    k: v.default
-                    for k, v in signature.parameters.items()
-                    if v.default is not inspect.Parameter.empty
-                }
-
-            kwgs = _get_default_args(func)
+            kwgs = dict(defaults)
             kwgs.update(kwargs)
             n_res = int((kwgs['end'] - kwgs['start'])/kwgs['resolution'])
             ts_list = [(kwgs['start'] + i*kwgs['resolution'], kwgs['start'] + (i+1)*kwgs['resolution'])
                        for i in range(n_res)]
+
+            # Compute all windows at once if a matching batch kernel is registered
+            kernel = None
+            if kwgs.get('batch', False):
+                kernel = next((k for k in _entry['kernels']
+                               if all(kwgs.get(p) == v for p, v in k['when'].items())), None)
+            if kernel is not None:
+                edges = kwgs['start'] + kwgs['resolution'] * np.arange(n_res + 1, dtype=np.int64)
+                try:
+                    data = _secondary_batch(kernel, edges, **kwgs) if n_res > 0 else []
+                except KeyError as e:
+                    # A field is missing from the raw data: compute window by window,
+                    # where events are looked up one by one
+                    log.info("Batch kernel of " + name + " needs missing field "
+                             + str(e) + ", computing window by window...")
+                else:
+                    return {'timestamp': kwgs['start'],
+                            'duration': kwgs['end'] - kwgs['start'],
+                            'resolution':kwgs['resolution'],
+                            'data': data}
+
+            # Fetch each raw dependency once for [start, end] and slice it per window
+            scope = None
+            if kwgs.get('prefetch'):
+                scope = {'id': kwgs['id'],
+                         'start': kwgs['start'],
+                         'end': kwgs['end'],
+                         'names': _raw_dependency_names(dependencies),
+                         'series': {}}
+                _PREFETCH_SCOPES.append(scope)
             data = []
-            for window in reversed(ts_list):
-                window_start, window_end = window[0], window[1]
-                _result = func(**{**kwgs, 'start':window_start, 'end':window_end})
-                data.append(_result)
+            try:
+                for window in reversed(ts_list):
+                    window_start, window_end = window[0], window[1]
+                    _result = func(**{**kwgs, 'start':window_start, 'end':window_end})
+                    data.append(_result)
+            finally:
+                if scope is not None:
+                    _PREFETCH_SCOPES.remove(scope)
 
             # TODO: Require primary feature dependencies to be primary features (or raw features?)!
             data = sorted(data,key=lambda x: x['timestamp']) if data else []
@@ -784,17 +1661,120 @@ def secondary_feature(name, dependencies):
         # When we register/save the function, make sure we save the decorated
         # and not the RAW function.
         _wrapper2.__name__ = func.__name__
-        __features__.append({ 'name': name,
-                             'type': 'secondary',
-                             'dependencies': dependencies,
-                             'callable': _wrapper2 })
+        _entry = { 'name': name,
+                   'type': 'secondary',
+                   'dependencies': dependencies,
+                   'callable': _wrapper2,
+                   'required': required,
+                   'defaults': defaults,
+                   'kernels': [] }
+        __features__.append(_entry)
         return _wrapper2
     return _wrapper1
 
+def secondary_kernel(feature, raw, when=None):
+    """Registers a vectorized batch kernel for a secondary feature.
+
+    Instead of being called once per window, the kernel is called once with all raw data
+    in [kwargs['start'], kwargs['end']] and the edges of every window, and returns one value
+    per window. If called with batch=True, the secondary feature uses the first registered
+    kernel whose 'when' parameters match its arguments; otherwise (or if the kernel raises
+    a KeyError for a field missing from the raw data) it calls the feature function once
+    per window.
+
+    Args:
+        feature (method): The decorated secondary feature the kernel computes.
+        raw (method): The cortex.raw method whose data is passed to the kernel.
+        when (dict): Feature parameters (after applying defaults) the kernel is
+            restricted to, ex: {'sensor': 'Telephony'}. Default is all parameters.
+
+    The decorated kernel is called as kernel(data, edges, **kwargs) where:
+        data (pd.DataFrame): The raw data, sorted by ascending timestamp.
+        edges (np.ndarray): The n + 1 window edges (in ms); window i is
+            [edges[i], edges[i + 1]]. See 'bin_events'.
+        **kwargs: The arguments of the secondary feature.
+    and returns a sequence of n values (None for windows without a value).
+    """
+    def _wrapper1(func):
+        entry = next(f for f in __features__ if f['callable'] is feature)
+        entry['kernels'].append({'callable': func,
+                                 'raw': raw,
+                                 'when': when or {}})
+        return func
+    return _wrapper1
+
+def _secondary_batch(kernel, edges, **kwgs):
+    """ Compute all windows of a secondary feature with its batch kernel.
+
+        Args:
+            kernel (dict): The registered kernel (see 'secondary_kernel').
+            edges (np.ndarray): The window edges (in ms).
+            **kwgs: The arguments of the secondary feature.
+        Returns:
+            A list of {'timestamp', 'value'} dicts, one per window, sorted by timestamp.
+    """
+    _raw = kernel['raw'](**{**kwgs, 'start': int(edges[0]), 'end': int(edges[-1])})['data']
+    _data = pd.DataFrame(list(reversed(_raw)))
+    if len(_data) > 0:
+        _data = _data.sort_values('timestamp', kind='stable', ignore_index=True)
+    values = kernel['callable'](_data, edges, **kwgs)
+    return [{'timestamp': int(timestamp),
+             'value': value.item() if isinstance(value, np.generic) else value}
+            for timestamp, value in zip(edges[:-1], values)]
+
+def bin_events(timestamps, edges):
+    """ Assign events to the windows they fall in.
+
+        Windows are closed on both ends (as in raw feature requests), so an event
+        exactly on an interior edge belongs to both adjacent windows.
+
+        Args:
+            timestamps (array-like): The UNIX timestamps (in ms) of the events.
+            edges (array-like): The n + 1 sorted window edges (in ms).
+        Returns:
+            A tuple (rows, bins) of equal-length integer arrays; each event index in
+            'rows' lies in window 'bins' (0 <= bins < n). Per-window reductions are
+            then ex: np.bincount(bins, weights=values[rows], minlength=n).
+    """
+    timestamps = np.asarray(timestamps)
+    edges = np.asarray(edges)
+    n_bins = len(edges) - 1
+    if n_bins < 1 or len(timestamps) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    rows = np.flatnonzero((timestamps >= edges[0]) & (timestamps <= edges[-1]))
+    bins = np.minimum(np.searchsorted(edges, timestamps[rows], side='right') - 1, n_bins - 1)
+    on_edge = (bins > 0) & (timestamps[rows] == edges[bins])
+    return (np.concatenate([rows, rows[on_edge]]),
+            np.concatenate([bins, bins[on_edge] - 1]))
+
 ### Auxilliary functions ###
 
 ## Attach ##
 
+# Primary feature attachments are saved as monthly shards listed in a manifest.
+_ATTACHMENT_MANIFEST = '.manifest'
+
+def _attachment_shard(timestamp):
+    """ Get the shard (the UTC month, ex: "2024-05") of a primary feature event start. """
+    return time.strftime('%Y-%m', time.gmtime(timestamp / 1000))
+
+def _attachment_shards(events):
+    """ Group primary feature events by shard (see '_attachment_shard'), keeping their order. """
+    shards = {}
+    for event in events:
+        shards.setdefault(_attachment_shard(event['start']), []).append(event)
+    return shards
+
+def _attachment_hash(body):
+    """ Get a content hash of an attachment body (to skip uploading unchanged bodies). """
+    return hashlib.sha1(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+
+def _attachment_shard_bounds(events):
+    """ Get the manifest entry of a shard: the earliest start, the latest end and the count. """
+    return {'start': min(e['start'] for e in events),
+            'end': max(e['end'] for e in events),
+            'count': len(events)}
+
 def delete_attach(participant, features=None):
     """
     Deletes all saved primary features for a participant (requires LAMP-core 2021.4.7 or later)
@@ -805,11 +1785,652 @@ def delete_attach(participant, features=None):
     if features is None: features=attachments
     for feature in attachments:
         if feature.startswith('cortex'):
-            if feature in features:
+            # Include the shards and manifest of primary features
+            if feature in features or feature.rsplit('.', 1)[0] in features:
                 LAMP.Type.set_attachment(participant, 'me', attachment_key=feature, body=None)
                 log.info("Reset " + feature + "...")
 
 ## Cache ##
+CACHE_INDEX = '.cortex_index.sqlite'
+_CACHE_COMPRESSION = {'gz': 'gzip', 'bz2': 'bz2', 'lzma': 'lzma', 'zip': 'zipfile'}
+_CACHE_FILE = re.compile(r'^(.+)_([^_]+)_(\d+)_(\d+)\.cortex(\.(gz|bz2|lzma|zip|col))?$')
+
+def _cache_index(cache_dir):
+    """ Open the interval index of a cache directory.
+
+        The index is a SQLite table of (sensor, id, start, end, file) rows, one per
+        cached file, with a B-tree over (sensor, id, start, end) so that finding a file
+        enclosing an interval does not scan the directory. If the index does not exist
+        yet, it is built from the files already in the directory.
+
+        Args:
+            cache_dir (str): The cache directory.
+        Returns:
+            An open sqlite3.Connection (to be closed by the caller).
+    """
+    path = os.path.join(cache_dir, CACHE_INDEX)
+    exists = os.path.exists(path)
+    index = sqlite3.connect(path, timeout=60)
+    with index:
+        index.execute("CREATE TABLE IF NOT EXISTS blobs (sensor TEXT, id TEXT, "
+                      + "start INTEGER, end INTEGER, file TEXT PRIMARY KEY)")
+        index.execute("CREATE INDEX IF NOT EXISTS blobs_interval "
+                      + "ON blobs (sensor, id, start, end)")
+        index.execute("CREATE TABLE IF NOT EXISTS bounds (sensor TEXT, id TEXT, "
+                      + "first INTEGER, last INTEGER, checked INTEGER, "
+                      + "PRIMARY KEY (sensor, id))")
+        # (bounds saved before they had a probe time are probed again)
+        if 'checked' not in [row[1] for row in index.execute("PRAGMA table_info(bounds)")]:
+            index.execute("ALTER TABLE bounds ADD COLUMN checked INTEGER")
+    if not exists:
+        _cache_index_scan(index, cache_dir)
+    return index
+
+def _cache_index_scan(index, cache_dir):
+    """ Add all cached files found in cache_dir to the index (in one transaction). """
+    rows = []
+    for file in os.listdir(cache_dir):
+        match = _CACHE_FILE.match(file)
+        if match is not None:
+            rows.append((match.group(1), match.group(2),
+                         int(match.group(3)), int(match.group(4)), file))
+    with index:
+        index.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?)", rows)
+
+def _cache_index_add(index, path, sensor, id, start, end, replaces=()):
+    """ Record a newly written cache file in the index.
+
+        Args:
+            index (sqlite3.Connection): The cache index (see '_cache_index').
+            path (str): The path to the new cached file.
+            sensor (str): The raw data type (ex: "gps").
+            id (str): The participant id.
+            start (int): The start UNIX timestamp (in ms) covered by the file.
+            end (int): The end UNIX timestamp (in ms) covered by the file.
+            replaces (list): Paths to cached files merged into the new file; these
+                are removed from the index in the same transaction.
+    """
+    with index:
+        index.executemany("DELETE FROM blobs WHERE file = ?",
+                          [(os.path.basename(r),) for r in replaces])
+        index.execute("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?)",
+                      (sensor, id, int(start), int(end), os.path.basename(path)))
+
+def _cache_index_overlaps(index, cache_dir, sensor, **kwargs):
+    """ Find all cached files overlapping [kwargs['start'], kwargs['end']].
+
+        Returns:
+            A list of (start, end, path) tuples sorted by start.
+    """
+    rows = index.execute("SELECT start, end, file FROM blobs WHERE sensor = ? AND id = ? AND "
+                         + "start <= ? AND end >= ? ORDER BY start",
+                         (sensor, kwargs['id'],
+                          int(kwargs['end']), int(kwargs['start']))).fetchall()
+    return [(start, end, os.path.join(cache_dir, file)) for start, end, file in rows
+            if os.path.exists(os.path.join(cache_dir, file))]
+
+def _uncovered(intervals, start, end):
+    """ Find the sub-intervals of [start, end] not covered by any of the intervals.
+
+        Args:
+            intervals (list): (start, end) tuples, sorted by start.
+            start (int): The start UNIX timestamp (in ms).
+            end (int): The end UNIX timestamp (in ms).
+        Returns:
+            A list of (start, end) tuples. Gaps share their end points with the
+            neighbouring intervals, as all intervals are closed.
+    """
+    gaps = []
+    cursor = start
+    for i_start, i_end in intervals:
+        if i_start > cursor:
+            gaps.append((cursor, min(i_start, end)))
+        cursor = max(cursor, i_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+def _is_covered(timestamp, intervals):
+    """ Whether the timestamp lies in any of the (closed) intervals. """
+    return any(i_start <= timestamp <= i_end for i_start, i_end in intervals)
+
+def _cache_index_lookup(index, cache_dir, sensor, **kwargs):
+    """ Find a cached file enclosing [kwargs['start'], kwargs['end']].
+
+        Args:
+            index (sqlite3.Connection): The cache index (see '_cache_index').
+            cache_dir (str): The cache directory.
+            sensor (str): The raw data type (ex: "gps").
+            **kwargs:
+                id (str): The participant id.
+                start (int): The start UNIX timestamp (in ms).
+                end (int): The end UNIX timestamp (in ms).
+        Returns:
+            The path to the cached file, or None if there is none.
+    """
+    while True:
+        row = index.execute("SELECT file FROM blobs WHERE sensor = ? AND id = ? AND "
+                            + "start <= ? AND end >= ? ORDER BY start DESC LIMIT 1",
+                            (sensor, kwargs['id'],
+                             int(kwargs['start']), int(kwargs['end']))).fetchone()
+        if row is None:
+            return None
+        path = os.path.join(cache_dir, row[0])
+        if os.path.exists(path):
+            return path
+        # The file was removed outside of cortex
+        with index:
+            index.execute("DELETE FROM blobs WHERE file = ?", row)
+
+def _cache_load(path, start=None, end=None):
+    """ Load a cached file as a list of raw events.
+
+        Args:
+            path (str): The path to the cached file. Its extension gives the format:
+                '.col' for columnar, else a (compressed) pickle.
+            start (int): If given, only events at or after this UNIX timestamp (in ms)
+                are loaded (only applied before deserializing for columnar files).
+            end (int): If given, only events at or before this UNIX timestamp are loaded.
+        Returns:
+            A list of raw events, sorted by descending timestamp for columnar files.
+    """
+    if path.endswith('.col'):
+        return _events_from_columns(_cache_columns(path, start=start, end=end))
+    compression = _CACHE_COMPRESSION.get(path.split('.')[-1])
+    return pickle.load(path, compression=compression, set_default_extension=False)
+
+def _cache_save(data, path):
+    """ Save a cached file (the format and compression are given by its extension).
+
+        The data is written to a temporary file first, so the file only appears
+        (and is only indexed) once it is complete. Data that cannot be stored as
+        columns (see '_columns_save') is pickled instead, without the '.col'
+        extension.
+
+        Returns:
+            The path of the saved file.
+    """
+    tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+    if path.endswith('.col') and _columns_save(data, tmp_path):
+        _cache_remove(path)
+    else:
+        if path.endswith('.col'):
+            path = path[:-len('.col')]
+            tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+        compression = _CACHE_COMPRESSION.get(path.split('.')[-1])
+        pickle.dump(data, tmp_path, compression=compression, set_default_extension=False)
+    os.replace(tmp_path, path)
+    return path
+
+def _cache_remove(path):
+    """ Remove a cached file (columnar files are directories). """
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+def _flatten_event(event, prefix=()):
+    """ Yield the (key path, value) pairs of a raw event; nested dicts are unravelled. """
+    for key, value in event.items():
+        if isinstance(value, dict) and value:
+            yield from _flatten_event(value, prefix + (key,))
+        else:
+            yield prefix + (key,), value
+
+def _columns_save(data, path):
+    """ Save raw events as a directory of typed .npy columns sorted by timestamp.
+
+        Nested dicts are unravelled into one column per leaf (ex: "motion.x"), so
+        that readings of sensors like device_motion can be memory-mapped as well.
+        Numeric, boolean and string fields are stored with numpy dtypes; any other
+        field is stored as an object column; fields mixing ints and floats are
+        stored as floats. Fields missing from some events get an additional
+        presence mask.
+
+        Fields that are nested dicts in some events but not in others (ex: a
+        "motion" dict or a null "motion") have no consistent set of columns: the
+        events are then not saved.
+
+        Args:
+            data (list): The raw events.
+            path (str): The directory to create.
+        Returns:
+            True if the events were saved, False if they cannot be stored as columns.
+    """
+    # Ascending and stable w.r.t. the (descending) order of the API
+    data = [dict(_flatten_event(r)) for r in
+            sorted(reversed(data), key=lambda i: i['timestamp'])]
+    columns = list(dict.fromkeys(k for r in data for k in r))
+    leaves = set(columns)
+    if any(column[:i] in leaves for column in columns for i in range(1, len(column))):
+        return False
+    os.makedirs(path)
+    masked = []
+    for idx, column in enumerate(columns):
+        present = np.array([column in r for r in data], dtype=bool)
+        values = [r.get(column) for r in data]
+        if not present.all():
+            masked.append(idx)
+            np.save(os.path.join(path, str(idx) + '.mask.npy'), present)
+        kept = [v for v, p in zip(values, present) if p]
+        if all(isinstance(v, bool) for v in kept):
+            values = np.array([bool(v) for v in values], dtype=bool)
+        elif all(isinstance(v, int) and not isinstance(v, bool) for v in kept):
+            values = np.array([v if p else 0 for v, p in zip(values, present)], dtype=np.int64)
+        elif all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in kept):
+            values = np.array([v if p else np.nan for v, p in zip(values, present)],
+                              dtype=np.float64)
+        elif kept and all(isinstance(v, str) for v in kept):
+            values = np.array([v if p else '' for v, p in zip(values, present)], dtype=str)
+        else:
+            obj = np.empty(len(values), dtype=object)
+            obj[:] = values
+            values = obj
+        np.save(os.path.join(path, str(idx) + '.npy'), values, allow_pickle=True)
+    with open(os.path.join(path, 'columns.json'), 'w') as file:
+        json.dump({'columns': columns, 'masked': masked, 'rows': len(data)}, file)
+    return True
+
+def _cache_columns(path, columns=None, start=None, end=None):
+    """ Read columns of a columnar cached file.
+
+        Only the requested columns are read (projection), and only the rows in
+        [start, end] are returned (found by binary search on the sorted timestamps).
+        Columns with a numpy dtype are memory-mapped read-only rather than loaded,
+        so the returned arrays are views on the OS page cache.
+
+        Args:
+            path (str): The columnar cached file (a '.col' directory).
+            columns (list): The fields to read, with nested fields joined by
+                "." (ex: "motion.x"). Default: all fields.
+            start (int): The start UNIX timestamp (in ms). Default: no bound.
+            end (int): The end UNIX timestamp (in ms). Default: no bound.
+        Returns:
+            A dict of key path (tuple) to a tuple (values, mask) of numpy arrays sorted
+            by ascending timestamp; mask is None if the field is present in all events.
+    """
+    with open(os.path.join(path, 'columns.json')) as file:
+        meta = json.load(file)
+    if meta['rows'] == 0:
+        return {}
+
+    def _read(idx, suffix='.npy'):
+        file = os.path.join(path, str(idx) + suffix)
+        try:
+            arr = np.load(file, mmap_mode='r')
+        except ValueError: # object columns cannot be memory-mapped
+            arr = np.load(file, allow_pickle=True)
+        return arr[lo:hi]
+
+    paths = [tuple(column) for column in meta['columns']]
+    lo, hi = 0, meta['rows']
+    timestamps = _read(paths.index(('timestamp',)))
+    if start is not None:
+        lo = int(np.searchsorted(timestamps, start, side='left'))
+    if end is not None:
+        hi = int(np.searchsorted(timestamps, end, side='right'))
+    return {column: (_read(idx), _read(idx, '.mask.npy') if idx in meta['masked'] else None)
+            for idx, column in enumerate(paths)
+            if columns is None or '.'.join(column) in columns or column == ('timestamp',)}
+
+def _events_from_columns(columns):
+    """ Rebuild raw events (sorted by descending timestamp) from cached columns. """
+    if not columns:
+        return []
+    paths = list(columns)
+    values = [columns[column][0][::-1].tolist() for column in paths]
+    masks = [columns[column][1][::-1].tolist() if columns[column][1] is not None else None
+             for column in paths]
+    data = []
+    for i, row in enumerate(zip(*values)):
+        event = {}
+        for column, value, mask in zip(paths, row, masks):
+            if mask is not None and not mask[i]:
+                continue
+            node = event
+            for key in column[:-1]:
+                node = node.setdefault(key, {})
+            node[column[-1]] = value
+        data.append(event)
+    return data
+
+def _events_frame(events):
+    """ Build a DataFrame from raw events, with nested fields flattened to "a.b" columns.
+
+        Args:
+            events (list): The raw events (dicts with a 'timestamp').
+        Returns:
+            A DataFrame with one column per field, in the order of events.
+    """
+    if len(events) == 0:
+        return pd.DataFrame({'timestamp': np.zeros(0, dtype=np.int64)})
+    return pd.json_normalize(events)
+
+def _frame_from_columns(columns):
+    """ Build a DataFrame (sorted by descending timestamp) from cached columns. """
+    if not columns:
+        return _events_frame([])
+    return pd.DataFrame({'.'.join(column): (pd.Series(values[::-1]) if mask is None else
+                                            pd.Series(values[::-1]).where(mask[::-1]))
+                         for column, (values, mask) in columns.items()})
+
+def _arrow_table(frame):
+    """ Convert a DataFrame of raw events to a pyarrow Table. """
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("pyarrow is not installed; cannot return raw data as an Arrow table!"
+                          + " Install it with `pip install LAMP-cortex[arrow]`.")
+    return pyarrow.Table.from_pandas(frame, preserve_index=False)
+
+def _event_field(event, field):
+    """ Get a (possibly nested, ex: "motion.x") field of a raw event, or NaN. """
+    for key in field.split('.'):
+        if not isinstance(event, dict) or key not in event:
+            return np.nan
+        event = event[key]
+    return event
+
+# Default fields returned by 'raw_arrays' for high-rate sensors.
+ARRAY_FIELDS = {'lamp.accelerometer': ['x', 'y', 'z'],
+                'lamp.gyroscope': ['x', 'y', 'z'],
+                'lamp.device_motion': ['motion.x', 'motion.y', 'motion.z'],
+                'com.apple.sensorkit.ambient_light': ['lux.value']}
+
+def raw_arrays(feature, fields=None, **kwargs):
+    """ Get raw sensor data as numpy arrays, one per field.
+
+        If caching is requested, the data is read from the columnar cache: the
+        arrays are read-only memory maps of the cached file, so months of high-rate
+        data (ex: accelerometer) are not loaded into memory, and processes reading
+        the same cache share its pages. Missing cached data is first fetched (and
+        cached) through the raw feature. Otherwise, or for pickled cached files, the
+        arrays are built from the events returned by the raw feature.
+
+        Args:
+            feature (method or str): The raw feature (ex: cortex.raw.accelerometer) or
+                its name (ex: "lamp.accelerometer").
+            fields (list): The fields to return, with nested fields joined by "."
+                (ex: "motion.x"). Default: ARRAY_FIELDS for the sensor, else all fields.
+            **kwargs:
+                id (string): The Participant LAMP id. Required.
+                start (int): The UNIX timestamp (in ms) to begin querying. Required.
+                end (int): The UNIX timestamp (in ms) to end querying. Required.
+                cache (boolean): If True the arrays are read from the cache directory.
+        Returns:
+            A dict of field name to numpy array, including 'timestamp', sorted by
+            ascending timestamp. Missing values are NaN.
+    """
+    if isinstance(feature, str):
+        load_features([feature])
+    entry = [f for f in __features__ if f['type'] == 'raw' and
+             (f['callable'] is feature or f['name'] == feature)][0]
+    name, feature = entry['name'], entry['callable']
+    if fields is None:
+        fields = ARRAY_FIELDS.get(name)
+
+    path = None
+    limit = int(kwargs.get('_limit', MAX_RETURN_SIZE))
+    if (kwargs.get('cache') and os.getenv('CORTEX_CACHE_DIR') is not None and
+            kwargs.get('recursive', True) and abs(limit) >= MAX_RETURN_SIZE and
+            _prefetch_scope(name, **kwargs) is None):
+        cache_dir = os.path.expanduser(os.getenv('CORTEX_CACHE_DIR'))
+        sensor = name.split('.')[-1]
+        for _ in range(2):
+            with closing(_cache_index(cache_dir)) as index:
+                path = _cache_index_lookup(index, cache_dir, sensor, **kwargs)
+            if path is not None:
+                break
+            feature(**kwargs)
+
+    if path is not None and path.endswith('.col'):
+        columns = _cache_columns(path, columns=fields, start=kwargs['start'], end=kwargs['end'])
+        arrays = {'timestamp': np.zeros(0, dtype=np.int64)}
+        for column, (values, mask) in columns.items():
+            if mask is not None:
+                values = np.where(mask, values, np.nan)
+            arrays['.'.join(column)] = values
+    else:
+        data = (_cache_load(path, start=kwargs['start'], end=kwargs['end'])
+                if path is not None else feature(**kwargs)['data'])
+        data = [r for r in reversed(data) if kwargs['start'] <= r['timestamp'] <= kwargs['end']]
+        if fields is None:
+            fields = list(dict.fromkeys('.'.join(k) for r in data for k, _ in _flatten_event(r)))
+        arrays = {'timestamp': np.array([r['timestamp'] for r in data], dtype=np.int64)}
+        for field in fields:
+            if field != 'timestamp':
+                arrays[field] = np.array([_event_field(r, field) for r in data])
+    for field in fields or []:
+        if field not in arrays:
+            arrays[field] = np.full(len(arrays['timestamp']), np.nan)
+    return arrays
+
+def iter_pages(feature, chunk_size=MAX_RETURN_SIZE, **kwargs):
+    """ Stream raw data in chunks, from the oldest to the most recent event.
+
+        Sensor data is requested from LAMP.SensorEvent one page at a time and each
+        chunk is yielded as soon as it is available, so that arbitrarily long time
+        ranges can be processed with bounded memory. If caching is requested and the
+        columnar cache holds all of [start, end], the chunks are read from the cache
+        instead (streamed data is not itself cached). Within an open prefetch scope
+        (ex: 'shared_fetches' during cortex.run), the chunks are sliced from the
+        series of the scope instead. Activity features (games, surveys) are fetched
+        at once and then split into chunks.
+
+        Raw features return this generator when called with stream=True.
+
+        Args:
+            feature (method or str): The raw feature (ex: cortex.raw.accelerometer) or
+                its name (ex: "lamp.accelerometer").
+            chunk_size (int): The maximum number of events per chunk. Default: one
+                API page (MAX_RETURN_SIZE).
+            **kwargs:
+                id (string): The Participant LAMP id. Required.
+                start (int): The UNIX timestamp (in ms) to begin querying. Required.
+                end (int): The UNIX timestamp (in ms) to end querying. Required.
+                cache (boolean): If True the chunks are read from the cache directory,
+                    when possible.
+                format (string): 'records' (the default), 'frame' or 'arrow' (see
+                    'raw_feature').
+                as_frame (boolean): If True, same as format='frame'.
+        Returns:
+            A generator of chunks of events sorted by ascending timestamp; chunks
+            are lists of dicts, DataFrames or pyarrow Tables (see 'format').
+    """
+    for param in ['id', 'start', 'end']:
+        if kwargs.get(param, None) is None:
+            raise Exception(f"parameter `{param}` is required but missing")
+    if kwargs['start'] > kwargs['end']:
+        raise Exception("'start' argument must occur before 'end'.")
+    _format = kwargs.pop('format', 'records')
+    if kwargs.pop('as_frame', False):
+        _format = 'frame'
+    if _format not in ['records', 'frame', 'arrow']:
+        raise Exception(f"format `{_format}` must be one of 'records', 'frame' or 'arrow'")
+
+    if isinstance(feature, str):
+        load_features([feature])
+    entry = [f for f in __features__ if f['type'] == 'raw' and
+             (f['callable'] is feature or f['name'] == feature)][0]
+    name, feature = entry['name'], entry['callable']
+    start, end = kwargs['start'], kwargs['end']
+    page_size = min(abs(int(kwargs.get('_limit', MAX_RETURN_SIZE))), MAX_RETURN_SIZE)
+
+    path = None
+    scope = _prefetch_scope(name, **kwargs)
+    if scope is None and kwargs.get('cache') and os.getenv('CORTEX_CACHE_DIR') is not None:
+        cache_dir = os.path.expanduser(os.getenv('CORTEX_CACHE_DIR'))
+        with closing(_cache_index(cache_dir)) as index:
+            path = _cache_index_lookup(index, cache_dir, name.split('.')[-1], **kwargs)
+
+    def _records():
+        # Yields iterables of events sorted by ascending timestamp
+        if scope is not None:
+            # Sliced from the series already held by the scope
+            yield feature(**{**kwargs, '_limit': MAX_RETURN_SIZE, 'recursive': True})['data'][::-1]
+        elif path is not None and path.endswith('.col'):
+            columns = _cache_columns(path, start=start, end=end)
+            rows = len(columns[('timestamp',)][0]) if columns else 0
+            for i in range(0, rows, chunk_size):
+                yield _events_from_columns({
+                    column: (values[i:i + chunk_size],
+                             mask[i:i + chunk_size] if mask is not None else None)
+                    for column, (values, mask) in columns.items()})[::-1]
+        elif path is not None:
+            yield (r for r in reversed(_cache_load(path)) if start <= r['timestamp'] <= end)
+        elif name in ACTIVITIES:
+            yield feature(**{**kwargs, 'cache': False})['data'][::-1]
+        else:
+            def _query(origin):
+                return lambda _from, to, _limit: LAMP.SensorEvent.all_by_participant(
+                    kwargs['id'], origin=origin, _from=int(_from), to=int(to),
+                    _limit=int(_limit))['data']
+            origins = [name] + (["lamp.screen_state"] if name == "lamp.device_state" else [])
+            streams = [(r for page in _iter_paginate(_query(origin), start, end, page_size)
+                        for r in _sensor_records(name, page)) for origin in origins]
+            # Merge device_state / screen_state
+            yield (streams[0] if len(streams) == 1 else
+                   heapq.merge(*streams, key=lambda r: r['timestamp']))
+
+    def _chunks():
+        chunk = []
+        for records in _records():
+            for record in records:
+                chunk.append(record)
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def _formatted():
+        for chunk in _chunks():
+            if _format == 'records':
+                yield chunk
+            elif _format == 'frame':
+                yield _events_frame(chunk)
+            else:
+                yield _arrow_table(_events_frame(chunk))
+
+    return _formatted()
+
+def data_bounds(participant, features=None, cache=False):
+    """ Get the first and last timestamps of a participant's raw data.
+
+        Only the raw features that the given features (transitively) depend on are
+        probed, with one request of a single event for each end of each raw
+        feature; all requests are issued concurrently.
+
+        If caching is requested, the bounds are also kept in the cache index (see
+        '_cache_index') and refreshed incrementally: only the events after a known
+        last timestamp are requested, and a known first timestamp is only requested
+        again if the last one moved (older data may be synced along with new data).
+        Known bounds are probed again from scratch once they are older than
+        'CORTEX_DATA_BOUNDS_TTL' seconds (default: 86400), ex: after data was
+        deleted; 'invalidate_data_bounds' drops them right away.
+
+        Args:
+            participant (str): The Participant LAMP id.
+            features (list): The features (methods or names, ex: "hometime" or
+                "lamp.gps"). Default: all raw features.
+            cache (boolean): If True the bounds are read from and saved into the
+                cache directory.
+        Returns:
+            A dict of raw feature name (ex: "lamp.gps") to a (first, last) tuple of
+            UNIX timestamps (in ms), or None if there is no data.
+    """
+    if features is None:
+        entries = [f for f in all_features() if f['type'] == 'raw']
+    else:
+        entries = load_features([f for f in features if isinstance(f, str)])
+        entries += [f for f in __features__ if f['callable'] in features]
+    names = set()
+    for entry in entries:
+        names |= ({entry['name']} if entry['type'] == 'raw' else
+                  _raw_dependency_names(entry['dependencies']))
+    raw = {f['name']: f['callable'] for f in __features__
+           if f['type'] == 'raw' and f['name'] in names}
+
+    now = int(time.time())*1000
+    cache_dir, known = None, {}
+    if cache and os.getenv('CORTEX_CACHE_DIR') is not None:
+        cache_dir = os.path.expanduser(os.getenv('CORTEX_CACHE_DIR'))
+        ttl = float(os.getenv('CORTEX_DATA_BOUNDS_TTL', '86400')) * 1000
+        with closing(_cache_index(cache_dir)) as index:
+            known = {name: (first, last, checked)
+                     for name, first, last, checked in index.execute(
+                         "SELECT sensor, first, last, checked FROM bounds WHERE id = ?",
+                         (participant,))
+                     if checked is not None and now - checked < ttl}
+
+    def _probe(probe):
+        name, limit = probe
+        last = known[name][1] if name in known else None
+        data = raw[name](id=participant, start=last if limit > 0 and last is not None else 0,
+                         end=now, cache=False, recursive=False, attach=False,
+                         _limit=limit)['data']
+        if len(data) == 0:
+            return None
+        # device_state merges two sensors, so use the extreme of all returned events
+        return (min if limit < 0 else max)(r['timestamp'] for r in data)
+
+    probes = [(name, limit) for name in sorted(raw) for limit in (-1, 1)
+              if limit > 0 or name not in known]
+    with ThreadPoolExecutor(max_workers=max(len(probes), 1)) as pool:
+        found = dict(zip(probes, pool.map(_probe, probes)))
+        # The first timestamps are probed again if the last ones moved
+        moved = [(name, -1) for name in sorted(raw) if name in known and
+                 found[name, 1] is not None and found[name, 1] > known[name][1]]
+        found.update(zip(moved, pool.map(_probe, moved)))
+    bounds, checked = {}, {}
+    for name in sorted(raw):
+        first, last, checked[name] = known.get(name, (None, None, None))
+        if (name, -1) in found:
+            first, checked[name] = found[name, -1], now
+        if found[name, 1] is not None:
+            last = found[name, 1]
+        bounds[name] = (first, last) if first is not None and last is not None else None
+
+    if cache_dir is not None:
+        with closing(_cache_index(cache_dir)) as index, index:
+            index.executemany("INSERT OR REPLACE INTO bounds VALUES (?, ?, ?, ?, ?)",
+                              [(name, participant) + bound + (checked[name],)
+                               for name, bound in bounds.items() if bound is not None])
+            index.executemany("DELETE FROM bounds WHERE sensor = ? AND id = ?",
+                              [(name, participant)
+                               for name, bound in bounds.items() if bound is None])
+    return bounds
+
+def invalidate_data_bounds(participant=None, features=None, cache_dir=None):
+    """
+    Drops the data bounds of a participant kept in the cache (see 'data_bounds'), so
+    that they are probed again from scratch
+    :param participant (str): LAMP id to reset for, defaults to all participants (optional)
+    :param features (list): raw features to reset (ex: "lamp.gps"), defaults to all
+        features (optional)
+    :param cache_dir (str): path to cache dir, where the bounds are kept
+    """
+    cache_dir = cache_finder(cache_dir)
+    with closing(_cache_index(cache_dir)) as index, index:
+        saved = index.execute("SELECT sensor, id FROM bounds").fetchall()
+        index.executemany("DELETE FROM bounds WHERE sensor = ? AND id = ?",
+                          [(sensor, id) for sensor, id in saved
+                           if (participant is None or id == participant)
+                           and (features is None or sensor in features)])
+
+def reindex_cache(cache_dir=None):
+    """
+    Rebuilds the interval index of the cache (ex: after copying files into it)
+    :param cache_dir (str): path to cache dir, where data will be indexed
+    """
+    cache_dir = cache_finder(cache_dir)
+    with closing(_cache_index(cache_dir)) as index:
+        with index:
+            index.execute("DELETE FROM blobs")
+        _cache_index_scan(index, cache_dir)
+
 def delete_cache(id, features=None, cache_dir=None):
     """
     Deletes all cached raw features for a participant (requires LAMP-core 2021.4.7 or later)
@@ -820,11 +2441,13 @@ def delete_cache(id, features=None, cache_dir=None):
     cache_dir = cache_finder(cache_dir)
 
     #Delete all 'features' in cache_dir for participant
-    for file in [f for f in os.listdir(cache_dir) if f[-7:] == '.cortex']:  # .lamp
-        path = cache_dir + '/' + file
-        saved = dict(zip(['name', 'id', 'start', 'end'], file.split('.')[0].split('_')))
-        if saved['name'] in features and saved['id'] == id:
-            os.remove(path)
+    with closing(_cache_index(cache_dir)) as index:
+        saved = index.execute("SELECT file, sensor FROM blobs WHERE id = ?", (id,)).fetchall()
+        for file, sensor in saved:
+            if features is None or sensor in features:
+                _cache_remove(os.path.join(cache_dir, file))
+                with index:
+                    index.execute("DELETE FROM blobs WHERE file = ?", (file,))
 
 def export_cache(cache_dir=None, export_dir=None):
     """
@@ -918,8 +2541,9 @@ def _main():
                              + ' environment variable LAMP_SERVER_ADDRESS)')
     subparsers = superparser.add_subparsers(title="features", dest='_feature', required=True,
                                             description="Available features for processing")
-    funcs = {f['callable'].__name__: f['callable'] for f in all_features()}
-    for name, func in funcs.items():
+    # Build the sub-parsers from the static manifest so that only the
+    # selected feature's module (and its dependencies) is imported.
+    for name in dict.fromkeys(f['callable'] for f in _MANIFEST):
 
         # Add a sub-parser for this feature with the required (id, start, end).
         parser = subparsers.add_parser(name)
@@ -932,15 +2556,6 @@ def _main():
         parser.add_argument("--end", dest='end', type=int, required=True,
                             help='time window end in UTC epoch milliseconds')
 
-        # Add feature-specific parameters and mark the parameter as required
-        # if no default value is provided. Use the function docstring to get
-        # the parameter's description.
-        opt_idx = len(getfullargspec(func)[0]) - len(getfullargspec(func)[3] or ())
-        for idx, param in enumerate(getfullargspec(func)[0]):
-            desc = 'missing parameter description'
-            parser.add_argument(f"--{param}", dest=param, required=idx < opt_idx,
-                                help=desc + (' (required)' if idx < opt_idx else ''))
-
     # Dynamically execute the specific feature function with the parsed
     # arguments (removing all '_'-prefixed ones).
     kwargs = vars(superparser.parse_args())
@@ -951,8 +2566,9 @@ def _main():
         os.environ['LAMP_SECRET_KEY'] = kwargs.pop('_secret_key')
     if kwargs['_server_address'] is not None:
         os.environ['LAMP_SERVER_ADDRESS'] = kwargs.pop('_server_address')
-    _result = funcs[kwargs['_feature']](**{k: v for k, v in kwargs.items()
-                                           if not k.startswith('_')})
+    func = load_features([kwargs['_feature']])[0]['callable']
+    _result = func(**{k: v for k, v in kwargs.items()
+                        if not k.startswith('_')})
 
     # Format and print the result to console (use bash redirection to output to a file).
     if _format == 'csv':
@@ -1,8 +1,7 @@
 """ Module for computing screen active bouts from screen state """
 import numpy as np
-import pandas as pd
 
-from ..feature_types import primary_feature
+from ..feature_types import primary_feature, raw_arrays
 from ..raw.accelerometer import accelerometer
 
 @primary_feature(
@@ -44,29 +43,24 @@ def acc_jerk(threshold=500,
               'end': 1625171685532.0,
               'acc_jerk': 0.051706493081616275}]
     """
-    _acc = accelerometer(**kwargs)['data']
-    if _acc:
+    # Memory-mapped from the cache if caching is enabled
+    _acc = raw_arrays(accelerometer, ['x', 'y', 'z'], **kwargs)
+    timestamps = _acc['timestamp']
+    if len(timestamps) > 0:
         has_raw_data = 1
-        acc_df = pd.DataFrame(_acc)[['x', 'y', 'z', 'timestamp']]
-        acc_df['timestamp_shift'] = acc_df['timestamp'].shift()
-        acc_df = acc_df[acc_df['timestamp'] != acc_df['timestamp_shift']]
-        acc_df['dt'] = (acc_df['timestamp'].shift() - acc_df['timestamp']) / 1000
-        acc_df['x_shift'] = acc_df['x'].shift()
-        acc_df['y_shift'] = acc_df['y'].shift()
-        acc_df['z_shift'] = acc_df['z'].shift()
-        acc_df = acc_df[acc_df['dt'] < (threshold / 1000)]
-        # if there are no datapoints with small enough dts then skip this computation
-        if len(acc_df) > 0:
-            x_sum = (acc_df['x_shift'] - acc_df['x']) / acc_df['dt']
-            y_sum = (acc_df['y_shift'] - acc_df['y']) / acc_df['dt']
-            z_sum = (acc_df['z_shift'] - acc_df['z']) / acc_df['dt']
-            acc_df['acc_jerk'] = np.sqrt((x_sum.pow(2) + y_sum.pow(2) + z_sum.pow(2)))
-            acc_df = acc_df.dropna()
-            acc_df = acc_df[['timestamp', 'timestamp_shift', 'acc_jerk']]
-            acc_df.columns = ['start', 'end', 'acc_jerk']
-            _ret = list(acc_df[['start', 'end', 'acc_jerk']].T.to_dict().values())
-        else:
-            _ret = []
+        # The arrays are sorted by ascending timestamp and only read by index:
+        # keep one point per timestamp (the last one), each paired with the
+        # next (more recent) point
+        kept = np.flatnonzero(np.append(timestamps[1:] != timestamps[:-1], True))
+        start, end = kept[:-1][::-1], kept[1:][::-1]
+        dt = (timestamps[end] - timestamps[start]) / 1000
+        close = dt < (threshold / 1000)
+        start, end, dt = start[close], end[close], dt[close]
+        jerk = np.sqrt(sum(((_acc[k][end] - _acc[k][start]) / dt) ** 2 for k in ['x', 'y', 'z']))
+        valid = ~np.isnan(jerk)
+        _ret = [{'start': float(_start), 'end': float(_end), 'acc_jerk': float(_jerk)}
+                for _start, _end, _jerk in zip(timestamps[start[valid]],
+                                               timestamps[end[valid]], jerk[valid])]
     else:
         has_raw_data = 0
         _ret = []
@@ -1,6 +1,5 @@
 """ Module for computing trips from gps """
 import numpy as np
-import pandas as pd
 from ..feature_types import primary_feature, log
 from ..raw.gps import gps
 
@@ -91,7 +90,7 @@ def trips(attach=True,
         return list(new.T.to_dict().values())
 
 
-    df_dist = pd.DataFrame.from_dict(list(reversed(gps(**kwargs)['data'])))
+    df_dist = gps(as_frame=True, **kwargs)['data'].iloc[::-1].reset_index(drop=True)
     if len(df_dist) == 0:
         return {'data': [], 'has_raw_data': 0}
     log.info('Labeling GPS')
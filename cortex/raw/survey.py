@@ -1,6 +1,6 @@
 """ Module for raw feature survey """
 import LAMP
-from ..feature_types import raw_feature
+from ..feature_types import raw_feature, activity_catalog, _activity_events
 
 MAX_RETURN_SIZE = 10000
 
@@ -20,6 +20,8 @@ def survey(replace_ids=True,
             cache (bool): Indicates whether to save raw data locally in cache dir
             recursive (bool): if True, continue requesting data until all data is
                     returned; else just one request
+            fetch_workers (int): The maximum number of concurrent requests
+                    (see 'cortex.feature_types._paginate').
 
         Returns:
             timestamp (int): The UTC timestamp for the steps event.
@@ -52,22 +54,11 @@ def survey(replace_ids=True,
     """
     # Grab the list of surveys and ALL ActivityEvents which are filtered locally.
     # Once the API Server supports filtering origin by an ActivitySpec, we won't need this.
-    activities = LAMP.Activity.all_by_participant(kwargs['id'])['data']
+    activities = activity_catalog(kwargs['id'])
     surveys = {x['id']: x for x in activities if x['spec'] == 'lamp.survey'}
 
-    data_next = []
-    raw = LAMP.ActivityEvent.all_by_participant(kwargs['id'],
-                                                _from=kwargs['start'],
-                                                to=kwargs['end'],
-                                                _limit=_limit)['data']
-    while (recursive and
-           (len(raw) == MAX_RETURN_SIZE or len(data_next) == MAX_RETURN_SIZE)):
-        to = raw[-1]['timestamp']
-        data_next = LAMP.ActivityEvent.all_by_participant(kwargs['id'],
-                                                _from=kwargs['start'],
-                                                to=int(to),
-                                                _limit=_limit)['data']
-        raw += data_next
+    # Survey events are served from the ActivityEvents shared by all activity features.
+    raw = _activity_events('lamp.survey', _limit=_limit, recursive=recursive, **kwargs)
 
     def remove_duplicate_activity_events(raw_data):
         # Here, we remove any duplicates from raw data
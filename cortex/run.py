@@ -1,19 +1,21 @@
 """ Module for getting features from cortex """
 import os
 import sys
+import glob
+import json
 import logging
+import sqlite3
+from contextlib import closing
 
 import time
-import inspect
 import datetime
+from concurrent.futures import ProcessPoolExecutor
 
 import pandas as pd
 import numpy as np
 
-import cortex.raw as raw
-import cortex.primary as primary
-import cortex.secondary as secondary
-from cortex.feature_types import all_features, log
+from cortex.feature_types import (load_features, feature_plan, shared_fetches, primary_memo,
+                                  data_bounds, log)
 
 from cortex.utils.useful_functions import generate_ids, shift_time
 
@@ -27,13 +29,15 @@ def now():
     return int(time.time())*1000
 
 MS_PER_DAY = 86400000 # (1000 ms * 60 sec * 60 min * 24 hr * 1 day)
+CHECKPOINT_INDEX = '.cortex_run.sqlite'
 
 
 
 
 def run(id_or_set, features=[], feature_params={}, start=None, end=None,
         resolution=MS_PER_DAY, path_to_save="", run_part_and_feats="",
-        cache=False, print_logs=False):
+        cache=False, print_logs=False, workers=1, checkpoint_dir=None,
+        output_dataset=None):
     """ Function to get features from cortex.
 
         Args:
@@ -53,8 +57,26 @@ def run(id_or_set, features=[], feature_params={}, start=None, end=None,
                 "participant" (participant id) and "feature"
             cache (boolean, default: False): whether or not to cache raw data
             print_logs (boolean, default: False): whether to set the logging to a higher level
+            workers (int, default: 1): the number of processes computing
+                participants concurrently. Results are merged in the same
+                order as when run serially. With workers > 1, an error in one
+                (participant, feature) pair is logged and that pair is skipped,
+                rather than failing the whole run
+            checkpoint_dir (str, default: None): a directory to checkpoint the run
+                in. Each completed (participant, feature) pair is saved there and
+                recorded in a manifest, so that running again with the same
+                arguments (including cache and the outputs) and checkpoint_dir
+                resumes the run, skipping the pairs already completed. An error
+                in one pair is logged and recorded in the manifest (and the pair
+                retried when resuming), rather than failing the whole run
+            output_dataset (str, default: None): a directory to also write the
+                results into, as a Parquet dataset partitioned by feature and
+                participant (requires pyarrow, see the 'arrow' extra). Running
+                again (ex: for a later window) adds to the dataset; see
+                'read_dataset' to read it back
         Returns:
-            A dictionary with the features.
+            A dictionary with the features, or None if no participant has any
+            raw data.
 
         Example:
             run(['U111111','abcdefg'],
@@ -73,6 +95,12 @@ def run(id_or_set, features=[], feature_params={}, start=None, end=None,
             If both features and run_part_and_features are specified then
             run_part_and_features will take precendence and features will be
             set to [].
+            The features of a participant are computed together from their
+            dependencies (see 'get_features_for_participant'): each raw data
+            series and each primary feature window is only fetched / computed
+            once, whichever features use it. The primary feature memo counters
+            of the run can be read with 'primary_memo_stats' afterwards.
+            Participants without raw data for a feature are skipped.
     """
     if not print_logs:
         log.setLevel(logging.WARNING)
@@ -93,53 +121,404 @@ def run(id_or_set, features=[], feature_params={}, start=None, end=None,
         features_by_participant = [[x] for x in features_by_participant]
     else:
         features_by_participant = [features] * len(participants)
-    func_list = {f['callable'].__name__: f for f in all_features()}
-
-    _results = {}
-    curr_val = 0
-    for i, participant in enumerate(participants):
-        for f in features_by_participant[i]:
-            # Make sure we aren't calling non-existent feature functions.
-            if f not in func_list.keys():
+    # Only import the modules of the requested features.
+    func_list = {f['callable'].__name__: f for f in
+                 load_features({f for feats in features_by_participant for f in feats})}
+
+    # Pairs completed by a previous run in the checkpoint directory
+    completed = {}
+    if checkpoint_dir is not None:
+        completed = _checkpoint_resume(checkpoint_dir, {'id_or_set': id_or_set,
+                                                        'features': features,
+                                                        'feature_params': feature_params,
+                                                        'start': start,
+                                                        'end': end,
+                                                        'resolution': resolution,
+                                                        'run_part_and_feats': run_part_and_feats,
+                                                        'cache': cache,
+                                                        'path_to_save': path_to_save,
+                                                        'output_dataset': output_dataset})
+
+    with primary_memo() as memo_stats:
+        # Fan the participants out to worker processes; their results are still
+        # consumed below in order.
+        pool, futures = None, {}
+        if workers is not None and int(workers) > 1:
+            pool = ProcessPoolExecutor(max_workers=int(workers))
+            for i, participant in enumerate(participants):
+                todo = [f for f in features_by_participant[i]
+                        if f in func_list and (participant, f) not in completed]
+                if todo:
+                    futures[i] = pool.submit(_participant_task, participant, todo,
+                                             feature_params, start, end, resolution, cache,
+                                             print_logs)
+
+        # Collect each feature's per-participant frames, concatenated once at the end
+        _frames = {}
+        curr_val = 0
+        has_data = False
+        for i, participant in enumerate(participants):
+            todo = [f for f in features_by_participant[i]
+                    if f in func_list and (participant, f) not in completed]
+            results, errors = {}, {}
+            if pool is not None and i in futures:
+                try:
+                    results, stats, errors = futures[i].result()
+                    for k, v in stats.items():
+                        memo_stats[k] += v
+                except Exception as e: # pylint: disable=broad-except
+                    log.error("Failed to compute %s for participant %s: %r", todo, participant, e)
+                    errors = {f: repr(e) for f in todo}
+            elif todo:
+                try:
+                    results = get_features_for_participant(
+                        participant, todo, feature_params, start, end, resolution, cache,
+                        errors=errors if checkpoint_dir is not None else None)
+                except Exception as e: # pylint: disable=broad-except
+                    if checkpoint_dir is None:
+                        raise
+                    log.error("Failed to compute %s for participant %s: %r", todo, participant, e)
+                    errors = {f: repr(e) for f in todo}
+            for f in features_by_participant[i]:
+                # Make sure we aren't calling non-existent feature functions.
+                if f not in func_list.keys():
+                    continue
+                if f not in _frames.keys():
+                    _frames[f] = []
+
+                if (participant, f) in completed:
+                    status, file = completed[participant, f]
+                    has_data = has_data or status != 'no_data'
+                    _res2 = pd.DataFrame()
+                    if file is not None:
+                        _res2 = pd.read_pickle(os.path.join(checkpoint_dir, file))
+                elif f in errors:
+                    _res2 = pd.DataFrame()
+                    if checkpoint_dir is not None:
+                        _checkpoint_commit(checkpoint_dir, participant, f, 'failed',
+                                           error=errors[f])
+                elif results[f] is None:
+                    log.info("Participant %s has no passive data for %s. Skipping.",
+                             participant, f)
+                    _res2 = pd.DataFrame()
+                    if checkpoint_dir is not None:
+                        _checkpoint_commit(checkpoint_dir, participant, f, 'no_data')
+                else:
+                    has_data = True
+                    _res2 = pd.DataFrame.from_dict(results[f]['data'])
+                    if _res2.shape[0] > 0:
+                        _res2.insert(0, 'id', participant) # prepend 'id' column
+                        if func_list[f]['type'] == 'primary':
+                            _res2.timestamp = _res2.start
+
+                        # Save if there is a file path specified
+                        if path_to_save != "":
+                            log.info("Saving output locally..")
+                            _res2.to_pickle(os.path.join(path_to_save,
+                                                         participant + "_" + f + ".pkl"))
+                        if output_dataset is not None:
+                            _dataset_write(output_dataset, f, participant, _res2)
+                    if checkpoint_dir is not None:
+                        _checkpoint_commit(checkpoint_dir, participant, f, 'done', _res2)
+                if _res2.shape[0] > 0:
+                    # If no data exists, don't bother appending the df.
+                    _res2['datetime'] = pd.to_datetime(_res2.timestamp, unit='ms')
+                    _frames[f].append(_res2)
+                if not print_logs:
+                    sys.stdout.write('\r')
+                    j = (curr_val + 1) / (len(participants) * len(features))
+                    sys.stdout.write("[%-20s] %d%%" % ('='*int(20*j), 100*j))
+                    sys.stdout.flush()
+                    curr_val += 1
+        if pool is not None:
+            pool.shutdown()
+        log.info("Primary feature memo: %(hits)d hits, %(misses)d misses, "
+                 "%(evictions)d evictions", memo_stats)
+
+    if participants and not has_data:
+        log.info("No participant has passive data. Returning None.")
+        return None
+    return {f: pd.concat(frames) if frames else pd.DataFrame()
+            for f, frames in _frames.items()}
+
+
+def _participant_task(participant, features, feature_params, start, end, resolution, cache,
+                      print_logs):
+    """ Compute the features of a participant in a worker process of 'run'. """
+    if not print_logs:
+        log.setLevel(logging.WARNING)
+    errors = {}
+    # A forked worker inherits the open memo of 'run': each task opens its own, so
+    # that its counters (summed by 'run') and results only cover this participant.
+    with primary_memo(fresh=True) as stats:
+        results = get_features_for_participant(participant, features, feature_params, start,
+                                               end, resolution, cache, errors=errors)
+        return results, dict(stats), errors
+
+
+def _checkpoint_index(checkpoint_dir):
+    """ Open (creating it if needed) the manifest of a checkpointed run.
+
+        Args:
+            checkpoint_dir: the checkpoint directory (see 'run')
+        Returns:
+            An sqlite3 connection to the manifest, holding the arguments of the run
+            and the status of each completed (participant, feature) pair.
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    index = sqlite3.connect(os.path.join(checkpoint_dir, CHECKPOINT_INDEX))
+    with index:
+        index.execute("CREATE TABLE IF NOT EXISTS run (args TEXT)")
+        index.execute("CREATE TABLE IF NOT EXISTS units (participant TEXT, feature TEXT, "
+                      + "status TEXT, file TEXT, error TEXT, PRIMARY KEY (participant, feature))")
+    return index
+
+def _checkpoint_resume(checkpoint_dir, args):
+    """ Start, or resume, a checkpointed run.
+
+        Args:
+            checkpoint_dir: the checkpoint directory (see 'run')
+            args: the arguments of the run, which must match those of the run
+                already checkpointed in checkpoint_dir, if any
+        Returns:
+            A dictionary of the completed (participant, feature) pairs to their
+            (status, file): 'done' with the file of their data (None if no data)
+            or 'no_data' (no raw data). Failed pairs are not completed.
+    """
+    args = json.dumps(args, sort_keys=True, default=repr)
+    with closing(_checkpoint_index(checkpoint_dir)) as index, index:
+        saved = index.execute("SELECT args FROM run").fetchone()
+        if saved is None:
+            index.execute("INSERT INTO run VALUES (?)", (args,))
+        elif saved[0] != args:
+            raise Exception(f"The checkpoint directory ({checkpoint_dir}) holds a run with "
+                            + "different arguments. Please use another directory.")
+        # (pairs whose data file was removed are computed again)
+        return {(participant, feature): (status, file)
+                for participant, feature, status, file in index.execute(
+                    "SELECT participant, feature, status, file FROM units "
+                    + "WHERE status != 'failed'")
+                if file is None or os.path.exists(os.path.join(checkpoint_dir, file))}
+
+def _checkpoint_commit(checkpoint_dir, participant, feature, status, frame=None, error=None):
+    """ Record a (participant, feature) pair in the manifest of a checkpointed run.
+
+        The data is written to a temporary file renamed once complete. The pair is
+        recorded last, in a transaction checking that its file exists, so that an
+        interrupted run never records partial or missing data (a file left without
+        its record is overwritten when the pair is computed again).
+
+        Args:
+            checkpoint_dir: the checkpoint directory (see 'run')
+            participant: the participant id
+            feature: the name of the feature
+            status: 'done', 'no_data' or 'failed'
+            frame: the data of the pair, if done
+            error: the error message, if failed
+    """
+    file = None
+    if frame is not None and frame.shape[0] > 0:
+        file = participant + "_" + feature + ".pkl"
+        frame.to_pickle(os.path.join(checkpoint_dir, file + ".tmp"))
+        os.replace(os.path.join(checkpoint_dir, file + ".tmp"),
+                   os.path.join(checkpoint_dir, file))
+    with closing(_checkpoint_index(checkpoint_dir)) as index, index:
+        if file is not None and not os.path.exists(os.path.join(checkpoint_dir, file)):
+            raise Exception(f"The checkpoint file {file} of {participant} / {feature} is "
+                            + "missing. It could not be recorded.")
+        index.execute("INSERT OR REPLACE INTO units VALUES (?, ?, ?, ?, ?)",
+                      (participant, feature, status, file, error))
+
+
+def _dataset_write(path, feature, participant, frame):
+    """ Write the results of a feature for a participant into a Parquet dataset.
+
+        The rows are written to their feature=<feature>/id=<participant> partition
+        as a file named after their first and last timestamps. The rows of other
+        files of the partition (ex: from an earlier run over an overlapping
+        window) with the same timestamps are replaced by the new ones: these
+        files are rewritten without them (or removed if nothing is left), so
+        that rows are not duplicated.
+
+        Args:
+            path: the dataset directory (see 'run')
+            feature: the name of the feature
+            participant: the participant id
+            frame: the results, with 'timestamp' (or 'start') in ms
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("pyarrow is not installed; cannot write results as a Parquet"
+                          + " dataset! Install it with `pip install LAMP-cortex[arrow]`.")
+    frame = frame.drop(columns=['id', 'datetime'], errors='ignore')
+    if 'timestamp' not in frame.columns:
+        # (primary features are timestamped by their start)
+        frame.insert(0, 'timestamp', frame['start'])
+    frame['timestamp'] = frame['timestamp'].astype(np.int64)
+    partition = os.path.join(path, "feature=" + feature, "id=" + participant)
+    os.makedirs(partition, exist_ok=True)
+    first, last = frame['timestamp'].min(), frame['timestamp'].max()
+    file = os.path.join(partition, f"{first}_{last}.parquet")
+    pyarrow.parquet.write_table(pyarrow.Table.from_pandas(frame, preserve_index=False),
+                                file + ".tmp")
+    os.replace(file + ".tmp", file)
+    timestamps = frame['timestamp'].to_numpy()
+    for old in sorted(os.listdir(partition)):
+        bounds = old[:-len(".parquet")].split("_")
+        if (not old.endswith(".parquet") or old == os.path.basename(file) or len(bounds) != 2
+                or not all(b.isdigit() for b in bounds)
+                or int(bounds[0]) > last or int(bounds[1]) < first):
+            continue
+        old = os.path.join(partition, old)
+        table = pyarrow.parquet.read_table(old)
+        old_timestamps = table.column('timestamp').to_numpy()
+        kept = ~np.isin(old_timestamps, timestamps)
+        if kept.all():
+            continue
+        if kept.any():
+            # (the remaining rows never share timestamps with another file)
+            rest = os.path.join(partition, f"{old_timestamps[kept].min()}_"
+                                + f"{old_timestamps[kept].max()}.parquet")
+            pyarrow.parquet.write_table(table.filter(pyarrow.array(kept)), rest + ".tmp")
+            os.replace(rest + ".tmp", rest)
+            if rest == old:
                 continue
-            if f not in _results.keys():
-                _results[f] = pd.DataFrame()
-
-            params_f = {}
-            if f in feature_params:
-                params_f = feature_params[f]
-
-            _res = get_feature_for_participant(participant, f, params_f, start,
-                                               end, resolution, cache)
-
-            if _res is None:
-                log.info("Participant has no passive data. Returning None.")
-                return None
-            _res2 = pd.DataFrame.from_dict(_res['data'])
-            if _res2.shape[0] > 0:
-                # If no data exists, don't bother appending the df.
-                _res2.insert(0, 'id', participant) # prepend 'id' column
-                if hasattr(primary, f):
-                    _res2.timestamp = _res2.start
-                _results[f] = pd.concat([_results[f], _res2])
-
-                # Save if there is a file path specified
-                if path_to_save != "":
-                    log.info("Saving output locally..")
-                    _results[f].to_pickle(os.path.join(path_to_save,
-                                            participant + "_" + f + ".pkl"))
-            if not print_logs:
-                sys.stdout.write('\r')
-                j = (curr_val + 1) / (len(participants) * len(features))
-                sys.stdout.write("[%-20s] %d%%" % ('='*int(20*j), 100*j))
-                sys.stdout.flush()
-                curr_val += 1
-
-    for feat in features:
-        if not _results[feat].empty:
-            _results[feat]['datetime'] = pd.to_datetime(_res2.timestamp, unit='ms')
-
-    return _results
+        os.remove(old)
+
+def read_dataset(path, features=None, participants=None, start=None, end=None):
+    """ Read results written by 'run' into a Parquet dataset.
+
+        Only the partitions of the requested features and participants are read.
+
+        Args:
+            path: the dataset directory (see 'run')
+            features (list, default: None): the names of the features to read;
+                if None, all features in the dataset are read
+            participants (list, default: None): the participant ids to read;
+                if None, all participants in the dataset are read
+            start (int, default: None): if given, only read the rows with
+                timestamps (in ms) from start onwards
+            end (int, default: None): if given, only read the rows with
+                timestamps (in ms) up to end
+        Returns:
+            A dictionary of each feature to a DataFrame of its results, like
+            those returned by 'run', with a categorical 'id' column and int64
+            'timestamp' column (in ms).
+    """
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("pyarrow is not installed; cannot read a Parquet dataset!"
+                          + " Install it with `pip install LAMP-cortex[arrow]`.")
+    if features is None:
+        features = sorted(d.split("=", 1)[1] for d in os.listdir(path)
+                          if d.startswith("feature="))
+    filters = ([('timestamp', '>=', start)] if start is not None else []) + \
+              ([('timestamp', '<=', end)] if end is not None else [])
+    ret = {}
+    for f in features:
+        if participants is None:
+            partitions = sorted(glob.glob(os.path.join(glob.escape(path),
+                                                       "feature=" + glob.escape(f), "id=*")))
+        else:
+            partitions = [os.path.join(path, "feature=" + f, "id=" + participant)
+                          for participant in participants]
+        frames = []
+        for partition in partitions:
+            for file in sorted(glob.glob(os.path.join(glob.escape(partition), "*.parquet"))):
+                frame = pyarrow.parquet.read_table(file, filters=filters or None).to_pandas()
+                if frame.shape[0] > 0:
+                    frame.insert(0, 'id', os.path.basename(partition).split("=", 1)[1])
+                    frames.append(frame)
+        ret[f] = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if frames:
+            ret[f]['id'] = ret[f]['id'].astype('category')
+            ret[f]['datetime'] = pd.to_datetime(ret[f].timestamp, unit='ms')
+    return ret
+
+
+def get_features_for_participant(participant, features, feature_params, start, end,
+                                 resolution, cache, errors=None):
+    """ Helper function to compute the data for several features for an individual
+        participant.
+
+        The features are computed in the order of their dependency graph (see
+        'feature_plan'), sharing the raw data (see 'shared_fetches') and primary
+        feature results (see 'primary_memo') they have in common.
+
+        Args:
+            participant: the participant id
+            features: the names of the features
+            feature_params: a dictionary of optional parameters for each feature
+            start: the start in ms
+            end: the end in ms
+            resolution: the resolution in ms (for secondary features)
+            cache: whether or not to cache the data
+            errors (dict, default: None): if given, an error computing a feature
+                is logged and its message recorded in errors (by feature name),
+                and the feature has no data, rather than raised
+        Returns:
+            A dictionary of the data from each feature for that participant from
+            cortex (None for the features without any raw data)
+    """
+    plan = feature_plan(features)
+    bounds = None
+    if start is None or end is None:
+        bounds = data_bounds(participant, features, cache=cache)
+
+    # Each feature's window only depends on its own raw data
+    windows = {}
+    for f in features:
+        f_bounds = None
+        if bounds is not None:
+            f_bounds = {e['name']: bounds.get(e['name']) for e in feature_plan([f])
+                        if e['type'] == 'raw'}
+        windows[f] = (get_first_last_datapoint(participant, start, resolution, start = 1,
+                                               bounds=f_bounds),
+                      get_first_last_datapoint(participant, end, resolution, start = 0,
+                                               bounds=f_bounds))
+        if windows[f][0] is None:
+            log.info("Participant %s has no data. Returning 'None' for %s.", participant, f)
+    windows = {f: w for f, w in windows.items() if w[0] is not None}
+
+    results = {f: None for f in features}
+    if len(windows) == 0:
+        return results
+    with primary_memo(), shared_fetches(participant, plan,
+                                        min(w[0] for w in windows.values()),
+                                        max(w[1] for w in windows.values())):
+        for entry in plan:
+            f = entry['callable'].__name__
+            if f not in windows:
+                continue
+            try:
+                results[f] = _compute_feature(entry, participant, feature_params.get(f, {}),
+                                              *windows[f], resolution, cache)
+            except Exception as e: # pylint: disable=broad-except
+                if errors is None:
+                    raise
+                log.error("Failed to compute %s for participant %s: %r", f, participant, e)
+                errors[f] = repr(e)
+                results[f] = {'data': []}
+    return results
+
+
+def _compute_feature(entry, participant, feature_params, start, end, resolution, cache):
+    """ Call a registered feature for a participant and window. """
+    if entry['type'] == 'secondary':
+        return entry['callable'](id=participant,
+                                 start=start,
+                                 end=end,
+                                 resolution=resolution,
+                                 cache=cache,
+                                 **feature_params)
+    return entry['callable'](id=participant,
+                             start=start,
+                             end=end,
+                             cache=cache,
+                             **feature_params)
 
 
 def get_feature_for_participant(participant, feature, feature_params, start, end,
@@ -158,30 +537,11 @@ def get_feature_for_participant(participant, feature, feature_params, start, end
         Returns:
             The data from the feature for that participant from cortex
     """
-    func_list = {f['callable'].__name__: f for f in all_features()}
-    start = get_first_last_datapoint(participant, start, resolution, start = 1)
-    end = get_first_last_datapoint(participant, end, resolution, start = 0)
-    if start is None:
-        log.info("Participant %s has no data. Returning 'None' for all features.", participant)
-        return None
-    if hasattr(secondary, feature):
-        _res = func_list[feature]['callable'](
-                 id=participant,
-                 start=start,
-                 end=end,
-                 resolution=resolution,
-                 cache=cache,
-                 **feature_params)
-    else:
-        _res = func_list[feature]['callable'](
-                id=participant,
-                start=start,
-                end=end,
-                cache=cache,
-                **feature_params)
-    return _res
-
-def get_first_last_datapoint(participant, original_time, resolution, start = 1):
+    return get_features_for_participant(participant, [feature], {feature: feature_params},
+                                        start, end, resolution, cache)[feature]
+
+def get_first_last_datapoint(participant, original_time, resolution, start = 1,
+                             features=None, cache=False, bounds=None):
     """ Get the first or last raw data timestamp for the participant.
 
         Args:
@@ -189,6 +549,11 @@ def get_first_last_datapoint(participant, original_time, resolution, start = 1):
             original_time: the start / end time
             resolution: the resolution
             start (boolean, default: 1): whether it is a start or end time
+            features (list, default: None): only consider the raw data these
+                features depend on; if None, all raw features are considered
+            cache (boolean, default: False): whether or not to keep the data
+                bounds in the cache directory (see 'data_bounds')
+            bounds (dict, default: None): the result of 'data_bounds', if already known
         Returns:
             original_time if it is not None
             None if there is no raw data
@@ -198,24 +563,9 @@ def get_first_last_datapoint(participant, original_time, resolution, start = 1):
     """
     if original_time is not None:
         return original_time
-    limit_value = 1
-    if start:
-        limit_value = -1
-    times = [getattr(mod, mod_name)(id=participant,
-                                        start=0,
-                                        end=int(time.time())*1000,
-                                        cache=False,
-                                        recursive=False,
-                                        attach=False,
-                                        _limit=limit_value)['data'][0]['timestamp']
-                 for mod_name, mod in inspect.getmembers(raw, inspect.ismodule)
-                 if len(getattr(mod, mod_name)(id=participant,
-                                               start=0,
-                                               end=int(time.time())*1000,
-                                               cache=False,
-                                               recursive=False,
-                                               attach=False,
-                                               _limit=limit_value)['data']) > 0]
+    if bounds is None:
+        bounds = data_bounds(participant, features, cache=cache)
+    times = [bound[0] if start else bound[1] for bound in bounds.values() if bound is not None]
     if len(times) == 0: # no data: return none
         return None
     if start:
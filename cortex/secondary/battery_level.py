@@ -1,8 +1,9 @@
 """ Module for computing battery level from device state """
 import datetime
 import statistics
+import numpy as np
 
-from ..feature_types import secondary_feature
+from ..feature_types import secondary_feature, secondary_kernel, bin_events
 from ..raw.device_state import device_state
 
 @secondary_feature(
@@ -34,3 +35,15 @@ def battery_level(**kwargs):
         battery_levels = [state['battery_level'] for state in _device_states]
         battery_level = statistics.mean(battery_levels)
     return {'timestamp': kwargs['start'], 'value': battery_level}
+
+@secondary_kernel(battery_level, raw=device_state)
+def _battery_level_batch(data, edges, **kwargs):
+    """Batch kernel for battery_level (see 'cortex.feature_types.secondary_kernel')."""
+    n_bins = len(edges) - 1
+    if len(data) == 0:
+        return [None] * n_bins
+    rows, bins = bin_events(data['timestamp'].to_numpy(), edges)
+    counts = np.bincount(bins, minlength=n_bins)
+    sums = np.bincount(bins, weights=data['battery_level'].to_numpy(dtype=float)[rows],
+                       minlength=n_bins)
+    return np.where(counts > 0, sums / np.maximum(counts, 1), None)
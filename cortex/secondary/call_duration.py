@@ -1,6 +1,6 @@
 """ Module to compute call duration from raw features Telephony and Apple SensorKit """
 import numpy as np
-from ..feature_types import secondary_feature, log
+from ..feature_types import secondary_feature, secondary_kernel, bin_events, log
 from ..raw.telephony import telephony
 from ..raw.phone_usage import phone_usage
 
@@ -61,10 +61,10 @@ def call_duration(sensor='Telephony', call_direction="all", **kwargs):
             duration = None
 
         elif call_direction == "all":
-            duration = np.sum(call['duration'] for call in _calls)
+            duration = sum(call['duration'] for call in _calls)
 
         elif call_direction in ("incoming", "outgoing"):
-            duration = np.sum(call['duration'] for call in _calls
+            duration = sum(call['duration'] for call in _calls
                               if call['type'] == call_direction)
         else:
             duration = None
@@ -81,9 +81,51 @@ def call_duration(sensor='Telephony', call_direction="all", **kwargs):
         if len(_calls) == 0:
             duration = None
         else:
-            duration = np.sum(call['totalPhoneCallDuration'] for call in _calls)
+            duration = sum(call['totalPhoneCallDuration'] for call in _calls)
 
         return {'timestamp': kwargs['start'], 'value': duration}
     else:
         raise Exception(f"{sensor} is not a proper sensor value. "
-                            + "Must be SensorKit or Telephony")
\ No newline at end of file
+                            + "Must be SensorKit or Telephony")
+
+@secondary_kernel(call_duration, raw=telephony, when={'sensor': 'Telephony'})
+def _call_duration_telephony_batch(data, edges, call_direction="all", **kwargs):
+    """Batch kernel for call_duration from Telephony
+        (see 'cortex.feature_types.secondary_kernel')."""
+    n_bins = len(edges) - 1
+    incoming = kwargs.get('incoming')
+    if incoming is not None:
+        call_direction = "incoming" if incoming is True else "outgoing"
+    if len(data) == 0:
+        return [None] * n_bins
+    if call_direction not in ("all", "incoming", "outgoing"):
+        log.info(""" %s was passed but is not an acceptable argument.
+        Acceptable arguments include 'all','incoming', or 'outgoing'" """,
+                 call_direction)
+        return [None] * n_bins
+
+    rows, bins = bin_events(data['timestamp'].to_numpy(), edges)
+    durations = data['duration'].to_numpy()
+    if call_direction != "all":
+        durations = np.where(data['type'].to_numpy() == call_direction, durations, 0)
+    counts = np.bincount(bins, minlength=n_bins)
+    sums = np.bincount(bins, weights=durations[rows], minlength=n_bins)
+    if np.issubdtype(durations.dtype, np.integer):
+        sums = sums.astype(np.int64)
+    return np.where(counts > 0, sums, None)
+
+
+@secondary_kernel(call_duration, raw=phone_usage, when={'sensor': 'SensorKit'})
+def _call_duration_sensorkit_batch(data, edges, **kwargs):
+    """Batch kernel for call_duration from SensorKit
+        (see 'cortex.feature_types.secondary_kernel')."""
+    n_bins = len(edges) - 1
+    if len(data) == 0:
+        return [None] * n_bins
+    rows, bins = bin_events(data['timestamp'].to_numpy(), edges)
+    durations = data['totalPhoneCallDuration'].to_numpy()
+    counts = np.bincount(bins, minlength=n_bins)
+    sums = np.bincount(bins, weights=durations[rows], minlength=n_bins)
+    if np.issubdtype(durations.dtype, np.integer):
+        sums = sums.astype(np.int64)
+    return np.where(counts > 0, sums, None)
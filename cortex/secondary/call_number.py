@@ -1,6 +1,6 @@
 """ Module for call_number from raw feature calls """
 import numpy as np
-from ..feature_types import secondary_feature, log
+from ..feature_types import secondary_feature, secondary_kernel, bin_events, log
 from ..raw.telephony import telephony
 from ..raw.phone_usage import phone_usage
 
@@ -68,8 +68,8 @@ def call_number(sensor='Telephony', call_direction="all", **kwargs):
     elif sensor == 'SensorKit':
         _calls = phone_usage(**kwargs)['data']
 
-        incoming_call_count = np.sum(call['totalIncomingCalls'] for call in _calls)
-        outgoing_call_count = np.sum(call['totalOutgoingCalls'] for call in _calls)
+        incoming_call_count = sum(call['totalIncomingCalls'] for call in _calls)
+        outgoing_call_count = sum(call['totalOutgoingCalls'] for call in _calls)
 
         if len(_calls) == 0:
             number = None
@@ -91,4 +91,57 @@ def call_number(sensor='Telephony', call_direction="all", **kwargs):
         return {'timestamp': kwargs['start'], 'value': number}
     else:
         raise Exception(f"{sensor} is not a proper sensor value. "
-                            + "Must be SensorKit or Telephony")
\ No newline at end of file
+                            + "Must be SensorKit or Telephony")
+
+@secondary_kernel(call_number, raw=telephony, when={'sensor': 'Telephony'})
+def _call_number_telephony_batch(data, edges, call_direction="all", **kwargs):
+    """Batch kernel for call_number from Telephony
+        (see 'cortex.feature_types.secondary_kernel')."""
+    n_bins = len(edges) - 1
+    incoming = kwargs.get('incoming')
+    if incoming is not None:
+        call_direction = "incoming" if incoming is True else "outgoing"
+    if len(data) == 0:
+        return [None] * n_bins
+
+    rows, bins = bin_events(data['timestamp'].to_numpy(), edges)
+    counts = np.bincount(bins, minlength=n_bins)
+    if call_direction == "all":
+        numbers = counts
+    elif call_direction in ("incoming", "outgoing"):
+        matches = data['type'].to_numpy()[rows] == call_direction
+        numbers = np.bincount(bins[matches], minlength=n_bins)
+    elif counts.any():
+        raise Exception(f"{call_direction} is not a proper argument. "
+                        + "Must be incoming, outgoing, or all")
+    else:
+        numbers = counts
+    return np.where(counts > 0, numbers, None)
+
+
+@secondary_kernel(call_number, raw=phone_usage, when={'sensor': 'SensorKit'})
+def _call_number_sensorkit_batch(data, edges, call_direction="all", **kwargs):
+    """Batch kernel for call_number from SensorKit
+        (see 'cortex.feature_types.secondary_kernel')."""
+    n_bins = len(edges) - 1
+    if len(data) == 0:
+        return [None] * n_bins
+
+    rows, bins = bin_events(data['timestamp'].to_numpy(), edges)
+    counts = np.bincount(bins, minlength=n_bins)
+    if call_direction == "all":
+        calls = (data['totalIncomingCalls'].to_numpy()
+                 + data['totalOutgoingCalls'].to_numpy())
+    elif call_direction == "incoming":
+        calls = data['totalIncomingCalls'].to_numpy()
+    elif call_direction == "outgoing":
+        calls = data['totalOutgoingCalls'].to_numpy()
+    elif counts.any():
+        raise Exception(f"{call_direction} is not a proper argument. "
+                        + "Must be incoming, outgoing, or all")
+    else:
+        return [None] * n_bins
+    numbers = np.bincount(bins, weights=calls[rows], minlength=n_bins)
+    if np.issubdtype(calls.dtype, np.integer):
+        numbers = numbers.astype(np.int64)
+    return np.where(counts > 0, numbers, None)
@@ -1,10 +1,8 @@
 """ Module to compute the data quality from raw data """
-import os
-import pandas as pd
 import numpy as np
 
 import LAMP
-from ..feature_types import secondary_feature, log
+from ..feature_types import secondary_feature, iter_pages, log
 from ..raw.accelerometer import accelerometer
 from ..raw.gps import gps
 
@@ -33,8 +31,6 @@ def data_quality(feature, bin_size=-1, **kwargs):
             value (float): The percent of the time that there was at least one
                     data point in each time window of size "bin_size".
     """
-    LAMP.connect(os.getenv('LAMP_ACCESS_KEY'), os.getenv('LAMP_SECRET_KEY'),
-             os.getenv('LAMP_SERVER_ADDRESS', 'api.lamp.digital'))
     # The threshold where it becomes more expensive to query the API
     # than to get the data
     threshold = 150
@@ -60,15 +56,13 @@ def data_quality(feature, bin_size=-1, **kwargs):
                                                _limit=1)['data']) == 0:
         return {'timestamp':kwargs['start'], 'value': 0}
     if number_of_bins > threshold:
-        if feature == "accelerometer":
-            _data = accelerometer(**kwargs)['data']
-        else:
-            _data = gps(**kwargs)['data']
-
-        _data_quality = _get_quality(pd.DataFrame(_data)[["timestamp"]],
-                                bin_width,
-                                kwargs["start"],
-                                kwargs["end"])
+        # Stream the timestamps, marking the bins with one or more data points
+        occupied = np.zeros(number_of_bins, dtype=bool)
+        for chunk in iter_pages(accelerometer if feature == "accelerometer" else gps, **kwargs):
+            bins = (np.array([r['timestamp'] for r in chunk], dtype=np.int64)
+                    - kwargs["start"]) // bin_width
+            occupied[bins[(bins >= 0) & (bins < number_of_bins)]] = True
+        _data_quality = int(occupied.sum()) / ((kwargs["end"] - kwargs["start"]) / bin_width)
     else:
         count = 0
         total_bins = (kwargs["end"] - kwargs["start"]) / bin_width
@@ -80,21 +74,3 @@ def data_quality(feature, bin_size=-1, **kwargs):
         _data_quality = count / total_bins
 
     return {'timestamp':kwargs['start'], 'value': _data_quality}
-
-def _get_quality(_data, bin_size, start, end):
-    """ Returns the data quality (percent of bins with one or more data points).
-        Args:
-            _data - the timestamps
-            bin_size - the size of the bins in ms
-            start - the start time in ms
-            end - the end time in ms
-        Returns:
-            the data quality
-    """
-    count = 0
-    total_bins = (end - start) / bin_size
-    for i in range(start, end, bin_size):
-        arr = _data["timestamp"].to_numpy()
-        if np.any((arr < i + bin_size) & (arr >= i)):
-            count += 1
-    return count / total_bins
@@ -1,7 +1,8 @@
 """ Module to compute healthkit sleep duration from raw feature sleep """
+import numpy as np
 import pandas as pd
 
-from ..feature_types import secondary_feature, log
+from ..feature_types import secondary_feature, secondary_kernel, bin_events, log
 from ..raw.sleep import sleep
 
 MS_IN_A_DAY = 86400000
@@ -40,3 +41,26 @@ def healthkit_sleep_duration(duration_type="in_bed", **kwargs):
     # Remove duplicates
     _sleep = _sleep[_sleep['timestamp'] != _sleep['timestamp'].shift()]
     return {'timestamp': kwargs['start'], 'value': _sleep["duration"].sum()}
+
+@secondary_kernel(healthkit_sleep_duration, raw=sleep)
+def _healthkit_sleep_duration_batch(data, edges, duration_type="in_bed", **kwargs):
+    """Batch kernel for healthkit_sleep_duration
+        (see 'cortex.feature_types.secondary_kernel')."""
+    n_bins = len(edges) - 1
+    if duration_type not in ["in_bed", "in_sleep", "in_awake"]:
+        log.info("%s is invalid. Valid options: in_bed, in_sleep, in_awake. Returning None.",
+                 duration_type)
+        return [None] * n_bins
+    if len(data) == 0:
+        return [None] * n_bins
+
+    _sleep = data[data["representation"] == duration_type]
+    # Remove duplicates (keeping the first event returned by the API for each timestamp)
+    _sleep = _sleep[_sleep['timestamp'] != _sleep['timestamp'].shift(-1)]
+    rows, bins = bin_events(_sleep['timestamp'].to_numpy(), edges)
+    durations = _sleep['duration'].to_numpy()
+    counts = np.bincount(bins, minlength=n_bins)
+    sums = np.bincount(bins, weights=durations[rows], minlength=n_bins)
+    if np.issubdtype(durations.dtype, np.integer):
+        sums = sums.astype(np.int64)
+    return np.where(counts > 0, sums, None)
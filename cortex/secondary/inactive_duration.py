@@ -2,7 +2,7 @@
 import numpy as np
 import pandas as pd
 
-from ..feature_types import secondary_feature
+from ..feature_types import secondary_feature, raw_arrays
 from ..raw.accelerometer import accelerometer
 from ..raw.screen_state import screen_state
 
@@ -48,11 +48,10 @@ def inactive_duration(jerk_threshold=500, **kwargs):
     else:
         return {'timestamp': kwargs['start'], 'value': None}
 
-    _acc = accelerometer(**kwargs)['data']
-    if _acc:
-        acc_df = pd.DataFrame(_acc)[['x', 'y', 'z', 'timestamp']]
-        acc_df = acc_df.iloc[::-1]
-        acc_df = acc_jerk(acc_df, jerk_threshold)
+    # Memory-mapped from the cache if caching is enabled
+    _acc = raw_arrays(accelerometer, ['x', 'y', 'z'], **kwargs)
+    if len(_acc['timestamp']) > 0:
+        acc_df = acc_jerk(_acc, jerk_threshold)
         acc_tups = get_acc_bouts(acc_df)
     else:
         return {'timestamp': kwargs['start'], 'value': None}
@@ -70,30 +69,30 @@ def acc_jerk(acc_df, threshold):
     """ Function to compute jerk.
 
         Args:
-            acc_df: the dataframe with raw accelerometer
+            acc_df: the raw accelerometer 'timestamp', 'x', 'y' and 'z' columns,
+                sorted by ascending timestamp (a dataframe, or a dict of numpy
+                arrays as returned by 'raw_arrays', which are only read by index)
             threshold (int): The max difference between points to be computed
                 in the sum, in ms.(i.e. if there is too large of a gap in time
                 between accelerometer points, jerk has little meaning)
         Returns:
             the computed jerk
     """
-    acc_df['timestamp_shift'] = acc_df['timestamp'].shift()
-    acc_df = acc_df[acc_df['timestamp'] != acc_df['timestamp_shift']]
-    acc_df['dt'] = (acc_df['timestamp'].shift() - acc_df['timestamp']) / 1000
-    acc_df['x_shift'] = acc_df['x'].shift()
-    acc_df['y_shift'] = acc_df['y'].shift()
-    acc_df['z_shift'] = acc_df['z'].shift()
-    acc_df = acc_df[acc_df['dt'] < (threshold / 1000)]
+    timestamps = np.asarray(acc_df['timestamp'])
+    # Keep one point per timestamp (the first one), paired with the previous point
+    kept = np.flatnonzero(np.insert(timestamps[1:] != timestamps[:-1], 0, True))
+    start, end = kept[1:], kept[:-1]
+    dt = (timestamps[end] - timestamps[start]) / 1000
+    close = dt < (threshold / 1000)
+    start, end, dt = start[close], end[close], dt[close]
+    jerk = np.sqrt(sum(((np.asarray(acc_df[k])[end] - np.asarray(acc_df[k])[start]) / dt) ** 2
+                       for k in ['x', 'y', 'z']))
     # if there are no datapoints with small enough dts then skip this computation
-    if len(acc_df) > 0:
-        x_sum = (acc_df['x_shift'] - acc_df['x']) / acc_df['dt']
-        y_sum = (acc_df['y_shift'] - acc_df['y']) / acc_df['dt']
-        z_sum = (acc_df['z_shift'] - acc_df['z']) / acc_df['dt']
-        acc_df['acc_jerk'] = np.sqrt((x_sum.pow(2) + y_sum.pow(2) + z_sum.pow(2)))
-        acc_df = acc_df.dropna()
-        acc_df = acc_df[['timestamp', 'timestamp_shift', 'acc_jerk']]
-        acc_df.columns = ['start', 'end', 'acc_jerk']
-        return acc_df
+    if len(dt) > 0:
+        valid = ~np.isnan(jerk)
+        return pd.DataFrame({'start': timestamps[start[valid]],
+                             'end': timestamps[end[valid]].astype(float),
+                             'acc_jerk': jerk[valid]})
     return []
 
 def max_intersection(acc_start, acc_end, ss_start, ss_end):
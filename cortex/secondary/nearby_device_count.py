@@ -2,7 +2,7 @@
 import numpy as np
 import pandas as pd
 
-from cortex.feature_types import secondary_feature
+from cortex.feature_types import secondary_feature, secondary_kernel, bin_events
 from cortex.raw.nearby_device import nearby_device
 
 MS_IN_A_DAY = 86400000
@@ -27,10 +27,26 @@ def nearby_device_count(**kwargs):
             timestamp (int): The beginning of the window (same as kwargs['start']).
             value (float): Number of unique bluetooth devices that were nearby.
     """
-    _nearby_device = pd.DataFrame(nearby_device(**kwargs)['data'])
+    _nearby_device = nearby_device(as_frame=True, **kwargs)['data']
     _nearby_device_count = None
     if len(_nearby_device) > 0:
         bluetooth_devices = _nearby_device[_nearby_device['type'] == 'bluetooth']
         _nearby_device_count = len(np.unique(bluetooth_devices['address'], return_counts=False))
 
     return {'timestamp': kwargs['start'], 'value': _nearby_device_count}
+
+@secondary_kernel(nearby_device_count, raw=nearby_device)
+def _nearby_device_count_batch(data, edges, **kwargs):
+    """Batch kernel for nearby_device_count (see 'cortex.feature_types.secondary_kernel')."""
+    n_bins = len(edges) - 1
+    if len(data) == 0:
+        return [None] * n_bins
+    rows, bins = bin_events(data['timestamp'].to_numpy(), edges)
+    counts = np.bincount(bins, minlength=n_bins)
+
+    # Count each (window, bluetooth address) pair once
+    bluetooth = data['type'].to_numpy()[rows] == 'bluetooth'
+    addresses = pd.factorize(data['address'].to_numpy()[rows][bluetooth])[0]
+    pairs = np.unique(np.stack([bins[bluetooth], addresses]), axis=1)
+    unique_devices = np.bincount(pairs[0], minlength=n_bins)
+    return np.where(counts > 0, unique_devices, None)
@@ -1,6 +1,6 @@
 """ Module for screen_wakes from raw device_usage """
 import numpy as np
-from ..feature_types import secondary_feature, log
+from ..feature_types import secondary_feature, secondary_kernel, bin_events, log
 from ..raw.device_usage import device_usage
 
 MS_IN_A_DAY = 86400000
@@ -27,7 +27,7 @@ def screen_wakes(**kwargs):
     """
     _screen_states = device_usage(**kwargs)['data']
 
-    screen_wake_count = np.sum(state['totalScreenWakes'] for state in _screen_states)
+    screen_wake_count = sum(state['totalScreenWakes'] for state in _screen_states)
     
     if len(_screen_states) == 0:
         number = None
@@ -36,3 +36,17 @@ def screen_wakes(**kwargs):
         number = screen_wake_count
 
     return {'timestamp': kwargs['start'], 'value': number}
+
+@secondary_kernel(screen_wakes, raw=device_usage)
+def _screen_wakes_batch(data, edges, **kwargs):
+    """Batch kernel for screen_wakes (see 'cortex.feature_types.secondary_kernel')."""
+    n_bins = len(edges) - 1
+    if len(data) == 0:
+        return [None] * n_bins
+    rows, bins = bin_events(data['timestamp'].to_numpy(), edges)
+    totals = data['totalScreenWakes'].to_numpy()
+    counts = np.bincount(bins, minlength=n_bins)
+    sums = np.bincount(bins, weights=totals[rows], minlength=n_bins)
+    if np.issubdtype(totals.dtype, np.integer):
+        sums = sums.astype(np.int64)
+    return np.where(counts > 0, sums, None)
@@ -1,10 +1,10 @@
 """ Module to compute step count from raw feature steps """
+import numpy as np
 import pandas as pd
 import LAMP
-from ..feature_types import secondary_feature
+from ..feature_types import secondary_feature, secondary_kernel, bin_events
 from ..raw.steps import steps
 from ..raw.analytics import analytics
-LAMP.connect()
 
 MS_IN_A_DAY = 86400000
 @secondary_feature(
@@ -35,42 +35,17 @@ def step_count(data_type = 'health',
     if data_type not in ['health', 'watch', 'pedometer']:
         raise Exception('Incorrect data type. Datatype must be health, watch, or pedometer.')
     else:
-        _steps = steps(**kwargs)['data']
+        _steps = steps(as_frame=True, **kwargs)['data']
         if len(_steps) == 0:
             return {'timestamp': kwargs['start'], 'value': None}
-        _steps = pd.DataFrame(_steps)
         if "type" not in _steps:
             # Older data, not supported
             return {'timestamp': kwargs['start'], 'value': None}
-        # old versions of the app, pre steps-fixing update
-        old_versions = ['1.0', '1.1', '1.1.1', '1.1.2', '1.1.3', '2021.1.20',
-                        '2021.1.21', '2021.6.28', '2021.6.29',
-                '2021.7.6', '2021.8.30', '2021.10.10', '2021.10.20',
-                        '2022.1.13', '2022.2.28', '2022.3.30',
-                '2022.4.13', '2022.4.23', '2.22.5.9', '2022.6.1',
-                        '2022.6.9', '2022.6.16', '2022.6.20', '2022.6.29',
-                '2022.7.13', '2022.8.4', '2022.8.9', '2022.8.24', '2022.10.6',
-                        '2022.10.26', '2022.10.27', '2023.1.20',
-                '2023.2.1', '2023.2.23', '2023.4.4', '2023.4.11', '2023.4.19']
-        # i will equal 0 if all the data is from the newer version,
-        # and 1 if all or some of the data is not from the new version.
-        i = 0
-
-        for item in LAMP.SensorEvent.all_by_participant(kwargs['id'],
-                                                        origin='lamp.analytics')['data']:
-            try:
-                version = item['data']['user_agent'].split(';')[0]
-                version = version.split(' ')[1]
-                if version in old_versions:
-                    i = 1
-                    pre_change = item['timestamp']
-                    post_change_df = _steps[_steps['timestamp'] > pre_change]
-                    pre_change_df = _steps[_steps['timestamp'] <= pre_change]
-                    break
-            except Exception:
-                pass
-
-        if i == 0:
+        pre_change = _old_version_timestamp(kwargs['id'])
+        if pre_change is not None:
+            post_change_df = _steps[_steps['timestamp'] > pre_change]
+            pre_change_df = _steps[_steps['timestamp'] <= pre_change]
+        else:
             post_change_df = _steps
             pre_change_df = pd.DataFrame()
 
@@ -120,3 +95,95 @@ def step_count(data_type = 'health',
                 return {'timestamp': kwargs['start'],'value': _steps[
                     (_steps["type"] == "step_count") & (
                         _steps["device_model"] == "Watch")]["value"].sum()}
+
+def _old_version_timestamp(participant_id):
+    """ Find when the participant last used an app version from before the steps fix.
+
+        Args:
+            participant_id (string): The participant's LAMP id.
+        Returns:
+            The timestamp of the most recent 'lamp.analytics' event from an old
+            version of the app, or None if all of the data is from newer versions.
+    """
+    # old versions of the app, pre steps-fixing update
+    old_versions = ['1.0', '1.1', '1.1.1', '1.1.2', '1.1.3', '2021.1.20',
+                    '2021.1.21', '2021.6.28', '2021.6.29',
+            '2021.7.6', '2021.8.30', '2021.10.10', '2021.10.20',
+                    '2022.1.13', '2022.2.28', '2022.3.30',
+            '2022.4.13', '2022.4.23', '2.22.5.9', '2022.6.1',
+                    '2022.6.9', '2022.6.16', '2022.6.20', '2022.6.29',
+            '2022.7.13', '2022.8.4', '2022.8.9', '2022.8.24', '2022.10.6',
+                    '2022.10.26', '2022.10.27', '2023.1.20',
+            '2023.2.1', '2023.2.23', '2023.4.4', '2023.4.11', '2023.4.19']
+    for item in LAMP.SensorEvent.all_by_participant(participant_id,
+                                                    origin='lamp.analytics')['data']:
+        try:
+            version = item['data']['user_agent'].split(';')[0]
+            version = version.split(' ')[1]
+            if version in old_versions:
+                return item['timestamp']
+        except Exception:
+            pass
+    return None
+
+@secondary_kernel(step_count, raw=steps)
+def _step_count_batch(data, edges, data_type='health', **kwargs):
+    """Batch kernel for step_count (see 'cortex.feature_types.secondary_kernel')."""
+    n_bins = len(edges) - 1
+    if data_type not in ['health', 'watch', 'pedometer']:
+        raise Exception('Incorrect data type. Datatype must be health, watch, or pedometer.')
+    if len(data) == 0 or "type" not in data:
+        return [None] * n_bins
+
+    def _windows(mask):
+        """ The (rows, bins) of the events selected by mask. """
+        rows = np.flatnonzero(mask)
+        sub_rows, bins = bin_events(timestamps[rows], edges)
+        return rows[sub_rows], bins
+
+    timestamps = data['timestamp'].to_numpy()
+    values = data['value'].to_numpy()
+    is_steps = (data['type'] == 'step_count').to_numpy()
+    # Windows with only older data (no step type) are not supported
+    _, bins = _windows(data['type'].notna().to_numpy())
+    supported = np.bincount(bins, minlength=n_bins) > 0
+
+    # Only pedometer and watch counts depend on the app version
+    post_change = np.ones(len(data), dtype=bool)
+    if data_type != 'health':
+        pre_change = _old_version_timestamp(kwargs['id'])
+        if pre_change is not None:
+            post_change = timestamps > pre_change
+
+    if data_type == 'health':
+        health = data["source"].str.contains('com.', na=False).to_numpy()
+        _, bins = _windows(health)
+        has_value = np.bincount(bins, minlength=n_bins) > 0
+        counted = health & is_steps
+        if "device_model" in data:
+            # Excluding counts from watch
+            counted &= (data['device_model'] != 'Watch').to_numpy()
+        rows, bins = _windows(counted)
+        result = np.bincount(bins, weights=values[rows], minlength=n_bins)
+
+    elif data_type == 'pedometer':
+        # Does not work well on Androids - no pedometer.
+        counted = post_change & is_steps & data["source"].str.contains(
+            'pedometer', na=False).to_numpy()
+        counted |= ~post_change & is_steps & (data["source"] != 'null').to_numpy()
+        rows, bins = _windows(counted)
+        has_value = np.bincount(bins, minlength=n_bins) > 0
+        result = np.full(n_bins, -np.inf)
+        np.maximum.at(result, bins, values[rows].astype(float))
+
+    else:
+        _, bins = _windows(post_change)
+        has_value = np.bincount(bins, minlength=n_bins) > 0
+        counted = (post_change & is_steps &
+                   (data["device_model"] == "Watch").to_numpy())
+        rows, bins = _windows(counted)
+        result = np.bincount(bins, weights=values[rows], minlength=n_bins)
+
+    if np.issubdtype(values.dtype, np.integer):
+        result = np.where(has_value, result, 0).astype(np.int64)
+    return np.where(supported & has_value, result, None)
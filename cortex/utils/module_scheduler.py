@@ -7,6 +7,7 @@ import json
 import pandas as pd
 import LAMP
 from ..utils.useful_functions import shift_time
+from ..feature_types import invalidate_activity_catalog
 
 path_prefix = os.path.split(os.path.realpath(__file__))[0]
 MODULE_JSON_FILE = path_prefix+"/example_modules.json"
@@ -86,6 +87,7 @@ def _schedule_module_helper(part_id, act_names, daily_schedule, start_times):
                 LAMP.Activity.update(activity_id=curr_dict['id'], activity_activity=curr_dict)
             except LAMP.ApiException:
                 pass
+        invalidate_activity_catalog(part_id)
         return 0
     return -1
 
@@ -114,6 +116,7 @@ def unschedule_other_surveys(part_id, keep_these):
             if act["name"] not in keep_these:
                 act["schedule"] = []
                 LAMP.Activity.update(activity_id=act['id'], activity_activity=act)
+    invalidate_activity_catalog(part_id)
 
 def unschedule_specific_survey(part_id, survey_name):
     """ Delete schedule for a specific activity.
@@ -123,6 +126,7 @@ def unschedule_specific_survey(part_id, survey_name):
         if len(act["schedule"]) > 0 and act["name"] == survey_name:
             act["schedule"] = []
             LAMP.Activity.update(activity_id=act['id'], activity_activity=act)
+    invalidate_activity_catalog(part_id)
 
 def correct_modules(part_id, phase_tag, module_tag, module_json=MODULE_JSON):
     """ Check what module someone is scheduled for, verify that the schedule
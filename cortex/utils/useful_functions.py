@@ -7,6 +7,7 @@ import time
 import re
 import pandas as pd
 import LAMP
+from ..feature_types import invalidate_activity_catalog
 
 MS_IN_DAY = 24 * 3600 * 1000
 #Used for set_graphs
@@ -110,6 +111,7 @@ def propagate_activity(base_user, activity_name, parts, excluded_tags=None):
                 if attach_name not in excluded_tags:
                     LAMP.Type.set_attachment(act["id"], "me", attach_name,
                         body=LAMP.Type.get_attachment(activity["id"], attach_name)["data"])
+        invalidate_activity_catalog(part)
 
 def get_part_id_from_name(name, parts):
     """ Find the id which has the lamp.name == name
@@ -0,0 +1,3 @@
+# Submodules are imported on first access (ex: cortex.visualizations.<module>).
+from .._lazy import lazy_package as _lazy_package
+__getattr__, __dir__ = _lazy_package(__name__, __path__)
@@ -43,7 +43,7 @@ def save_surveys_to_file(part_id, survey_path, scoring_dict):
 
 def get_avg_var_data(parts, scoring_guide, other_global_feats, other_local_feats,
                      other_local_subfeats, passive_feats, survey_dir, passive_dir,
-                     avg = 1, time_to_include=[-1, -1]):
+                     avg = 1, time_to_include=[-1, -1], passive_dataset=False):
     """ Get variance and averages for each feature.
 
         Args:
@@ -60,6 +60,9 @@ def get_avg_var_data(parts, scoring_guide, other_global_feats, other_local_feats
                 restrict to certain days from the start of the
                 study (ie first SensorEvent)
                 (ex: time_to_include=[86400000,691200000] would be from day 2 to day 8)
+            passive_dataset: whether passive_dir is a Parquet dataset written by
+                cortex.run (see 'output_dataset'), rather than a directory of pickles;
+                only the partitions of parts and passive_feats are then read
         Notes: See example in correlation_plots.ipynb
     """
     # Make sure that the feature order stays consistent
@@ -129,9 +132,17 @@ def get_avg_var_data(parts, scoring_guide, other_global_feats, other_local_feats
         # passive features
         for feat in passive_feats:
             feat_path = passive_dir + part + "_" + feat + ".pkl"
-            if os.path.exists(feat_path):
+            df0 = None
+            if passive_dataset:
+                from ..run import read_dataset
+                # timestamps are saved in ms
+                df0 = read_dataset(passive_dir, [feat], [part],
+                                   start=start_time, end=end_time)[feat]
+                df0 = df0 if len(df0) > 0 else None
+            elif os.path.exists(feat_path):
                 df0 = pd.read_pickle(feat_path)
                 df0["timestamp"] = df0["timestamp"].astype(np.int64) // 10**6
+            if df0 is not None:
                 df0 = df0[(df0["timestamp"] >= start_time) & (df0["timestamp"] <= end_time)]
                 if "value" in df0:
                     df0 = df0.rename(columns={"value": feat})
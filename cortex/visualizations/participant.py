@@ -7,6 +7,7 @@ import pandas as pd
 import altair as alt
 from ..utils.useful_functions import generate_ids,set_graph,shift_time
 from ..run import run
+from ..feature_types import activity_catalog
 
 MS_PER_HOUR = 1000*60*60
 
@@ -282,7 +283,7 @@ def active(id_list,
 
         target = ''
         target_ids = []
-        activity_data = LAMP.Activity.all_by_participant(_id)['data']
+        activity_data = activity_catalog(_id)
         id_to_name = {x['id']:x['name'] for
                       x in activity_data if 'id' in x and 'name' in x}
         group_ids = [x['id'] for x in activity_data if x['spec']=='lamp.group']
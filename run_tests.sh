@@ -35,6 +35,24 @@ find tests -name '*tests.py' -print0 |
             coverage run -m unittest "$line"
             echo "${cyan} Coverage Report for ${line}"
             coverage report -m cortex/utils/misc_functions.py
+        elif [[ $line = "tests/raw_feature_tests.py" ]]
+        then
+            echo "${green} Running tests for ${line} ${reset}"
+            coverage run -m unittest "$line"
+            echo "${cyan} Coverage Report for ${line}"
+            coverage report -m cortex/feature_types.py
+        elif [[ $line = "tests/feature_types_tests.py" ]]
+        then
+            echo "${green} Running tests for ${line} ${reset}"
+            coverage run -m unittest "$line"
+            echo "${cyan} Coverage Report for ${line}"
+            coverage report -m cortex/feature_types.py
+        elif [[ $line = "tests/run_tests.py" ]]
+        then
+            echo "${green} Running tests for ${line} ${reset}"
+            coverage run -m unittest "$line"
+            echo "${cyan} Coverage Report for ${line}"
+            coverage report -m cortex/run.py
         else
             echo "TODO: add other tests here"
             # coverage report
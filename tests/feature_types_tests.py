@@ -0,0 +1,440 @@
+""" Module for unittesting the helpers of cortex.feature_types (without the LAMP API) """
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import logging
+from contextlib import closing
+from unittest import mock
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import cortex.feature_types as feature_types
+import cortex.primary.acc_jerk as acc_jerk_module
+
+# Events computed by the primary feature below (see 'test_attachments')
+ATTACH_EVENTS = []
+
+@feature_types.primary_feature(name='cortex.tests.attach', dependencies=[])
+def attach_feature(attach=False, **kwargs):
+    """ A primary feature returning the events of ATTACH_EVENTS in [start, end] """
+    return {'data': [e for e in ATTACH_EVENTS
+                     if kwargs['start'] <= e['start'] and e['end'] <= kwargs['end']],
+            'has_raw_data': 1}
+
+
+class TestFeatureTypes(unittest.TestCase):
+    """ Class for testing the cortex.feature_types helpers """
+    TEST_PARTICIPANT = "U0000000000"
+    TEST_START = 1646485947205
+    TEST_END = TEST_START + 60 * 1000
+
+    def setUp(self):
+        """ Setup the tests """
+        logger = logging.getLogger()
+        logger.setLevel(logging.CRITICAL)
+
+    # 0. primary_memo
+    def _acc_arrays(self, *args, **kwargs):
+        # Accelerometer at 5 Hz
+        timestamps = np.arange(self.TEST_START, self.TEST_END, 200, dtype=np.int64)
+        return {'timestamp': timestamps,
+                'x': np.sin(timestamps / 1000), 'y': np.cos(timestamps / 1000),
+                'z': np.zeros(len(timestamps))}
+
+    def test_primary_memo(self):
+        # Test that memoized results are computed once and returned as copies
+        with mock.patch.object(acc_jerk_module, 'raw_arrays',
+                               side_effect=self._acc_arrays) as raw_arrays:
+            with feature_types.primary_memo() as stats:
+                ret0 = acc_jerk_module.acc_jerk(id=self.TEST_PARTICIPANT,
+                                                start=self.TEST_START, end=self.TEST_END)
+                expected = [dict(event) for event in ret0['data']]
+                ret0['data'].clear()
+                ret1 = acc_jerk_module.acc_jerk(id=self.TEST_PARTICIPANT,
+                                                start=self.TEST_START, end=self.TEST_END)
+                ret2 = acc_jerk_module.acc_jerk(id=self.TEST_PARTICIPANT,
+                                                start=self.TEST_START, end=self.TEST_END)
+            self.assertEqual(raw_arrays.call_count, 1)
+            self.assertEqual(stats, {'hits': 2, 'misses': 1, 'evictions': 0})
+            self.assertEqual(ret1['data'], expected)
+            self.assertIsNot(ret1['data'], ret2['data'])
+
+    def test_primary_memo_bytes(self):
+        # Test that results beyond 'CORTEX_PRIMARY_MEMO_BYTES' are dropped
+        with mock.patch.object(acc_jerk_module, 'raw_arrays',
+                               side_effect=self._acc_arrays) as raw_arrays, \
+                mock.patch.dict(os.environ, {'CORTEX_PRIMARY_MEMO_BYTES': '1000'}):
+            with feature_types.primary_memo() as stats:
+                for _ in range(2):
+                    acc_jerk_module.acc_jerk(id=self.TEST_PARTICIPANT,
+                                             start=self.TEST_START, end=self.TEST_END)
+            self.assertEqual(raw_arrays.call_count, 2)
+            self.assertEqual(stats, {'hits': 0, 'misses': 2, 'evictions': 2})
+
+    # 1. columnar cache
+    def _events(self):
+        # Raw events sorted by descending timestamp, as returned by the API
+        events = [{'timestamp': self.TEST_START + i * 1000,
+                   'value': i,
+                   'level': i / 2 if i % 2 else i,
+                   'type': 'bluetooth' if i % 3 else 'wifi',
+                   'is_charging': bool(i % 2),
+                   'motion': {'x': i * 0.1, 'y': -i * 0.1}}
+                  for i in range(10)]
+        for event in events[::4]:
+            del event['type']
+        return events[::-1]
+
+    def _tmp_dir(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        return path
+
+    def test_columns_round_trip(self):
+        # Test that events saved as columns are read back unchanged
+        events = self._events()
+        path = os.path.join(self._tmp_dir(), 'accelerometer_U0_0_1.cortex.col')
+        self.assertEqual(feature_types._cache_save(events, path), path)
+        self.assertEqual(feature_types._cache_load(path), events)
+        ret = feature_types._cache_load(path, start=self.TEST_START + 2000,
+                                        end=self.TEST_START + 5000)
+        self.assertEqual(ret, events[4:8])
+        columns = feature_types._cache_columns(path, columns=['motion.x'])
+        self.assertEqual(sorted(columns), [('motion', 'x'), ('timestamp',)])
+        self.assertIsInstance(columns[('motion', 'x')][0], np.memmap)
+        self.assertEqual(columns[('timestamp',)][0].dtype, np.int64)
+        self.assertIsNotNone(feature_types._cache_columns(path)[('type',)][1])
+        frame = feature_types._frame_from_columns(feature_types._cache_columns(path))
+        self.assertEqual(list(frame['timestamp']), [e['timestamp'] for e in events])
+        self.assertEqual(list(frame['motion.y']), [e['motion']['y'] for e in events])
+
+    def test_columns_mixed_nesting(self):
+        # Test that fields nested in some events only are pickled instead
+        events = self._events()
+        events[3]['motion'] = None
+        path = os.path.join(self._tmp_dir(), 'accelerometer_U0_0_1.cortex.col')
+        self.assertFalse(feature_types._columns_save(events, path + '.tmp'))
+        self.assertFalse(os.path.exists(path + '.tmp'))
+        saved = feature_types._cache_save(events, path)
+        self.assertEqual(saved, path[:-len('.col')])
+        self.assertEqual(feature_types._cache_load(saved), events)
+
+    # 2. cache index
+    def _cache_file(self, cache_dir, sensor, start, end):
+        path = os.path.join(cache_dir, f"{sensor}_{self.TEST_PARTICIPANT}_{start}_{end}.cortex")
+        with open(path, 'w'):
+            pass
+        return path
+
+    def test_cache_index_scan(self):
+        # Test that files already in the cache directory are indexed
+        cache_dir = self._tmp_dir()
+        path = self._cache_file(cache_dir, 'gps', 100, 200)
+        self._cache_file(cache_dir, 'accelerometer', 100, 300)
+        with open(os.path.join(cache_dir, 'notes.txt'), 'w'):
+            pass
+        with closing(feature_types._cache_index(cache_dir)) as index:
+            self.assertEqual(index.execute("SELECT COUNT(*) FROM blobs").fetchone()[0], 2)
+            for start, end, expected in [(100, 200, path), (120, 180, path),
+                                         (50, 150, None), (150, 250, None)]:
+                ret = feature_types._cache_index_lookup(index, cache_dir, 'gps',
+                                                        id=self.TEST_PARTICIPANT,
+                                                        start=start, end=end)
+                self.assertEqual(ret, expected)
+            ret = feature_types._cache_index_lookup(index, cache_dir, 'gps', id="U1",
+                                                    start=120, end=180)
+            self.assertIsNone(ret)
+
+    def test_cache_index_add(self):
+        # Test that added files replace the files merged into them
+        cache_dir = self._tmp_dir()
+        old = [self._cache_file(cache_dir, 'gps', 100, 200),
+               self._cache_file(cache_dir, 'gps', 300, 400)]
+        with closing(feature_types._cache_index(cache_dir)) as index:
+            ret = feature_types._cache_index_overlaps(index, cache_dir, 'gps',
+                                                      id=self.TEST_PARTICIPANT,
+                                                      start=150, end=350)
+            self.assertEqual(ret, [(100, 200, old[0]), (300, 400, old[1])])
+            path = self._cache_file(cache_dir, 'gps', 100, 400)
+            feature_types._cache_index_add(index, path, 'gps', self.TEST_PARTICIPANT, 100, 400,
+                                           replaces=old)
+            ret = feature_types._cache_index_overlaps(index, cache_dir, 'gps',
+                                                      id=self.TEST_PARTICIPANT,
+                                                      start=150, end=350)
+            self.assertEqual(ret, [(100, 400, path)])
+            # Files removed outside of cortex are dropped from the index
+            os.remove(path)
+            ret = feature_types._cache_index_lookup(index, cache_dir, 'gps',
+                                                    id=self.TEST_PARTICIPANT,
+                                                    start=150, end=350)
+            self.assertIsNone(ret)
+            self.assertEqual(index.execute("SELECT COUNT(*) FROM blobs").fetchone()[0], 0)
+
+    def test_reindex_cache(self):
+        # Test that reindexing picks up files copied into the cache directory
+        cache_dir = self._tmp_dir()
+        with closing(feature_types._cache_index(cache_dir)):
+            pass
+        path = self._cache_file(cache_dir, 'gps', 100, 200)
+        feature_types.reindex_cache(cache_dir)
+        with closing(feature_types._cache_index(cache_dir)) as index:
+            ret = feature_types._cache_index_lookup(index, cache_dir, 'gps',
+                                                    id=self.TEST_PARTICIPANT,
+                                                    start=100, end=200)
+        self.assertEqual(ret, path)
+
+    # 3. partial cache hits
+    def test_uncovered(self):
+        # Test the gaps of [start, end] left by cached intervals
+        self.assertEqual(feature_types._uncovered([], 0, 100), [(0, 100)])
+        self.assertEqual(feature_types._uncovered([(0, 100)], 0, 100), [])
+        self.assertEqual(feature_types._uncovered([(-50, 150)], 0, 100), [])
+        self.assertEqual(feature_types._uncovered([(20, 40), (60, 80)], 0, 100),
+                         [(0, 20), (40, 60), (80, 100)])
+        self.assertEqual(feature_types._uncovered([(-10, 30), (20, 50), (40, 60)], 0, 100),
+                         [(60, 100)])
+        self.assertEqual(feature_types._uncovered([(30, 200)], 0, 100), [(0, 30)])
+        self.assertEqual(feature_types._uncovered([(10, 20), (15, 18), (90, 95)], 0, 100),
+                         [(0, 10), (20, 90), (95, 100)])
+
+    def test_is_covered(self):
+        # Test that intervals are closed
+        intervals = [(20, 40), (60, 80)]
+        self.assertEqual([t for t in [0, 20, 30, 40, 50, 60, 80, 81]
+                          if feature_types._is_covered(t, intervals)], [20, 30, 40, 60, 80])
+        self.assertFalse(feature_types._is_covered(0, []))
+
+    # 4. concurrent pagination
+    def _query(self, events, calls):
+        # Mimic the LAMP API over events sorted by ascending timestamp
+        def query(_from, to, _limit):
+            calls.append((_from, to, _limit))
+            selected = [e for e in events if _from <= e['timestamp'] <= to]
+            return selected[:-_limit] if _limit < 0 else selected[::-1][:_limit]
+        return query
+
+    def test_paginate_shards(self):
+        # Test that time shards are stitched back without losing or duplicating events
+        rng = np.random.default_rng(0)
+        # Bursts of events sharing timestamps, across page and shard boundaries
+        timestamps = np.sort(rng.choice(np.arange(0, 2000, 7), 400))
+        events = [{'timestamp': int(t), 'value': i} for i, t in enumerate(timestamps)]
+        for start, end in [(0, 2000), (500, 1500), (int(timestamps[100]), int(timestamps[300]))]:
+            expected = [e for e in events if start <= e['timestamp'] <= end][::-1]
+            for workers in [2, 4, 16]:
+                calls = []
+                ret = feature_types._paginate(self._query(events, calls), start, end, 25,
+                                              page_size=25, workers=workers)
+                self.assertEqual(ret, expected)
+                self.assertGreater(len(calls), len(expected) // 25)
+
+    def test_paginate_single_page(self):
+        # Test that incomplete first pages and non-recursive requests are not sharded
+        events = [{'timestamp': t} for t in range(0, 100, 10)]
+        calls = []
+        ret = feature_types._paginate(self._query(events, calls), 0, 100, 25,
+                                      page_size=25, workers=4)
+        self.assertEqual(ret, events[::-1])
+        self.assertEqual(len(calls), 1)
+        calls = []
+        ret = feature_types._paginate(self._query(events, calls), 0, 100, 5,
+                                      recursive=False, page_size=5, workers=4)
+        self.assertEqual(ret, events[::-1][:5])
+        self.assertEqual(len(calls), 1)
+
+    def test_paginate_ties(self):
+        # Test that full pages holding a single timestamp do not drop its other events
+        timestamps = [5] * 3 + [7] * 30 + [8] + [9] * 8
+        events = [{'timestamp': t, 'value': i} for i, t in enumerate(timestamps)]
+        ret = [r for page in feature_types._iter_paginate(self._query(events, []), 0, 10, 8)
+               for r in page]
+        self.assertEqual(sorted(ret, key=lambda x: x['value']), events)
+        ret = feature_types._paginate(self._query(events, []), 0, 10, 8, page_size=8, workers=4)
+        self.assertEqual(sorted(ret, key=lambda x: x['value']), events)
+        # Up to the largest page the API returns
+        with mock.patch.object(feature_types, 'MAX_RETURN_SIZE', 16), \
+                self.assertLogs('cortex', level='WARNING'):
+            ret = [r for page in feature_types._iter_paginate(self._query(events, []), 0, 10, 8)
+                   for r in page]
+        self.assertEqual([r['timestamp'] for r in ret], [5] * 3 + [7] * 16 + [8] + [9] * 8)
+
+    # 5. primary attachments
+    def test_merge_events(self):
+        # Test that merged events match deduplicating (keeping the last occurrence) and sorting
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            events = [{'start': int(start), 'end': int(start + rng.integers(1, 3)),
+                       'value': int(rng.integers(0, 3))}
+                      for start in rng.integers(0, 20, 60)]
+            new, saved = events[:30], sorted(events[30:], key=lambda x: x['start'])
+            if rng.random() < 0.3:
+                saved = saved[::-1]
+            merged = new + saved
+            expected = sorted([e for i, e in enumerate(merged) if e not in merged[i + 1:]],
+                              key=lambda x: x['start'])
+            self.assertEqual(feature_types._merge_events(new, saved), expected)
+
+    def test_merge_events_identity(self):
+        # Test that saved events win over equal new events
+        new = [{'start': 0, 'end': 1, 'value': 1}, {'start': 1, 'end': 2, 'value': 2}]
+        saved = [{'start': 0, 'end': 1, 'value': 1}]
+        ret = feature_types._merge_events(new, saved)
+        self.assertEqual(ret, new)
+        self.assertIs(ret[0], saved[0])
+        self.assertEqual(feature_types._merge_events([], []), [])
+
+    def _attachments(self, store):
+        # Mimic LAMP.Type attachments in a dict
+        def get_attachment(participant, key):
+            if key not in store:
+                raise feature_types.LAMP.ApiException(status=404)
+            return {'data': store[key]}
+        def set_attachment(participant, origin, attachment_key, body):
+            store[attachment_key] = body
+        lamp = mock.MagicMock()
+        lamp.ApiException = feature_types.LAMP.ApiException
+        lamp.Type.get_attachment.side_effect = get_attachment
+        lamp.Type.set_attachment.side_effect = set_attachment
+        return lamp
+
+    def _attach_events(self):
+        # Half-hour events every hour, from 2024-01-31 12:00 to 2024-02-01 12:00 (UTC)
+        hour = 60 * 60 * 1000
+        start = 1706702400000
+        self.addCleanup(ATTACH_EVENTS.clear)
+        return [{'start': t, 'end': t + hour // 2, 'value': i}
+                for i, t in enumerate(range(start, start + 24 * hour, hour))]
+
+    def test_attachment_shards(self):
+        # Test that attachments are migrated to monthly shards, and only needed ones loaded
+        events = self._attach_events()
+        name = 'cortex.tests.attach'
+        store = {name: events[:18]}
+        ATTACH_EVENTS[:] = events[:20]
+        lamp = self._attachments(store)
+        kwargs = {'id': self.TEST_PARTICIPANT, 'start': events[0]['start'],
+                  'end': events[-1]['end'], 'attach': True}
+        with mock.patch.object(feature_types, 'LAMP', lamp):
+            # Legacy attachments (a single list) are split by month
+            self.assertEqual(attach_feature(**kwargs)['data'], events[:20])
+            self.assertIsNone(store[name])
+            self.assertEqual(store[name + '.2024-01'], events[:12])
+            self.assertEqual(store[name + '.2024-02'], events[12:20])
+            self.assertEqual(store[name + '.manifest']['shards'],
+                             {'2024-01': {'start': events[0]['start'],
+                                          'end': events[11]['end'], 'count': 12},
+                              '2024-02': {'start': events[12]['start'],
+                                          'end': events[19]['end'], 'count': 8}})
+            # Only the shards overlapping the request or receiving new events are loaded
+            ATTACH_EVENTS[:] = events
+            lamp.Type.get_attachment.reset_mock()
+            self.assertEqual(attach_feature(**{**kwargs, 'start': events[16]['start']})['data'],
+                             events[16:])
+            self.assertEqual(sorted(c.args[1] for c in lamp.Type.get_attachment.call_args_list),
+                             [name + '.2024-02', name + '.manifest'])
+            self.assertEqual(store[name + '.2024-01'], events[:12])
+            self.assertEqual(store[name + '.2024-02'], events[12:])
+
+    def test_attachment_uploads(self):
+        # Test that only the attachments whose content changed are uploaded
+        events = self._attach_events()
+        name = 'cortex.tests.attach'
+        ATTACH_EVENTS[:] = events[:20]
+        lamp = self._attachments({})
+        kwargs = {'id': self.TEST_PARTICIPANT, 'start': events[0]['start'],
+                  'end': events[-1]['end'], 'attach': True}
+        def uploaded():
+            keys = sorted(c.kwargs['attachment_key']
+                          for c in lamp.Type.set_attachment.call_args_list)
+            lamp.Type.set_attachment.reset_mock()
+            return keys
+        with mock.patch.object(feature_types, 'LAMP', lamp):
+            attach_feature(**kwargs)
+            self.assertEqual(uploaded(), [name + '.2024-01', name + '.2024-02',
+                                          name + '.manifest'])
+            # The last event is recomputed, but nothing changed
+            self.assertEqual(attach_feature(**kwargs)['data'], events[:20])
+            self.assertEqual(uploaded(), [])
+            ATTACH_EVENTS[:] = events
+            self.assertEqual(attach_feature(**kwargs)['data'], events)
+            self.assertEqual(uploaded(), [name + '.2024-02', name + '.manifest'])
+
+    # 6. data bounds
+    def test_data_bounds(self):
+        # Test that cached data bounds follow data synced or deleted later
+        events = [{'timestamp': t, 'data': {'latitude': 0, 'longitude': 0}} for t in [200, 300]]
+        def sensor_events(participant, origin, _from, to, _limit):
+            selected = [dict(e) for e in events if _from <= e['timestamp'] <= to
+                        and participant == self.TEST_PARTICIPANT and origin == 'lamp.gps']
+            return {'data': selected[:-_limit] if _limit < 0 else selected[::-1][:_limit]}
+        lamp = mock.MagicMock()
+        lamp.SensorEvent.all_by_participant.side_effect = sensor_events
+        cache_dir = self._tmp_dir()
+        with mock.patch.object(feature_types, 'LAMP', lamp), \
+                mock.patch.dict(os.environ, {'CORTEX_CACHE_DIR': cache_dir}):
+            def bounds():
+                return feature_types.data_bounds(self.TEST_PARTICIPANT, ['lamp.gps'],
+                                                 cache=True)['lamp.gps']
+            self.assertEqual(bounds(), (200, 300))
+            # Older data synced along with new data
+            events.insert(0, dict(events[0], timestamp=100))
+            events.append(dict(events[0], timestamp=400))
+            self.assertEqual(bounds(), (100, 400))
+            # Deleted data is only seen once the bounds are invalidated or expired
+            del events[0]
+            self.assertEqual(bounds(), (100, 400))
+            feature_types.invalidate_data_bounds(self.TEST_PARTICIPANT, cache_dir=cache_dir)
+            self.assertEqual(bounds(), (200, 400))
+            del events[0]
+            self.assertEqual(bounds(), (200, 400))
+            with mock.patch.dict(os.environ, {'CORTEX_DATA_BOUNDS_TTL': '0'}):
+                self.assertEqual(bounds(), (300, 400))
+            del events[:]
+            with mock.patch.dict(os.environ, {'CORTEX_DATA_BOUNDS_TTL': '0'}):
+                self.assertIsNone(bounds())
+            with closing(feature_types._cache_index(cache_dir)) as index:
+                self.assertEqual(index.execute("SELECT COUNT(*) FROM bounds").fetchone()[0], 0)
+
+    # 7. activity events
+    def test_activity_events_pool(self):
+        # Test that ActivityEvents are only pooled while a prefetch scope is open
+        events = [{'timestamp': t, 'activity': 'jewels' if t % 20 else 'survey'}
+                  for t in range(100, 200, 10)]
+        def activity_events(participant, _from, to, _limit):
+            selected = [dict(e) for e in events if _from <= e['timestamp'] <= to]
+            return {'data': selected[:-_limit] if _limit < 0 else selected[::-1][:_limit]}
+        lamp = mock.MagicMock()
+        lamp.Activity.all_by_participant.return_value = {
+            'data': [{'id': 'jewels', 'spec': 'lamp.jewels_a'},
+                     {'id': 'survey', 'spec': 'lamp.survey'}]}
+        lamp.ActivityEvent.all_by_participant.side_effect = activity_events
+        api = lamp.ActivityEvent.all_by_participant
+        kwargs = {'id': self.TEST_PARTICIPANT, 'start': 0, 'end': 1000, 'recursive': True}
+        def timestamps(spec, **extra):
+            return [e['timestamp']
+                    for e in feature_types._activity_events(spec, **{**kwargs, **extra})]
+        feature_types.invalidate_activity_catalog()
+        self.addCleanup(feature_types.invalidate_activity_catalog)
+        with mock.patch.object(feature_types, 'LAMP', lamp):
+            self.assertEqual(timestamps('lamp.jewels_a'), [190, 170, 150, 130, 110])
+            # New events appear outside of a prefetch scope
+            events.append({'timestamp': 210, 'activity': 'jewels'})
+            self.assertEqual(timestamps('lamp.jewels_a')[0], 210)
+            with feature_types.shared_fetches(self.TEST_PARTICIPANT, [], 0, 1000):
+                api.reset_mock()
+                self.assertEqual(timestamps('lamp.survey'), [180, 160, 140, 120, 100])
+                self.assertEqual(timestamps('lamp.jewels_a', start=150, end=190),
+                                 [190, 170, 150])
+                self.assertEqual(timestamps('lamp.cats_and_dogs'), [])
+                self.assertEqual(api.call_count, 1)
+                # The pool holds the events of the scope
+                events.append({'timestamp': 230, 'activity': 'jewels'})
+                self.assertEqual(timestamps('lamp.jewels_a')[0], 210)
+                self.assertEqual(api.call_count, 1)
+            # ... and is dropped with it
+            self.assertEqual(timestamps('lamp.jewels_a')[0], 230)
+            self.assertEqual(api.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
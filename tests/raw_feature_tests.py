@@ -0,0 +1,228 @@
+""" Module for unittesting raw features (with a mocked LAMP API) """
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import logging
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import cortex.feature_types as feature_types
+from cortex.raw.nearby_device import nearby_device
+from cortex.secondary.nearby_device_count import nearby_device_count
+import cortex.secondary.step_count as step_count_module
+from cortex.secondary.battery_level import battery_level
+from cortex.secondary.call_duration import call_duration
+from cortex.secondary.call_number import call_number
+from cortex.secondary.healthkit_sleep_duration import healthkit_sleep_duration
+from cortex.secondary.screen_unlocks import screen_unlocks
+from cortex.secondary.screen_wakes import screen_wakes
+
+
+class TestRaw(unittest.TestCase):
+    """ Class for testing raw features """
+    MS_IN_DAY = 60 * 60 * 24 * 1000
+    TEST_PARTICIPANT = "U0000000000"
+    TEST_START = 1646485947205
+    TEST_END = TEST_START + 5 * MS_IN_DAY
+
+    def setUp(self):
+        """ Setup the tests """
+        logger = logging.getLogger()
+        logger.setLevel(logging.CRITICAL)
+        # One nearby device per minute, 17 distinct bluetooth addresses
+        self.events = [{'timestamp': t,
+                        'data': {'type': 'bluetooth' if (t // 60000) % 3 else 'wifi',
+                                 'address': 'address_' + str((t // 60000) % 17)}}
+                       for t in range(self.TEST_START, self.TEST_END, 60000)]
+        self.sensors = {"lamp.nearby_device": self.events}
+        lamp = mock.MagicMock()
+        lamp.SensorEvent.all_by_participant.side_effect = self._sensor_events
+        self.cache_dir = tempfile.mkdtemp()
+        patches = [mock.patch.object(feature_types, 'LAMP', lamp),
+                   mock.patch.object(step_count_module, 'LAMP', lamp),
+                   mock.patch.dict(os.environ, {'CORTEX_CACHE_DIR': self.cache_dir})]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def _sensor_events(self, participant, origin, _from=0, to=2 ** 62, _limit=10000):
+        # Mimic LAMP.SensorEvent.all_by_participant: a negative limit returns
+        # the oldest events first
+        events = [e for e in self.sensors.get(origin, []) if _from <= e['timestamp'] <= to
+                  and participant == self.TEST_PARTICIPANT]
+        if _limit < 0:
+            return {'data': [dict(e) for e in events[:-_limit]]}
+        return {'data': [dict(e) for e in events[::-1][:_limit]]}
+
+    def test_frame_prefetch_cache(self):
+        # Test that frames are served from the cache and from prefetched series
+        expected = nearby_device_count(id=self.TEST_PARTICIPANT, start=self.TEST_START,
+                                       end=self.TEST_END, resolution=self.MS_IN_DAY,
+                                       recursive=True, batch=False)['data']
+        self.assertEqual([x['value'] for x in expected], [17] * 5)
+        # Fill the (columnar) cache
+        nearby_device(id=self.TEST_PARTICIPANT, start=self.TEST_START, end=self.TEST_END,
+                      recursive=True, cache=True)
+        for kwargs in [{'prefetch': True, 'cache': True},
+                       {'prefetch': True, 'cache': False},
+                       {'prefetch': False, 'cache': True}]:
+            ret = nearby_device_count(id=self.TEST_PARTICIPANT, start=self.TEST_START,
+                                      end=self.TEST_END, resolution=self.MS_IN_DAY,
+                                      recursive=True, batch=False, **kwargs)['data']
+            self.assertEqual(ret, expected)
+
+    def test_frame_matches_records(self):
+        # Test that the frame, cached frame and records formats hold the same data
+        kwargs = {'id': self.TEST_PARTICIPANT, 'start': self.TEST_START + self.MS_IN_DAY,
+                  'end': self.TEST_START + 2 * self.MS_IN_DAY, 'recursive': True}
+        records = nearby_device(**kwargs)['data']
+        frame = nearby_device(format='frame', **kwargs)['data']
+        nearby_device(cache=True, **{**kwargs, 'start': self.TEST_START})
+        cached = nearby_device(format='frame', cache=True, **kwargs)['data']
+        self.assertEqual(len(records), 1441)
+        for ret in [frame, cached]:
+            self.assertEqual(list(ret['timestamp']), [r['timestamp'] for r in records])
+            self.assertEqual(list(ret['address']), [r['address'] for r in records])
+
+    def test_partial_cache(self):
+        # Test that only the intervals missing from the cache are requested
+        day = self.MS_IN_DAY
+        kwargs = {'id': self.TEST_PARTICIPANT, 'recursive': True, 'cache': True}
+        for start, end in [(1, 2), (3, 4)]:
+            nearby_device(start=self.TEST_START + start * day,
+                          end=self.TEST_START + end * day, **kwargs)
+        api = feature_types.LAMP.SensorEvent.all_by_participant
+        api.reset_mock()
+        ret = nearby_device(start=self.TEST_START, end=self.TEST_END, **kwargs)['data']
+        self.assertEqual(sorted({(c.kwargs['_from'], c.kwargs['to']) for c in api.call_args_list}),
+                         [(self.TEST_START, self.TEST_START + day),
+                          (self.TEST_START + 2 * day, self.TEST_START + 3 * day),
+                          (self.TEST_START + 4 * day, self.TEST_END)])
+        self.assertEqual([r['timestamp'] for r in ret],
+                         [e['timestamp'] for e in self.events[::-1]])
+        # Everything is now in one cached file
+        api.reset_mock()
+        nearby_device(start=self.TEST_START, end=self.TEST_END, **kwargs)
+        self.assertEqual(api.call_count, 0)
+
+    def test_iter_pages_cache(self):
+        # Test that streamed chunks read from (pickled) cached files are bounded
+        kwargs = {'id': self.TEST_PARTICIPANT, 'start': self.TEST_START + self.MS_IN_DAY,
+                  'end': self.TEST_START + 2 * self.MS_IN_DAY, 'recursive': True}
+        expected = [r['timestamp'] for r in nearby_device(**kwargs)['data']][::-1]
+        for cache_format in ['pickle', 'columnar']:
+            with mock.patch.dict(os.environ, {'CORTEX_CACHE_FORMAT': cache_format}):
+                feature_types.delete_cache(self.TEST_PARTICIPANT, cache_dir=self.cache_dir)
+                nearby_device(cache=True, **{**kwargs, 'start': self.TEST_START})
+                chunks = feature_types.iter_pages(nearby_device, chunk_size=500,
+                                                  cache=True, **kwargs)
+                ret = [r['timestamp'] for chunk in chunks for r in chunk]
+            self.assertEqual(ret, expected)
+
+    def test_shared_fetches(self):
+        # Test that shared raw data is only fetched once requested, and only once
+        api = feature_types.LAMP.SensorEvent.all_by_participant
+        plan = feature_types.feature_plan(['lamp.nearby_device', 'lamp.accelerometer'])
+        with feature_types.shared_fetches(self.TEST_PARTICIPANT, plan, self.TEST_START,
+                                          self.TEST_END):
+            self.assertEqual(api.call_count, 0)
+            # High-rate sensors are left to the cache and streaming paths
+            self.assertIsNone(feature_types._prefetch_scope(
+                'lamp.accelerometer', id=self.TEST_PARTICIPANT, start=self.TEST_START,
+                end=self.TEST_END))
+            ret = nearby_device(id=self.TEST_PARTICIPANT, start=self.TEST_START,
+                                end=self.TEST_START + self.MS_IN_DAY)['data']
+            self.assertEqual(len(ret), 1441)
+            self.assertEqual({c.kwargs['origin'] for c in api.call_args_list},
+                             {'lamp.nearby_device'})
+            self.assertEqual(min(c.kwargs['_from'] for c in api.call_args_list),
+                             self.TEST_START)
+            calls = api.call_count
+            ret = nearby_device(id=self.TEST_PARTICIPANT, start=self.TEST_START + self.MS_IN_DAY,
+                                end=self.TEST_START + 2 * self.MS_IN_DAY)['data']
+            self.assertEqual(len(ret), 1441)
+            self.assertEqual(api.call_count, calls)
+
+    def test_iter_pages_prefetch(self):
+        # Test that streamed chunks are served from an open prefetch scope
+        plan = feature_types.feature_plan(['lamp.nearby_device'])
+        with feature_types.shared_fetches(self.TEST_PARTICIPANT, plan, self.TEST_START,
+                                          self.TEST_END):
+            nearby_device(id=self.TEST_PARTICIPANT, start=self.TEST_START, end=self.TEST_END)
+            calls = feature_types.LAMP.SensorEvent.all_by_participant.call_count
+            chunks = feature_types.iter_pages(nearby_device, id=self.TEST_PARTICIPANT,
+                                              start=self.TEST_START + self.MS_IN_DAY,
+                                              end=self.TEST_START + 2 * self.MS_IN_DAY)
+            self.assertEqual(sum(len(chunk) for chunk in chunks), 1441)
+            self.assertEqual(feature_types.LAMP.SensorEvent.all_by_participant.call_count,
+                             calls)
+
+    def test_batch_kernels(self):
+        # Test that batch kernels match the per-window computation
+        # Sparse events (a few empty windows, some on window edges)
+        timestamps = [*range(self.TEST_START, self.TEST_END + 1, 97 * 60000 // 2),
+                      *range(self.TEST_START, self.TEST_END + 1, self.MS_IN_DAY // 4)]
+        timestamps = sorted(t for t in timestamps if (t - self.TEST_START) // self.MS_IN_DAY != 2)
+        def sensor(data):
+            return [{'timestamp': t, 'data': data(i)} for i, t in enumerate(timestamps)]
+        self.sensors.update({
+            "lamp.nearby_device": sensor(lambda i: {'type': ['bluetooth', 'wifi'][i % 3 == 0],
+                                                    'address': 'address_' + str(i % 5)}),
+            "lamp.telephony": sensor(lambda i: {'duration': 1000 * (i % 7),
+                                                'type': 'incoming' if i % 3 else 'outgoing'}),
+            "lamp.device_state": sensor(lambda i: {'battery_level': (i % 5) / 4}),
+            "com.apple.sensorkit.device_usage": sensor(
+                lambda i: {'totalScreenWakes': i % 4, 'totalUnlocks': i % 5}),
+            "com.apple.sensorkit.phone_usage": sensor(
+                lambda i: {'totalPhoneCallDuration': 10 * i, 'totalIncomingCalls': i % 2,
+                           'totalOutgoingCalls': i % 3}),
+            "lamp.sleep": sensor(lambda i: {'duration': 60 * i,
+                                            'representation': ['in_bed', 'in_sleep'][i % 2]}),
+            "lamp.steps": sensor(lambda i: {'value': 10 * i, 'type': 'step_count',
+                                            'source': ['com.apple.health', 'pedometer'][i % 2],
+                                            'device_model': ['iPhone', 'Watch'][i % 3 == 0]}),
+        })
+        kwargs = {'id': self.TEST_PARTICIPANT, 'start': self.TEST_START,
+                  'end': self.TEST_END, 'resolution': self.MS_IN_DAY // 4}
+        cases = [(nearby_device_count, {}), (battery_level, {}), (screen_unlocks, {}),
+                 (screen_wakes, {}), (healthkit_sleep_duration, {}),
+                 (healthkit_sleep_duration, {'duration_type': 'in_sleep'}),
+                 *[(feature, {'sensor': sensor, 'call_direction': direction})
+                   for feature in [call_duration, call_number]
+                   for sensor in ['Telephony', 'SensorKit']
+                   for direction in ['all', 'incoming', 'outgoing']],
+                 *[(step_count_module.step_count, {'data_type': data_type})
+                   for data_type in ['health', 'pedometer', 'watch']]]
+        for feature, params in cases:
+            with self.subTest(feature=feature.__name__, **params):
+                expected = feature(**kwargs, **params)['data']
+                self.assertIn(None, [x['value'] for x in expected])
+                self.assertNotEqual({x['value'] for x in expected}, {None})
+                self.assertEqual(feature(batch=True, **kwargs, **params)['data'], expected)
+
+    def test_batch_kernels_missing_fields(self):
+        # Test that batch kernels handle missing fields like the per-window computation
+        kwargs = {'id': self.TEST_PARTICIPANT, 'start': self.TEST_START,
+                  'end': self.TEST_END, 'resolution': self.MS_IN_DAY}
+        for data, valid, invalid in [({'duration': 1000}, [(call_duration, 'all'),
+                                                          (call_number, 'all')],
+                                      [(call_duration, 'incoming'), (call_number, 'incoming')]),
+                                     ({'type': 'incoming'}, [(call_duration, 'outgoing'),
+                                                             (call_number, 'incoming')],
+                                      [(call_duration, 'all'), (call_duration, 'incoming')])]:
+            self.sensors["lamp.telephony"] = [
+                {'timestamp': t, 'data': data}
+                for t in range(self.TEST_START, self.TEST_START + self.MS_IN_DAY, 3600000)]
+            for feature, call_direction in valid:
+                expected = feature(call_direction=call_direction, **kwargs)['data']
+                self.assertEqual(feature(call_direction=call_direction, batch=True,
+                                         **kwargs)['data'], expected)
+            for feature, call_direction in invalid:
+                for batch in [False, True]:
+                    with self.assertRaises(KeyError):
+                        feature(call_direction=call_direction, batch=batch, **kwargs)
+
+if __name__ == '__main__':
+    unittest.main()
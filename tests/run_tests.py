@@ -0,0 +1,185 @@
+""" Module for unittesting cortex.run (without the LAMP API) """
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import subprocess
+import importlib
+import logging
+import multiprocessing
+from unittest import mock
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import cortex.feature_types as feature_types
+# (the cortex.run module, not the function)
+cortex_run = importlib.import_module('cortex.run')
+
+
+@feature_types.primary_feature(name='cortex.tests.memo', dependencies=[])
+def memo_feature(attach=False, **kwargs):
+    """ A primary feature without any data, to count primary memo hits """
+    return {'data': [], 'has_raw_data': -1}
+
+
+class TestRun(unittest.TestCase):
+    """ Class for testing cortex.run """
+    MS_IN_DAY = 60 * 60 * 24 * 1000
+    TEST_START = 1646485947205
+
+    def setUp(self):
+        """ Setup the tests """
+        logger = logging.getLogger()
+        logger.setLevel(logging.CRITICAL)
+
+    def _run_python(self, code):
+        # Imports must happen in a fresh interpreter
+        env = {**os.environ, 'PYTHONPATH': os.path.join(os.path.dirname(__file__), '..')}
+        return subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                              capture_output=True, text=True).stdout.strip()
+
+    def test_run_function_after_submodule_import(self):
+        # Test that importing the cortex.run submodule does not hide the run function
+        for code in ["import cortex.run",
+                     "from cortex.run import read_dataset",
+                     "import cortex.visualizations.correlation_functions",
+                     "import cortex\ncortex.run\nimport cortex.run as run_module"]:
+            ret = self._run_python(code + "\nimport cortex, inspect, sys\n"
+                                   + "print(inspect.isfunction(cortex.run),"
+                                   + " list(inspect.signature(cortex.run).parameters)[0],"
+                                   + " sys.modules['cortex.run'].read_dataset.__name__)")
+            self.assertEqual(ret, "True id_or_set read_dataset", code)
+
+    def _features(self, failing=()):
+        # Stand-in for 'get_features_for_participant', recording its calls
+        calls = []
+        def get_features(participant, features, *args, **kwargs):
+            calls.append(participant)
+            if participant in failing:
+                raise Exception("API Error (500)")
+            if participant == 'U3':
+                return {f: None for f in features}
+            return {f: {'data': [{'timestamp': self.TEST_START, 'value': len(participant)}]}
+                    for f in features}
+        return get_features, calls
+
+    @unittest.skipIf(multiprocessing.get_start_method() != 'fork',
+                     "the mocks are only inherited by forked workers")
+    def test_workers_memo_stats(self):
+        # Test that the memo counters of worker processes are only counted once
+        def get_features(participant, features, *args, **kwargs):
+            for _ in range(2):
+                memo_feature(id=participant, start=self.TEST_START,
+                             end=self.TEST_START + self.MS_IN_DAY)
+            return {f: {'data': [{'timestamp': self.TEST_START, 'value': 1}]}
+                    for f in features}
+        participants = ['U1', 'U2', 'U3', 'U4', 'U5']
+        with mock.patch.object(cortex_run, 'generate_ids', side_effect=lambda ids: ids), \
+                mock.patch.object(cortex_run, 'get_features_for_participant',
+                                  side_effect=get_features):
+            ret = cortex_run.run(participants, ['step_count'], start=self.TEST_START,
+                                 end=self.TEST_START + self.MS_IN_DAY, workers=2)
+        self.assertEqual(list(ret['step_count']['id']), participants)
+        self.assertEqual(feature_types.primary_memo_stats(),
+                         {'hits': 5, 'misses': 5, 'evictions': 0})
+
+    def _checkpointed_run(self, checkpoint_dir, failing=(), **kwargs):
+        get_features, calls = self._features(failing)
+        with mock.patch.object(cortex_run, 'generate_ids', side_effect=lambda ids: ids), \
+                mock.patch.object(cortex_run, 'get_features_for_participant',
+                                  side_effect=get_features):
+            ret = cortex_run.run(['U1', 'U2', 'U3'], ['step_count'], start=self.TEST_START,
+                                 end=self.TEST_START + self.MS_IN_DAY,
+                                 checkpoint_dir=checkpoint_dir, **kwargs)
+        return ret, calls
+
+    def test_checkpoint_commit(self):
+        # Test that committed pairs are resumed, except failed ones
+        checkpoint_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, checkpoint_dir)
+        args = {'features': ['step_count'], 'start': 0}
+        self.assertEqual(cortex_run._checkpoint_resume(checkpoint_dir, args), {})
+        frame = self._windows(0, 2, 1.0)
+        cortex_run._checkpoint_commit(checkpoint_dir, 'U1', 'step_count', 'done', frame)
+        cortex_run._checkpoint_commit(checkpoint_dir, 'U2', 'step_count', 'no_data')
+        cortex_run._checkpoint_commit(checkpoint_dir, 'U3', 'step_count', 'failed',
+                                      error="Exception()")
+        ret = cortex_run._checkpoint_resume(checkpoint_dir, args)
+        self.assertEqual(ret, {('U1', 'step_count'): ('done', 'U1_step_count.pkl'),
+                               ('U2', 'step_count'): ('no_data', None)})
+        pd.testing.assert_frame_equal(
+            pd.read_pickle(os.path.join(checkpoint_dir, 'U1_step_count.pkl')), frame)
+        self.assertFalse([f for f in os.listdir(checkpoint_dir) if f.endswith('.tmp')])
+        with self.assertRaises(Exception):
+            cortex_run._checkpoint_resume(checkpoint_dir, {**args, 'start': 1})
+
+    def test_checkpoint_resume(self):
+        # Test that a resumed run only computes the pairs that are not done
+        checkpoint_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, checkpoint_dir)
+        ret, calls = self._checkpointed_run(checkpoint_dir, failing=['U2'])
+        self.assertEqual(calls, ['U1', 'U2', 'U3'])
+        self.assertEqual(list(ret['step_count']['id']), ['U1'])
+        ret, calls = self._checkpointed_run(checkpoint_dir)
+        self.assertEqual(calls, ['U2'])
+        self.assertEqual(list(ret['step_count']['id']), ['U1', 'U2'])
+        self.assertEqual(list(ret['step_count']['value']), [2, 2])
+        ret, calls = self._checkpointed_run(checkpoint_dir)
+        self.assertEqual(calls, [])
+        self.assertEqual(list(ret['step_count']['id']), ['U1', 'U2'])
+        for kwargs in [{'resolution': self.MS_IN_DAY // 2}, {'cache': True},
+                       {'output_dataset': checkpoint_dir}]:
+            with self.assertRaises(Exception):
+                self._checkpointed_run(checkpoint_dir, **kwargs)
+        # Pairs whose data file is missing are computed again
+        os.remove(os.path.join(checkpoint_dir, 'U1_step_count.pkl'))
+        ret, calls = self._checkpointed_run(checkpoint_dir)
+        self.assertEqual(calls, ['U1'])
+        self.assertEqual(list(ret['step_count']['id']), ['U1', 'U2'])
+
+    def test_checkpoint_failed(self):
+        # Test that a run in which every pair failed has no data
+        checkpoint_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, checkpoint_dir)
+        ret, calls = self._checkpointed_run(checkpoint_dir, failing=['U1', 'U2', 'U3'])
+        self.assertEqual(calls, ['U1', 'U2', 'U3'])
+        self.assertIsNone(ret)
+
+    def _windows(self, first, last, value):
+        # Daily secondary feature results for days [first, last)
+        return pd.DataFrame({'timestamp': [self.TEST_START + i * self.MS_IN_DAY
+                                           for i in range(first, last)],
+                             'step_count': [value] * (last - first)})
+
+    def test_dataset_write_read(self):
+        # Test that results written to a Parquet dataset are read back
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        for participant in ['U1', 'U2']:
+            cortex_run._dataset_write(path, 'step_count', participant, self._windows(0, 3, 1.0))
+        ret = cortex_run.read_dataset(path)
+        self.assertEqual(list(ret), ['step_count'])
+        self.assertEqual(ret['step_count'].shape[0], 6)
+        self.assertEqual(sorted(ret['step_count']['id'].unique()), ['U1', 'U2'])
+        ret = cortex_run.read_dataset(path, participants=['U2'],
+                                      start=self.TEST_START + self.MS_IN_DAY)['step_count']
+        self.assertEqual(list(ret['timestamp']), [self.TEST_START + i * self.MS_IN_DAY
+                                                  for i in [1, 2]])
+        self.assertEqual(list(ret['id']), ['U2', 'U2'])
+
+    def test_dataset_write_overlap(self):
+        # Test that rows of overlapping runs are replaced rather than duplicated
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        cortex_run._dataset_write(path, 'step_count', 'U1', self._windows(0, 4, 1.0))
+        cortex_run._dataset_write(path, 'step_count', 'U1', self._windows(2, 6, 2.0))
+        cortex_run._dataset_write(path, 'step_count', 'U1', self._windows(3, 4, 3.0))
+        ret = cortex_run.read_dataset(path)['step_count'].sort_values('timestamp')
+        self.assertEqual(list(ret['timestamp']), [self.TEST_START + i * self.MS_IN_DAY
+                                                  for i in range(6)])
+        self.assertEqual(list(ret['step_count']), [1.0, 1.0, 2.0, 3.0, 2.0, 2.0])
+        cortex_run._dataset_write(path, 'step_count', 'U1', self._windows(0, 6, 4.0))
+        self.assertEqual(len(os.listdir(os.path.join(path, 'feature=step_count', 'id=U1'))), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -135,6 +135,23 @@ class TestSecondary(unittest.TestCase):
         self.assertEqual(ret0[4]['value'], 179956)
         self.assertEqual(ret0[5]['value'], 282319)
 
+    def test_step_count_batch(self):
+        # Test that the batch kernel matches the per-window computation
+        for data_type in ['health', 'pedometer', 'watch']:
+            ret0 = secondary.step_count.step_count(id=self.TEST_PARTICIPANT_STEPS,
+                                           start=self.TEST_START_TIME_STEPS,
+                                           end=self.TEST_START_TIME_STEPS + 6 * self.MS_IN_DAY + 1,
+                                           resolution=self.MS_IN_DAY,
+                                           data_type=data_type,
+                                           batch=True)["data"]
+            ret1 = secondary.step_count.step_count(id=self.TEST_PARTICIPANT_STEPS,
+                                           start=self.TEST_START_TIME_STEPS,
+                                           end=self.TEST_START_TIME_STEPS + 6 * self.MS_IN_DAY + 1,
+                                           resolution=self.MS_IN_DAY,
+                                           data_type=data_type,
+                                           batch=False)["data"]
+            self.assertEqual(ret0, ret1)
+
     def test_call_duration(self):
         # Test that call duration works
         # Argument 'x' tests whether erroneous argument returns None.
@@ -229,6 +246,21 @@ class TestSecondary(unittest.TestCase):
         self.assertEqual(rets_incoming[0], 1)
         self.assertEqual(rets_incoming[1], 1)
 
+    def test_call_number_prefetch(self):
+        # Test that prefetching raw data gives the same result as per-window requests
+        ret0 = cortex.secondary.call_number.call_number(id=self.TEST_PARTICIPANT_CALLS,
+                                        start=self.CALLS_TEST_START - self.MS_IN_DAY,
+                                        end=self.CALLS_TEST_END,
+                                        resolution=self.MS_IN_DAY)['data']
+        ret1 = cortex.secondary.call_number.call_number(id=self.TEST_PARTICIPANT_CALLS,
+                                        start=self.CALLS_TEST_START - self.MS_IN_DAY,
+                                        end=self.CALLS_TEST_END,
+                                        resolution=self.MS_IN_DAY,
+                                        prefetch=True)['data']
+        self.assertEqual(ret0, ret1)
+        self.assertEqual(ret1[0]['value'], None)
+        self.assertEqual(ret1[1]['value'], 2)
+
     def test_call_degree_incoming(self):
         # test argument specified as incoming
         ret = cortex.secondary.call_degree.call_degree(id=self.CALL_DEGREE_TEST_ID,